@@ -0,0 +1,57 @@
+import frappe
+
+# Meta Ads belongs to another app, its keys are added to it as Custom Fields
+META_ADS_KEY_FIELDS = [
+	{
+		"fieldname": "ad_key",
+		"fieldtype": "Data",
+		"label": "Ad Key",
+		"insert_after": "ads_name",
+		"hidden": 1,
+		"read_only": 1,
+		"no_copy": 1,
+		"search_index": 1,
+	},
+	{
+		"fieldname": "ads_name_key",
+		"fieldtype": "Data",
+		"label": "Ads Name Key",
+		"insert_after": "ad_key",
+		"hidden": 1,
+		"read_only": 1,
+		"no_copy": 1,
+		"search_index": 1,
+	},
+]
+
+
+def get_ad_key(value):
+	"""Canonical ad id: trimmed, lower case and without the ".0" spreadsheets add to numeric ids.
+
+	Stored as `ad_key` on Lead (from `meta_ad_id`), Campaign Expense (from `ad_id`)
+	and Meta Ads (from its name), replacing the `REPLACE(LOWER(TRIM(...)), '.0', '')`
+	the reports used to compare ids with.
+	"""
+	key = str(value or "").strip().lower().replace(".0", "")
+	return key or None
+
+
+def get_ads_name_key(value):
+	"""Case-insensitive lookup key of a Meta Ads `ads_name`."""
+	key = str(value or "").strip().lower()
+	return key or None
+
+
+def has_meta_ads_keys():
+	"""Whether the Meta Ads key Custom Fields exist yet (see `make_meta_ads_key_fields`)."""
+	return frappe.get_meta("Meta Ads").has_field("ads_name_key")
+
+
+def make_meta_ads_key_fields():
+	"""Create the Meta Ads key Custom Fields, when the Meta Ads doctype is installed."""
+	if not frappe.db.exists("DocType", "Meta Ads"):
+		return
+
+	from frappe.custom.doctype.custom_field.custom_field import create_custom_fields
+
+	create_custom_fields({"Meta Ads": META_ADS_KEY_FIELDS}, update=True)
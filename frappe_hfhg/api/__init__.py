@@ -1,5 +1,8 @@
-from datetime import datetime, timedelta;
+from datetime import datetime;
 from frappe_hfhg.frappe_hfhg.doctype.lead.lead import get_original_lead_name
+from frappe_hfhg.api.calendar import get_cached_calendar_response, get_income_till_date
+from frappe_hfhg.api.dashboard import FULL_ACCESS_ROLES, get_dashboard_card
+from frappe_hfhg.user_scope import get_user_scope
 import frappe
 # from frappe.utils.data import today
 import json
@@ -13,737 +16,61 @@ from frappe.utils import (
 	getdate,
 	month_diff,
 	split_emails,
-	today,
-    add_months,get_weekday,formatdate
+    add_months,get_weekday,formatdate,cint
 )
-from datetime import datetime, timedelta
 from  functools import reduce
 from frappe.utils.password import update_password
 from frappe.core.doctype.user import user
 
-month_ago = (datetime.today() - timedelta(days=30)).strftime('%Y-%m-%d')
-month_later = (datetime.today() + timedelta(days=30)).strftime('%Y-%m-%d')
-
-full_access_roles = ["Lead Distributor", "HOD", "Marketing Head", "Accountant", "Lead checker", "Surbhi-backend"]
+full_access_roles = FULL_ACCESS_ROLES
 
 @frappe.whitelist()
 def get_total_leads():
-    user = frappe.session.user
-    roles = frappe.get_roles()
-    for full_access_role in full_access_roles:
-        if full_access_role in roles:
-            count = frappe.db.count('Lead')
-            return {
-                "value": count,
-                "fieldtype": "Int",
-                "route_options": {"from_date": "2024-01-01"},
-                "route": ["lead"]
-            }
-    
-    is_clinic_manager = frappe.db.exists("Center", {'clinic_manager': user})
-    if is_clinic_manager:
-        center = frappe.db.get_value('Center', {'clinic_manager': user}, ['name'], as_dict=1)
-        leads = frappe.get_all('Lead', filters={'center': center.name})
-        return {
-            "value": len(leads),
-            "fieldtype": "Int",
-            "route_options": {"from_date": "2024-01-01"},
-            "route": ["lead", "?center=" + center.name]
-        }
-
-    is_receptionist = frappe.db.exists("Receptionist", {'email': user})
-    if is_receptionist:
-        receptionist = frappe.db.get_value('Receptionist', {'email': user}, ['name', 'center'], as_dict=1)
-        leads = frappe.get_all('Lead', filters={'center': receptionist.center})
-        return {
-            "value": len(leads),
-            "fieldtype": "Int",
-            "route_options": {"from_date": "2024-01-01"},
-            "route": ["lead", "?center=" + receptionist.center]
-        }
-
-    is_executive = frappe.db.exists("Executive", {'email': user})
-    if is_executive:
-        executive = frappe.db.get_value('Executive', {'email': user}, ['name'], as_dict=1)
-        leads = frappe.get_all('Lead', filters={'executive': executive.name})
-        return {
-            "value": len(leads),
-            "fieldtype": "Int",
-            "route_options": {"from_date": "2024-01-01"},
-            "route": ["lead", "?executive=" + executive.name]
-        }
-    
-    count = frappe.db.count('Lead')
-    return {
-        "value": count,
-        "fieldtype": "Int",
-        "route_options": {"from_date": "2024-01-01"},
-        "route": ["lead"]
-    }
+    return get_dashboard_card("total_leads")
 
 @frappe.whitelist()
 def get_open_reminders_count():
-    user = frappe.session.user
-    roles = frappe.get_roles()
-    three_days_later = (datetime.today() + timedelta(days=3)).strftime('%Y-%m-%d')
-    for full_access_role in full_access_roles:
-        if full_access_role in roles:
-            count =  frappe.db.count('Reminders', filters={'status': 'Open', 'date': ('between', [today(), three_days_later])})
-            return {
-                "value": count,
-                "fieldtype": "Int",
-                "route_options": {"from_date": today(), "to_date": three_days_later, "status": "Upcoming"},
-                "route": ["query-report", "Reminder Report"]
-            }
-
-    is_clinic_manager = frappe.db.exists("Center", {'clinic_manager': user})
-    if is_clinic_manager:
-        executive = frappe.db.get_value('Executive', {'email': user}, ['name','fullname'], as_dict=1)
-        count =  frappe.db.count('Reminders', filters={'status': 'Open', 'date': ('between', [today(), three_days_later]), 'executive': ('in', [executive.name, executive.fullname])})
-
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"from_date": today(), "to_date": three_days_later, "status": "Upcoming"},
-            "route": ["query-report", "Reminder Report"]
-        }
-
-    is_receptionist = frappe.db.exists("Receptionist", {'email': user})
-    if is_receptionist:
-        receptionist = frappe.db.get_value('Receptionist', {'email': user}, ['name', 'center'], as_dict=1)
-        leads = frappe.get_all('Lead', filters={'center': receptionist.center})
-        total = 0
-        for lead in leads:
-            count =  frappe.db.count('Reminders', filters={'status': 'Open', 'date': ('between', [today(), three_days_later]), 'parent': lead.name})
-            total = total + count
-
-        return {
-            "value": total,
-            "fieldtype": "Int",
-            "route_options": {"from_date": today(), "to_date": three_days_later, "status": "Upcoming"},
-            "route": ["query-report", "Reminder Report"]
-        }
-
-    is_executive = frappe.db.exists("Executive", {'email': user})
-    if is_executive:
-        executive = frappe.db.get_value('Executive', {'email': user}, ['name','fullname'], as_dict=1)
-        count =  frappe.db.count('Reminders', filters={'status': 'Open', 'date': ('between', [today(), three_days_later]), 'executive': ('in', [executive.name, executive.fullname])})
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"from_date": today(), "to_date": three_days_later, "status": "Upcoming"},
-            "route": ["query-report", "Reminder Report"]
-        }
-
-    count =  frappe.db.count('Reminders', filters={'status': 'Open', 'date': ('between', [today(), three_days_later])})
-    return {
-        "value": count,
-        "fieldtype": "Int",
-        "route_options": {"from_date": today(), "to_date": three_days_later, "status": "Upcoming"},
-        "route": ["query-report", "Reminder Report"]
-    }
-
+    return get_dashboard_card("open_reminders")
 
 @frappe.whitelist()
 def get_all_reminders_count():
-    user = frappe.session.user
-    roles = frappe.get_roles()
-    for full_access_role in full_access_roles:
-        if full_access_role in roles:
-            count =  frappe.db.count('Reminders', filters={'date': ('between', [today(), month_later])})
-            return {
-                "value": count,
-                "fieldtype": "Int",
-                "route_options": {"from_date": today(), "to_date": month_later},
-                "route": ["query-report", "Master Reminder Report"]
-            }
-
-    is_clinic_manager = frappe.db.exists("Center", {'clinic_manager': user})
-    if is_clinic_manager:
-        executive = frappe.db.get_value('Executive', {'email': user}, ['name','fullname'], as_dict=1)
-        count =  frappe.db.count('Reminders', filters={'date': ('between', [today(), month_later]), 'executive': ('in', [executive.name, executive.fullname])})
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"from_date": today(), "to_date": month_later},
-            "route": ["query-report", "Master Reminder Report"]
-        }
-
-    is_receptionist = frappe.db.exists("Receptionist", {'email': user})
-    if is_receptionist:
-        receptionist = frappe.db.get_value('Receptionist', {'email': user}, ['name', 'center'], as_dict=1)
-        leads = frappe.get_all('Lead', filters={'center': receptionist.center})
-        total = 0
-        for lead in leads:
-            count =  frappe.db.count('Reminders', filters={'date': ('between', [today(), month_later]), 'parent': lead.name})
-            total = total + count
-
-        return {
-            "value": total,
-            "fieldtype": "Int",
-            "route_options": {"from_date": today(), "to_date": month_later},
-            "route": ["query-report", "Master Reminder Report"]
-        }
-
-    is_executive = frappe.db.exists("Executive", {'email': user})
-    if is_executive:
-        executive = frappe.db.get_value('Executive', {'email': user}, ['name','fullname'], as_dict=1)
-        count =  frappe.db.count('Reminders', filters={'date': ('between', [today(), month_later]), 'executive': ('in', [executive.name, executive.fullname])})
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"from_date": today(), "to_date": month_later},
-            "route": ["query-report", "Master Reminder Report"]
-        }
-
-    count =  frappe.db.count('Reminders', filters={'date': ('between', [today(), month_later])})
-    return {
-        "value": count,
-        "fieldtype": "Int",
-        "route_options": {"from_date": today(), "to_date": month_later},
-        "route": ["query-report", "Master Reminder Report"]
-    }
+    return get_dashboard_card("all_reminders")
 
 @frappe.whitelist()
 def get_closed_reminders_count():
-    user = frappe.session.user
-    roles = frappe.get_roles()
-    for full_access_role in full_access_roles:
-        if full_access_role in roles:
-            count = frappe.db.count('Reminders', filters={'status': 'Close', 'date': ('between', [month_ago, today()])})
-
-            return {
-                "value": count,
-                "fieldtype": "Int",
-                "route_options": {"from_date": month_ago, "to_date": today(), "status": "Completed"},
-                "route": ["query-report", "Master Reminder Report"]
-            }
-
-    is_clinic_manager = frappe.db.exists("Center", {'clinic_manager': user})
-    if is_clinic_manager:
-        executive = frappe.db.get_value('Executive', {'email': user}, ['name', 'fullname'], as_dict=1)
-        count =  frappe.db.count('Reminders', filters={'status': 'Close', 'date': ('between', [month_ago, today()]), 'executive': ('in', [executive.name, executive.fullname])})
-
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"from_date": month_ago, "to_date": today(), "status": "Completed"},
-            "route": ["query-report", "Master Reminder Report"]
-        }
-    
-    is_receptionist = frappe.db.exists("Receptionist", {'email': user})
-    if is_receptionist:
-        receptionist = frappe.db.get_value('Receptionist', {'email': user}, ['name', 'center'], as_dict=1)
-        leads = frappe.get_all('Lead', filters={'center': receptionist.center})
-        total = 0
-        for lead in leads:
-            count =  frappe.db.count('Reminders', filters={'status': 'Close', 'date': ('between', [month_ago, today()]), 'parent': lead.name})
-            total = total + count
-
-        return {
-            "value": total,
-            "fieldtype": "Int",
-            "route_options": {"from_date": month_ago, "to_date": today(), "status": "Completed"},
-            "route": ["query-report", "Master Reminder Report"]
-        }
-
-    is_executive = frappe.db.exists("Executive", {'email': user})
-    if is_executive:
-        executive = frappe.db.get_value('Executive', {'email': user}, ['name', 'fullname'], as_dict=1)
-        count =  frappe.db.count('Reminders', filters={'status': 'Close', 'date': ('between', [month_ago, today()]), 'executive': ('in', [executive.name, executive.fullname])})
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"from_date": month_ago, "to_date": today(), "status": "Completed"},
-            "route": ["query-report", "Master Reminder Report"]
-        }
-
-    count = frappe.db.count('Reminders', filters={'status': 'Close', 'date': ('between', [month_ago, today()])})
-
-    return {
-        "value": count,
-        "fieldtype": "Int",
-        "route_options": {"from_date": month_ago, "to_date": today(), "status": "Completed"},
-        "route": ["query-report", "Master Reminder Report"]
-    }
+    return get_dashboard_card("closed_reminders")
 
 @frappe.whitelist()
 def get_missed_reminders_count():
-    previous_day = datetime.today().date() - timedelta(days=1)
-    
-    user = frappe.session.user
-    roles = frappe.get_roles()
-    for full_access_role in full_access_roles:
-        if full_access_role in roles:
-            count = frappe.db.count('Reminders', filters={'status': 'Open', 'date': ('between', [month_ago, previous_day])})
-
-            return {
-                "value": count,
-                "fieldtype": "Int",
-                "route_options": {"from_date": month_ago, "to_date": previous_day, "status": "Missed"},
-                "route": ["query-report", "Master Reminder Report"]
-            }
-
-    is_clinic_manager = frappe.db.exists("Center", {'clinic_manager': user})
-    if is_clinic_manager:
-        executive = frappe.db.get_value('Executive', {'email': user}, ['name','fullname'], as_dict=1)
-        count =  frappe.db.count('Reminders', filters={'status': 'Open', 'date': ('between', [month_ago, previous_day]), 'executive':  ('in', [executive.name, executive.fullname])})
-
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"from_date": month_ago, "to_date": previous_day, "status": "Missed"},
-            "route": ["query-report", "Master Reminder Report"]
-        }
-    
-    is_receptionist = frappe.db.exists("Receptionist", {'email': user})
-    if is_receptionist:
-        receptionist = frappe.db.get_value('Receptionist', {'email': user}, ['name', 'center'], as_dict=1)
-        leads = frappe.get_all('Lead', filters={'center': receptionist.center})
-        total = 0
-        for lead in leads:
-            count =  frappe.db.count('Reminders', filters={'status': 'Open', 'date': ('between', [month_ago, previous_day]), 'parent': lead.name})
-            total = total + count
-
-        return {
-            "value": total,
-            "fieldtype": "Int",
-            "route_options": {"from_date": month_ago, "to_date": previous_day, "status": "Missed"},
-            "route": ["query-report", "Master Reminder Report"]
-        }
-
-    is_executive = frappe.db.exists("Executive", {'email': user})
-    if is_executive:
-        executive = frappe.db.get_value('Executive', {'email': user}, ['name','fullname'], as_dict=1)
-        count =  frappe.db.count('Reminders', filters={'status': 'Open', 'date': ('between', [month_ago, previous_day]), 'executive':  ('in', [executive.name, executive.fullname])})
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"from_date": month_ago, "to_date": previous_day, "status": "Missed"},
-            "route": ["query-report", "Master Reminder Report"]
-        }
-    
-    count = frappe.db.count('Reminders', filters={'status': 'Open', 'date': ('between', [month_ago, previous_day])})
-
-    return {
-        "value": count,
-        "fieldtype": "Int",
-        "route_options": {"from_date": month_ago, "to_date": previous_day, "status": "Missed"},
-        "route": ["query-report", "Master Reminder Report"]
-    }
+    return get_dashboard_card("missed_reminders")
 
 @frappe.whitelist()
 def get_today_reminders_count():
-    user = frappe.session.user
-    roles = frappe.get_roles()
-    for full_access_role in full_access_roles:
-        if full_access_role in roles:
-            count = frappe.db.count('Reminders', filters={'status': 'Open', 'date': ('=', today())})
-            return {
-                "value": count,
-                "fieldtype": "Int",
-                "route_options": {"from_date": today(), "to_date": today(), "status": "Upcoming"},
-                "route": ["query-report", "Reminder Report"]
-            }
-
-    is_clinic_manager = frappe.db.exists("Center", {'clinic_manager': user})
-    if is_clinic_manager:
-        executive = frappe.db.get_value('Executive', {'email': user}, ['name','fullname'], as_dict=1)
-        count =  frappe.db.count('Reminders', filters={'status': 'Open', 'date': ('=', today()), 'executive': ('in', [executive.name, executive.fullname])})
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"from_date": today(), "to_date": today(), "status": "Upcoming"},
-            "route": ["query-report", "Reminder Report"]
-        }
-    
-    is_receptionist = frappe.db.exists("Receptionist", {'email': user})
-    if is_receptionist:
-        receptionist = frappe.db.get_value('Receptionist', {'email': user}, ['name', 'center'], as_dict=1)
-        leads = frappe.get_all('Lead', filters={'center': receptionist.center})
-        total = 0
-        for lead in leads:
-            count =  frappe.db.count('Reminders', filters={'status': 'Open', 'date': ('=', today()), 'parent': lead.name})
-            total = total + count
-
-        return {
-            "value": total,
-            "fieldtype": "Int",
-            "route_options": {"from_date": today(), "to_date": today(), "status": "Upcoming"},
-            "route": ["query-report", "Reminder Report"]
-        }
-
-    is_executive = frappe.db.exists("Executive", {'email': user})
-    if is_executive:
-        executive = frappe.db.get_value('Executive', {'email': user}, ['name','fullname'], as_dict=1)
-        count =  frappe.db.count('Reminders', filters={'status': 'Open', 'date': ('=', today()), 'executive': ('in', [executive.name, executive.fullname])})
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"from_date": today(), "to_date": today(), "status": "Upcoming"},
-            "route": ["query-report", "Reminder Report"]
-        }
-
-
-    count = frappe.db.count('Reminders', filters={'status': 'Open', 'date': ('=', today())})
-
-    return {
-        "value": count,
-        "fieldtype": "Int",
-        "route_options": {"from_date": today(), "to_date": today(), "status": "Upcoming"},
-        "route": ["query-report", "Reminder Report"]
-    }
-
+    return get_dashboard_card("today_reminders")
 
 @frappe.whitelist()
 def get_upcoming_consultation_count():
-    user = frappe.session.user
-    roles = frappe.get_roles()
-    for full_access_role in full_access_roles:
-        if full_access_role in roles:
-            count =  frappe.db.count('Consultation', filters={'status': 'Scheduled', 'date': ('between', [today(), month_later])})
-            return {
-                "value": count,
-                "fieldtype": "Int",
-                "route_options": {"from_date": today(), "to_date": month_later},
-                "route": ["query-report", "Consultation Report"]
-            }
-    is_clinic_manager = frappe.db.exists("Center", {'clinic_manager': user})
-    if is_clinic_manager:
-        center = frappe.db.get_value('Center', {'clinic_manager': user}, ['name'], as_dict=1)    
-        count =  frappe.db.count('Consultation', filters={'status': 'Scheduled', 'date': ('between', [today(), month_later]), 'center': center.name})
-
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"from_date": today(), "to_date": month_later},
-            "route": ["query-report", "Consultation Report"]
-        }
-
-
-    is_receptionist = frappe.db.exists("Receptionist", {'email': user})
-    if is_receptionist:
-        receptionist = frappe.db.get_value('Receptionist', {'email': user}, ['name', 'center'], as_dict=1)
-        count =  frappe.db.count('Consultation', filters={'status': 'Scheduled', 'date': ('between', [today(), month_later]), 'center': receptionist.center})
-
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"from_date": today(), "to_date": month_later},
-            "route": ["query-report", "Consultation Report"]
-        }
-
-    is_executive = frappe.db.exists("Executive", {'email': user})
-    if is_executive:
-        executive = frappe.db.get_value('Executive', {'email': user}, ['name'], as_dict=1)
-        count =  frappe.db.count('Consultation', filters={'status': 'Scheduled', 'date': ('between', [today(), month_later]), 'executive': executive.name})
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"from_date": today(), "to_date": month_later},
-            "route": ["query-report", "Consultation Report"]
-        }
-
-    count =  frappe.db.count('Consultation', filters={'status': 'Scheduled', 'date': ('between', [today(), month_later])})
-    return {
-        "value": count,
-        "fieldtype": "Int",
-        "route_options": {"from_date": today(), "to_date": month_later},
-        "route": ["query-report", "Consultation Report"]
-    }
-
+    return get_dashboard_card("upcoming_consultation")
 
 @frappe.whitelist()
 def get_upcoming_surgery_count():
-    user = frappe.session.user
-    roles = frappe.get_roles()
-    for full_access_role in full_access_roles:
-        if full_access_role in roles:
-            count =  frappe.db.count('Surgery', filters={'surgery_status': 'Booked', 'surgery_date': ('between', [today(), month_later])})
-            return {
-                "value": count,
-                "fieldtype": "Int",
-                "route_options": {"from_date": today(), "to_date": month_later},
-                "route": ["query-report", "Surgery Report"]
-            }
-
-    is_clinic_manager = frappe.db.exists("Center", {'clinic_manager': user})
-    if is_clinic_manager:
-        center = frappe.db.get_value('Center', {'clinic_manager': user}, ['name'], as_dict=1)    
-        count =  frappe.db.count('Surgery', filters={'surgery_status': 'Booked', 'surgery_date': ('between', [today(), month_later]), 'center': center.name})
-
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"from_date": today(), "to_date": month_later, "center": center.name},
-            "route": ["query-report", "Surgery Report"]
-        }
-
-    is_receptionist = frappe.db.exists("Receptionist", {'email': user})
-    if is_receptionist:
-        receptionist = frappe.db.get_value('Receptionist', {'email': user}, ['name', 'center'], as_dict=1)
-        count =  frappe.db.count('Surgery', filters={'surgery_status': 'Booked', 'surgery_date': ('between', [today(), month_later]), 'center': receptionist.center})
-
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"from_date": today(), "to_date": month_later, "center": receptionist.center},
-            "route": ["query-report", "Surgery Report"]
-        }
-
-    is_executive = frappe.db.exists("Executive", {'email': user})
-    if is_executive:
-        executive = frappe.db.get_value('Executive', {'email': user}, ['name'], as_dict=1)
-        count =  frappe.db.count('Surgery', filters={'surgery_status': 'Booked', 'surgery_date': ('between', [today(), month_later]), 'executive': executive.name})
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"from_date": today(), "to_date": month_later, "executive": executive.name},
-            "route": ["query-report", "Surgery Report"]
-        }
-
-    count =  frappe.db.count('Surgery', filters={'surgery_status': 'Booked', 'surgery_date': ('between', [today(), month_later])})
-    return {
-        "value": count,
-        "fieldtype": "Int",
-        "route_options": {"from_date": today(), "to_date": month_later},
-        "route": ["query-report", "Surgery Report"]
-    }
-
+    return get_dashboard_card("upcoming_surgery")
 
 @frappe.whitelist()
 def get_todays_surgery_count():
-    user = frappe.session.user
-    roles = frappe.get_roles()
-    for full_access_role in full_access_roles:
-        if full_access_role in roles:
-            count =  frappe.db.count('Surgery', filters={'surgery_date': ('=', today())})
-            return {
-                "value": count,
-                "fieldtype": "Int",
-                "route_options": {"surgery_date": today()},
-                "route": ["surgery", "view", "list"]
-            }
-
-    is_clinic_manager = frappe.db.exists("Center", {'clinic_manager': user})
-    if is_clinic_manager:
-        center = frappe.db.get_value('Center', {'clinic_manager': user}, ['name'], as_dict=1)    
-        count =  frappe.db.count('Surgery', filters={'surgery_date': ('=', today()), 'center': center.name})
-
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"surgery_date": today(), "center": center.name},
-            "route": ["surgery", "view", "list"]
-        }
-
-    is_receptionist = frappe.db.exists("Receptionist", {'email': user})
-    if is_receptionist:
-        receptionist = frappe.db.get_value('Receptionist', {'email': user}, 'name')
-        center = frappe.db.get_value('Center',{'receptionist': receptionist}, 'name' )
-        count =  frappe.db.count('Surgery', filters={'surgery_date': ('=', today()), 'center': center})
-
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"surgery_date": today(), "center": center},
-            "route": ["surgery", "view", "list"]
-        }
-
-    is_executive = frappe.db.exists("Executive", {'email': user})
-    if is_executive:
-        executive = frappe.db.get_value('Executive', {'email': user}, ['name'], as_dict=1)
-        count =  frappe.db.count('Surgery', filters={'surgery_date':('=', today()), 'executive': executive.name})
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"surgery_date": today(), "executive": executive.name},
-            "route": ["surgery", "view", "list"]
-        }
-
-    count =  frappe.db.count('Surgery', filters={'surgery_date': ('=', today())})
-    return {
-        "value": count,
-        "fieldtype": "Int",
-        "route_options": {"surgery_date": today()},
-        "route": ["surgery", "view", "list"]
-    }
+    return get_dashboard_card("todays_surgery")
 
 @frappe.whitelist()
 def get_todays_consultation_count():
-    user = frappe.session.user
-
-    roles = frappe.get_roles()
-    for full_access_role in full_access_roles:
-        if full_access_role in roles:    
-            count =  frappe.db.count('Consultation', filters={'date': ('=', today())})
-            return {
-                "value": count,
-                "fieldtype": "Int",
-                "route_options": {"date": today()},
-                "route": ["consultation", "view", "list"]
-            }
-    is_clinic_manager = frappe.db.exists("Center", {'clinic_manager': user})
-    if is_clinic_manager:
-        center = frappe.db.get_value('Center', {'clinic_manager': user}, ['name'], as_dict=1)    
-        count =  frappe.db.count('Consultation', filters={'date': ('=', today()), 'center': center.name})
-
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"date": today(), "center": center.name},
-            "route": ["consultation", "view", "list"]
-        }
-
-    is_receptionist = frappe.db.exists("Receptionist", {'email': user})
-    if is_receptionist:
-        receptionist = frappe.db.get_value('Receptionist', {'email': user}, 'name')
-        center = frappe.db.get_value('Center',{'receptionist': receptionist}, 'name' )
-        count =  frappe.db.count('Consultation', filters={'date': ('=', today()), 'center': center})
-
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"date": today(), "center": center},
-            "route": ["consultation", "view", "list"]
-        }
-
-    is_executive = frappe.db.exists("Executive", {'email': user})
-    if is_executive:
-        executive = frappe.db.get_value('Executive', {'email': user}, ['name'], as_dict=1)
-        count =  frappe.db.count('Consultation', filters={'date':('=', today()), 'executive': executive.name})
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"date": today(), "executive": executive.name},
-            "route": ["consultation", "view", "list"]   
-        }
-
-    count =  frappe.db.count('Consultation', filters={'date': ('=', today())})
-    return {
-        "value": count,
-        "fieldtype": "Int",
-        "route_options": {"date": today()},
-        "route": ["consultation", "view", "list"]
-    }
+    return get_dashboard_card("todays_consultation")
 
 @frappe.whitelist()
 def get_todays_prospect_count():
-    user = frappe.session.user
-
-    roles = frappe.get_roles()
-    for full_access_role in full_access_roles:
-        if full_access_role in roles:    
-            count =  frappe.db.count('Costing', filters={'booking_date': ('=', today()), 'status': 'Prospect'})
-            return {
-                "value": count,
-                "fieldtype": "Int",
-                "route_options": {"booking_date": today(), 'status': 'Prospect'},
-                "route": ["costing", "view", "list"]
-            }
-        
-    is_executive = frappe.db.exists("Executive", {'email': user})
-    if is_executive:
-        executive = frappe.db.get_value('Executive', {'email': user}, ['name'], as_dict=1)
-        count =  frappe.db.count('Costing', filters={'booking_date': ('=', today()), 'status': 'Prospect', 'executive': executive.name})
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"booking_date": today(), "executive": executive.name},
-            "route": ["costing", "view", "list"]   
-        }
-    
-    is_clinic_manager = frappe.db.exists("Center", {'clinic_manager': user})
-    if is_clinic_manager:
-        center = frappe.db.get_value('Center', {'clinic_manager': user}, ['name'], as_dict=1)    
-        count =  frappe.db.count('Costing', filters={'booking_date': ('=', today()), 'status': 'Prospect', 'center': center.name})
-
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"booking_date": today(), "center": center.name},
-            "route": ["costing", "view", "list"]
-        }
-    
-    is_receptionist = frappe.db.exists("Receptionist", {'email': user})
-    if is_receptionist:
-        receptionist = frappe.db.get_value('Receptionist', {'email': user}, 'name')
-        center = frappe.db.get_value('Center',{'receptionist': receptionist}, 'name' )
-        count =  frappe.db.count('Costing', filters={'booking_date': ('=', today()), 'status': 'Prospect', 'center': center})
-
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"booking_date": today(), "center": center},
-            "route": ["costing", "view", "list"]
-        }
-    
-    count =  frappe.db.count('Costing', filters={'booking_date': ('=', today()), 'status': 'Prospect'})
-    return {
-        "value": count,
-        "fieldtype": "Int",
-        "route_options": {"booking_date": today(), 'status': 'Prospect'},
-        "route": ["costing", "view", "list"]
-    }
+    return get_dashboard_card("todays_prospect")
 
 @frappe.whitelist()
 def get_todays_booking_count():
-    user = frappe.session.user
-
-    roles = frappe.get_roles()
-    for full_access_role in full_access_roles:
-        if full_access_role in roles:    
-            count =  frappe.db.count('Costing', filters={'book_date': ('=', today()), 'status': 'Booking'})
-            return {
-                "value": count,
-                "fieldtype": "Int",
-                "route_options": {"book_date": today(), 'status': 'Booking'},
-                "route": ["costing", "view", "list"]
-            }
-        
-    is_executive = frappe.db.exists("Executive", {'email': user})
-    if is_executive:
-        executive = frappe.db.get_value('Executive', {'email': user}, ['name'], as_dict=1)
-        count =  frappe.db.count('Costing', filters={'book_date': ('=', today()), 'status': 'Booking', 'executive': executive.name})
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"book_date": today(), "executive": executive.name},
-            "route": ["costing", "view", "list"]   
-        } 
-    
-    is_clinic_manager = frappe.db.exists("Center", {'clinic_manager': user})
-    if is_clinic_manager:
-        center = frappe.db.get_value('Center', {'clinic_manager': user}, ['name'], as_dict=1)    
-        count =  frappe.db.count('Costing', filters={'book_date': ('=', today()), 'status': 'Booking', 'center': center.name})
-
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"book_date": today(), "center": center.name},
-            "route": ["costing", "view", "list"]
-        }
-    
-    is_receptionist = frappe.db.exists("Receptionist", {'email': user})
-    if is_receptionist:
-        receptionist = frappe.db.get_value('Receptionist', {'email': user}, 'name')
-        center = frappe.db.get_value('Center',{'receptionist': receptionist}, 'name' )
-        count =  frappe.db.count('Costing', filters={'book_date': ('=', today()), 'status': 'Booking', 'center': center})
-
-        return {
-            "value": count,
-            "fieldtype": "Int",
-            "route_options": {"book_date": today(), "center": center},
-            "route": ["costing", "view", "list"]
-        }
-    
-    count =  frappe.db.count('Costing', filters={'book_date': ('=', today()), 'status': 'Booking'})
-    return {
-        "value": count,
-        "fieldtype": "Int",
-        "route_options": {"book_date": today(),'status': 'Booking'},
-        "route": ["costing", "view", "list"]
-    }
+    return get_dashboard_card("todays_booking")
 
 
 @frappe.whitelist(allow_guest=True)
@@ -860,6 +187,14 @@ def get_dropdown_options():
  
 @frappe.whitelist()   
 def get_calendar_data(year, month, center = "ALL" , types  = "ALL" ):
+    income_sources = ["Surgery", "Consultation", "Treatment"] if types == "ALL" else [types]
+    return get_cached_calendar_response(
+        "calendar", year, month, center, types,
+        lambda: build_calendar_data(year, month, center, types),
+        income_sources,
+    )
+
+def build_calendar_data(year, month, center = "ALL" , types  = "ALL" ):
     today = frappe.utils.today()
     # Validate month is between 1-12
     month_int = int(month)
@@ -908,45 +243,42 @@ def get_calendar_data(year, month, center = "ALL" , types  = "ALL" ):
     
     surgeries_docs = frappe.db.sql(surgery_sql, tuple(surgery_params), as_dict=True)
     
-    surgery_entries = frappe.get_all("Graft Entry", filters={"date" : ["between", [start_date,end_date]]}, fields=["*"],ignore_permissions=True)
-    surgeries = []
-    for y in surgery_entries:
-        surgery = frappe.get_doc("Surgery", y["parent"], fields=["*"],ignore_permissions=True)
-        if center == "ALL" or surgery.center == center:
-            # Get full_name from Lead via Costing
-            full_name = surgery.patient  # Default to patient ID
-            try:
-                costing = frappe.get_doc("Costing", surgery.patient)
-                if costing.patient:
-                    lead = frappe.get_doc("Lead", costing.patient)
-                    full_name = lead.full_name if lead.full_name else surgery.patient
-            except:
-                pass
-            
-            surgeries.append({
-            "type" : "Surgery",
-            "date" : y["date"],
-            "name": full_name,
-            "doctor": surgery.doctor,
-            "contact_number": surgery.contact_number,
-            "center": surgery.center,
-            "status" : surgery.surgery_status,
-            "city" : surgery.city,
-            "note" : surgery.note,
-            "executive" : surgery.executive,
-            "lead_source" : surgery.lead_source,
-            "grafts" : surgery.grafts,
-            "graft_price" : surgery.graft_price,
-            "technique" : surgery.technique,
-            "amount_paid" : surgery.amount_paid,
-            "prp" : surgery.prp,
-            "pending_amount" : surgery.pending_amount,
-            "with_gst_amount" : surgery.with_gst_amount,
-            "without_gst_amount" : surgery.without_gst_amount
-            })
-    
-    for x in surgeries_docs:
-        new_obj = {
+    # Graft Entry dates with their Surgery and the Lead name resolved in the same query
+    graft_sql = """
+        SELECT 
+            g.date,
+            COALESCE(NULLIF(l.full_name, ''), s.patient) as name,
+            s.doctor,
+            s.contact_number,
+            s.center,
+            s.surgery_status,
+            s.city,
+            s.note,
+            s.executive,
+            s.lead_source,
+            s.grafts,
+            s.graft_price,
+            s.technique,
+            s.amount_paid,
+            s.prp,
+            s.pending_amount,
+            s.with_gst_amount,
+            s.without_gst_amount
+        FROM `tabGraft Entry` g
+        INNER JOIN `tabSurgery` s ON g.parent = s.name AND g.parenttype = 'Surgery'
+        LEFT JOIN `tabCosting` c ON s.patient = c.name
+        LEFT JOIN `tabLead` l ON c.patient = l.name
+        WHERE g.date BETWEEN %s AND %s
+    """
+    graft_params = [start_date, end_date]
+    if center != "ALL":
+        graft_sql += " AND s.center = %s"
+        graft_params.append(center)
+
+    surgery_entries = frappe.db.sql(graft_sql, tuple(graft_params), as_dict=True)
+
+    def surgery_event(x):
+        return {
                 "type" : "Surgery",
                 "date" : x["date"],
                 "name": x["name"],
@@ -967,14 +299,17 @@ def get_calendar_data(year, month, center = "ALL" , types  = "ALL" ):
                 "with_gst_amount" : x["with_gst_amount"],
                 "without_gst_amount" : x["without_gst_amount"]
             }
-        if new_obj not in surgeries:
+
+    surgeries = [surgery_event(y) for y in surgery_entries]
+    # Skip surgeries whose event is already on the calendar through a Graft Entry
+    seen = {tuple(obj.values()) for obj in surgeries}
+    for x in surgeries_docs:
+        new_obj = surgery_event(x)
+        key = tuple(new_obj.values())
+        if key not in seen:
+            seen.add(key)
             surgeries.append(new_obj)
     
- 
-    surgery_till_date_income = frappe.db.sql("""
-        select sum(total_amount) as income_till_date from `tabSurgery` where status = "Paid"             
-    """,as_dict =  True)
-    
     # Fetch Consultation records with full_name from Lead using SQL join
     consultation_sql = """
         SELECT 
@@ -1003,10 +338,6 @@ def get_calendar_data(year, month, center = "ALL" , types  = "ALL" ):
     
     consultations = frappe.db.sql(consultation_sql, tuple(consultation_params), as_dict=True)
     
-    consultations_till_date_income = frappe.db.sql("""
-        select sum(total_amount) as income_till_date from `tabConsultation` where payment_status = "Paid"             
-    """,as_dict =  True)
-
     # Fetch Treatment records with full_name from Lead using SQL join
     treatment_sql = """
         SELECT 
@@ -1028,15 +359,11 @@ def get_calendar_data(year, month, center = "ALL" , types  = "ALL" ):
     
     treatments = frappe.db.sql(treatment_sql, tuple(treatment_params), as_dict=True)
     
-    treatments_till_date_income = frappe.db.sql("""
-        select sum(total_amount) as income_till_date from `tabTreatment` where status = "Paid"             
-    """,as_dict =  True)
-    
     result = {}
-    # Calculate total income from all sources
-    surgery_income_till_today = surgery_till_date_income[0].income_till_date if len(surgery_till_date_income) > 0 and surgery_till_date_income[0].income_till_date else 0
-    consultation_income_till_today = consultations_till_date_income[0].income_till_date if len(consultations_till_date_income) > 0 and consultations_till_date_income[0].income_till_date else 0
-    treatment_income_till_today = treatments_till_date_income[0].income_till_date if len(treatments_till_date_income) > 0 and treatments_till_date_income[0].income_till_date else 0
+    # Calculate total income from all sources (incrementally maintained, see api/calendar.py)
+    surgery_income_till_today = get_income_till_date("Surgery")
+    consultation_income_till_today = get_income_till_date("Consultation")
+    treatment_income_till_today = get_income_till_date("Treatment")
     result["income_till_today"] = surgery_income_till_today + consultation_income_till_today + treatment_income_till_today
     match types:
         case "ALL":
@@ -1069,7 +396,7 @@ def get_calendar_data(year, month, center = "ALL" , types  = "ALL" ):
             result["data"] = data
             result["slots"] = len(data)
             result["income"] =  reduce(lambda acc,x:  acc + (x["total_amount"] if "total_amount" in x and x["status"] == "Paid" else 0),  surgeries_docs, 0)
-            result["income_till_today"] = surgery_till_date_income[0].income_till_date if len(surgery_till_date_income) > 0 else 0
+            result["income_till_today"] = surgery_income_till_today
         case "Treatment":
             data = list(map(lambda x : {
                 "type" : "Treatment",
@@ -1078,7 +405,7 @@ def get_calendar_data(year, month, center = "ALL" , types  = "ALL" ):
             result["data"] = data
             result["slots"] = len(data)
             result["income"] = reduce(lambda acc,x:  acc + (x["total_amount"] if "total_amount" in x and x["status"] == "Paid" else 0),  data, 0)
-            result["income_till_today"] = treatments_till_date_income[0].income_till_date if len(treatments_till_date_income) > 0 else 0
+            result["income_till_today"] = treatment_income_till_today
         case "Consultation":
             data = list(map(lambda x : {
                 "type" : "Consultation",
@@ -1087,26 +414,29 @@ def get_calendar_data(year, month, center = "ALL" , types  = "ALL" ):
             result["data"] = data
             result["slots"] = len(data)
             result["income"] = reduce(lambda acc,x:  acc + (x["total_amount"] if "total_amount" in x and x["payment_status"] == "Paid" else 0),  consultations, 0)
-            result["income_till_today"] = consultations_till_date_income[0].income_till_date if len(consultations_till_date_income) > 0 else 0
+            result["income_till_today"] = consultation_income_till_today
     return result
 
 @frappe.whitelist()   
 def get_centers():
-    user = frappe.session.user  
+    scope = get_user_scope()
+    if scope.receptionist:
+        if scope.receptionist_desk_center:
+            return [scope.receptionist_desk_center]
+        if scope.clinic_manager_center:
+            return [scope.clinic_manager_center]
     centers = frappe.db.get_all('Center' , fields="name",pluck="name")
-    is_receptionist = frappe.db.exists("Receptionist", {'email': user})
-    if is_receptionist:
-        receptionist = frappe.db.get_value("Receptionist", {"email": user}, "name")
-        center = frappe.db.get_value("Center", {"receptionist": receptionist}, "name")
-        if center:
-            return [center]
-        center = frappe.db.get_value("Center", {"clinic_manager": user}, "name")
-        if center:
-            return [center]
     return ["ALL"] + centers
 
 @frappe.whitelist()
 def get_surgery_data(year, month, center = "ALL"):
+    return get_cached_calendar_response(
+        "surgery", year, month, center, "Surgery",
+        lambda: build_surgery_data(year, month, center),
+        ["Surgery"],
+    )
+
+def build_surgery_data(year, month, center = "ALL"):
     today = frappe.utils.today()
     start_date = datetime(year= int(year), month = int(month), day=1)
     start_date = datetime.strftime(start_date , "%Y-%m-%d")
@@ -1135,20 +465,27 @@ def get_surgery_data(year, month, center = "ALL"):
     
     surgeries = frappe.db.sql(surgery_sql, tuple(surgery_params), as_dict=True)
     
-    count = frappe.db.sql("""
-        select sum(total_amount) as income_till_date from `tabSurgery` where status = "Paid"              
-    """,as_dict =  True)
-    
     result = {}
-    result["income_till_today"]  = count[0].income_till_date if len(count) > 0 and count[0].income_till_date else 0
+    result["income_till_today"]  = get_income_till_date("Surgery")
     
     data = list(map(lambda x : {
                 "type" : "Surgery",
                 **x
             }, surgeries))
+    # All Graft Entry rows of the month's surgeries in one query, grouped by surgery
+    graft_entries = {}
+    if data:
+        for entry in frappe.get_all(
+            "Graft Entry",
+            filters={"parenttype": "Surgery", "parent": ["in", [x["surgery_id"] for x in data]]},
+            fields=["parent", "date"],
+            order_by="modified desc",
+        ):
+            graft_entries.setdefault(entry.parent, []).append(entry)
+
     new_list = []
     for x in data:
-        surgery_entries = frappe.get_all("Graft Entry", filters={"parent": x["surgery_id"]}, fields=["*"],ignore_permissions=True)
+        surgery_entries = graft_entries.get(x["surgery_id"], [])
         if len(surgery_entries) > 0:
             for y in surgery_entries:
                 new_list.append({
@@ -1166,6 +503,13 @@ def get_surgery_data(year, month, center = "ALL"):
 
 @frappe.whitelist()
 def get_treatment_data(year, month, center = "ALL"):
+    return get_cached_calendar_response(
+        "treatment", year, month, center, "Treatment",
+        lambda: build_treatment_data(year, month, center),
+        ["Treatment"],
+    )
+
+def build_treatment_data(year, month, center = "ALL"):
     today = frappe.utils.today()
     start_date = datetime(year= int(year), month = int(month), day=1)
     start_date = datetime.strftime(start_date , "%Y-%m-%d")
@@ -1192,12 +536,8 @@ def get_treatment_data(year, month, center = "ALL"):
     
     treatments = frappe.db.sql(treatment_sql, tuple(treatment_params), as_dict=True)
     
-    treatments_till_date_income = frappe.db.sql("""
-        select sum(total_amount) as income_till_date from `tabTreatment` where status = "Paid"             
-    """,as_dict =  True)
-    
     result = {}
-    result["income_till_today"]  = treatments_till_date_income[0].income_till_date if len(treatments_till_date_income) > 0 and treatments_till_date_income[0].income_till_date else 0
+    result["income_till_today"]  = get_income_till_date("Treatment")
     
     data = list(map(lambda x : {
                 "type" : "Treatment",
@@ -1211,6 +551,13 @@ def get_treatment_data(year, month, center = "ALL"):
        
 @frappe.whitelist()
 def get_consultation_data(year, month, center = "ALL"):
+    return get_cached_calendar_response(
+        "consultation", year, month, center, "Consultation",
+        lambda: build_consultation_data(year, month, center),
+        ["Consultation"],
+    )
+
+def build_consultation_data(year, month, center = "ALL"):
     today = frappe.utils.today()
     start_date = datetime(year= int(year), month = int(month), day=1)
     start_date = datetime.strftime(start_date , "%Y-%m-%d")
@@ -1238,12 +585,8 @@ def get_consultation_data(year, month, center = "ALL"):
     
     consultations = frappe.db.sql(consultation_sql, tuple(consultation_params), as_dict=True)
     
-    consultations_till_date_income = frappe.db.sql("""
-        select sum(total_amount) as income_till_date from `tabConsultation` where payment_status = "Paid"             
-    """,as_dict =  True)
-
     result = {}
-    result["income_till_today"]  = consultations_till_date_income[0].income_till_date if len(consultations_till_date_income) > 0 and consultations_till_date_income[0].income_till_date else 0
+    result["income_till_today"]  = get_income_till_date("Consultation")
     
     data = list(map(lambda x : {
                 "type" : "Consultation",
@@ -1331,28 +674,33 @@ def get_user_role():
     is_marketing_head = True if "Marketing Head" in roles else False
     if is_marketing_head:
         return {"role": "Marketing Head", "name": user, "executives": [], "center": None}
-    is_receptionist = frappe.db.exists("Receptionist", {'email': user})
-    if is_receptionist:
-        receptionist = frappe.db.get_value('Receptionist', {'email': user}, ['name'], as_dict=1)
-        center = frappe.db.get_value('Center', {'receptionist': receptionist.name}, ['name'], as_dict=1)
+    scope = get_user_scope(user)
+    if scope.receptionist:
+        receptionist = frappe._dict({"name": scope.receptionist})
+        center = scope.receptionist_desk_center or scope.clinic_manager_center
         if center:
-            return {"role": "Receptionist", "name": receptionist, "center": center.name}
+            return {"role": "Receptionist", "name": receptionist, "center": center}
         else:
-            center = frappe.db.get_value('Center', {'clinic_manager': user}, ['name'], as_dict=1)
-            if center:
-                return {"role": "Receptionist", "name": receptionist, "center": center.name}
-            else:
-                return {"role": "Guest", "name": user, "executives": [], "center": None}
+            return {"role": "Guest", "name": user, "executives": [], "center": None}
 
-    is_executive = frappe.db.exists("Executive", {'email': user})
-    if is_executive:
-        executive = frappe.db.get_value('Executive', {'email': user}, ['name'], as_dict=1)
+    if scope.executive:
+        executive = frappe._dict({"name": scope.executive})
         return {"role": "Executive", "name": executive, "executives": [], "center": None}
 
     return {"role": "Guest", "name": user, "executives": [], "center": None}
 
+CALL_LOG_STATUSES = ("Incoming", "Outgoing", "Missed")
+CALL_LOG_INSERT_CHUNK_SIZE = 500
+CALL_LOG_PAGE_SIZE = 100
+CALL_LOG_MAX_PAGE_SIZE = 500
+
 @frappe.whitelist(allow_guest=True)
 def get_call_logs():
+    """Incoming / outgoing / missed totals and durations for a timespan.
+
+    Raw rows are only returned with `include_data=1`, paged by `limit` and
+    `cursor`; `group_by_agent=1` adds per agent totals.
+    """
     timespan = frappe.form_dict.get("timespan")
     if not timespan:
         return {"status": "error", "message": frappe._("Missing parameters")}
@@ -1373,22 +721,95 @@ def get_call_logs():
         end_date = frappe.utils.today()
     else:
         return {"status": "error", "message": frappe._("Invalid timespan")}
-    call_logs = frappe.get_all("Call Logs", filters={"datetime": ["between", [start_date, end_date]]}, fields=["*"])
-    return {
-        "incoming": {
-            "total": len([call_log for call_log in call_logs if call_log.status == "Incoming"]),
-            "duration": sum([call_log.duration for call_log in call_logs if call_log.status == "Incoming"])
-        },
-        "outgoing": {
-            "total": len([call_log for call_log in call_logs if call_log.status == "Outgoing"]),
-            "duration": sum([call_log.duration for call_log in call_logs if call_log.status == "Outgoing"])
-        },
-        "missed": {
-            "total": len([call_log for call_log in call_logs if call_log.status == "Missed"]),
-            "duration": sum([call_log.duration for call_log in call_logs if call_log.status == "Missed"])
-        },
-        "data": call_logs
-    }
+    from_datetime = f"{start_date} 00:00:00"
+    to_datetime = f"{end_date} 23:59:59.999999"
+
+    result = {status.lower(): {"total": 0, "duration": 0} for status in CALL_LOG_STATUSES}
+    for row in frappe.db.sql(
+        """
+        SELECT status, COUNT(*) AS total, IFNULL(SUM(duration), 0) AS duration
+        FROM `tabCall Logs`
+        WHERE `datetime` BETWEEN %(from_datetime)s AND %(to_datetime)s
+        GROUP BY status
+        """,
+        {"from_datetime": from_datetime, "to_datetime": to_datetime},
+        as_dict=True,
+    ):
+        if row.status in CALL_LOG_STATUSES:
+            result[row.status.lower()] = {"total": row.total, "duration": cint(row.duration)}
+
+    if cint(frappe.form_dict.get("group_by_agent")):
+        result["agents"] = get_call_log_agent_breakdown(from_datetime, to_datetime)
+
+    if cint(frappe.form_dict.get("include_data")):
+        result.update(get_call_log_page(
+            from_datetime,
+            to_datetime,
+            limit=frappe.form_dict.get("limit"),
+            cursor=frappe.form_dict.get("cursor"),
+        ))
+
+    return result
+
+def get_call_log_agent_breakdown(from_datetime, to_datetime):
+    """Per agent totals and durations, one row per agent with a key per status"""
+    agents = {}
+    for row in frappe.db.sql(
+        """
+        SELECT agent_id, agent_name, status, COUNT(*) AS total, IFNULL(SUM(duration), 0) AS duration
+        FROM `tabCall Logs`
+        WHERE `datetime` BETWEEN %(from_datetime)s AND %(to_datetime)s
+        GROUP BY agent_id, agent_name, status
+        ORDER BY agent_name, agent_id
+        """,
+        {"from_datetime": from_datetime, "to_datetime": to_datetime},
+        as_dict=True,
+    ):
+        agent = agents.setdefault((row.agent_id, row.agent_name), {
+            "agent_id": row.agent_id,
+            "agent_name": row.agent_name,
+            **{status.lower(): {"total": 0, "duration": 0} for status in CALL_LOG_STATUSES},
+        })
+        if row.status in CALL_LOG_STATUSES:
+            agent[row.status.lower()] = {"total": row.total, "duration": cint(row.duration)}
+    return list(agents.values())
+
+def get_call_log_page(from_datetime, to_datetime, limit=None, cursor=None):
+    """One page of raw call logs, newest first.
+
+    `cursor` is the `next_cursor` of the previous page ("<datetime>|<name>");
+    keyset paging keeps deep pages as cheap as the first one.
+    """
+    limit = min(cint(limit) or CALL_LOG_PAGE_SIZE, CALL_LOG_MAX_PAGE_SIZE)
+    conditions = ["`datetime` BETWEEN %(from_datetime)s AND %(to_datetime)s"]
+    values = {"from_datetime": from_datetime, "to_datetime": to_datetime, "limit": limit + 1}
+
+    if cursor:
+        cursor_datetime, _sep, cursor_name = cursor.rpartition("|")
+        if not cursor_datetime:
+            frappe.throw(_("Invalid cursor"))
+        conditions.append("(`datetime` < %(cursor_datetime)s OR (`datetime` = %(cursor_datetime)s AND name < %(cursor_name)s))")
+        values.update({"cursor_datetime": cursor_datetime, "cursor_name": cursor_name})
+
+    rows = frappe.db.sql(
+        f"""
+        SELECT *
+        FROM `tabCall Logs`
+        WHERE {" AND ".join(conditions)}
+        ORDER BY `datetime` DESC, name DESC
+        LIMIT %(limit)s
+        """,
+        values,
+        as_dict=True,
+    )
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = f"{last.datetime}|{last.name}"
+
+    return {"data": rows, "next_cursor": next_cursor}
 
 def format_phone_number(phone_number):
     digits_only = ''.join(filter(str.isdigit, phone_number))
@@ -1415,46 +836,115 @@ def parse_date(date_str):
         frappe.log_error(message=str(e), title="Date Parsing Error")
         return None
     
+CALL_LOG_FIELDS = (
+    "name", "creation", "modified", "owner", "modified_by", "docstatus", "idx",
+    "device_id", "phone_number", "status", "datetime", "duration",
+    "agent_name", "agent_phone_number", "agent_id", "call_key",
+)
+
+
+def get_call_log_key(agent_id, device_id, call_datetime, phone_number):
+    """Dedup key of a call record: (agent id or device id, call time, phone number)"""
+    return "|".join([str(agent_id or device_id or ""), str(call_datetime or ""), phone_number or ""])
+
+
+def parse_call_log(log):
+    """Normalize one record of the mobile app payload into Call Logs values"""
+    call_log = frappe._dict({
+        "datetime": parse_date(log.get("dateTime")),
+        "duration": cint(log.get("duration")),
+        "phone_number": format_phone_number(log.get("phoneNumber")),
+        "status": log.get("type").capitalize(),
+        "device_id": log.get("rawType"),
+        "agent_name": log.get("agentName"),
+        "agent_phone_number": log.get("agentPhoneNumber"),
+        "agent_id": log.get("agentId"),
+    })
+
+    if call_log.status not in CALL_LOG_STATUSES:
+        raise frappe.ValidationError(f"Invalid call type: {log.get('type')}")
+    missing = [field for field in ("device_id", "datetime", "phone_number") if not call_log.get(field)]
+    if missing:
+        raise frappe.MandatoryError(f"Missing values for: {', '.join(missing)}")
+
+    call_log.call_key = get_call_log_key(
+        call_log.agent_id, call_log.device_id, call_log.datetime, call_log.phone_number
+    )
+    return call_log
+
+
 @frappe.whitelist(allow_guest=True)
 def create_call_logs(call_logs):
+    """Bulk ingest call records sent by the mobile app.
+
+    The payload is normalized in one pass, records already stored (same
+    `call_key`, also within the payload itself) are skipped, and the rest is
+    written with multi-row INSERT IGNOREs in chunks, so a concurrent resync
+    of the same records can not store them twice.
+    """
     call_logs = frappe.parse_json(call_logs)
-    
+
     inserted_logs = 0
+    skipped_logs = 0
     failed_logs = []
+    parsed_logs = []
 
     for idx, log in enumerate(call_logs):
         try:
-            doc_dict = {
-                "doctype": "Call Logs",
-                "datetime": parse_date(log.get("dateTime")),
-                "duration": log.get("duration"),
-                "phone_number": format_phone_number(log.get("phoneNumber")),
-                "timestamp": log.get("timestamp"),
-                "status": log.get("type").capitalize(),
-                "device_id": log.get("rawType"),
-            }
-            # Optional agent fields (agentName, agentPhoneNumber, agentId)
-            if log.get("agentName") is not None:
-                doc_dict["agent_name"] = log.get("agentName")
-            if log.get("agentPhoneNumber") is not None:
-                doc_dict["agent_phone_number"] = log.get("agentPhoneNumber")
-            if log.get("agentId") is not None:
-                doc_dict["agent_id"] = log.get("agentId")
-            call_log_doc = frappe.get_doc(doc_dict)
-
-            call_log_doc.insert(ignore_permissions=True)
-            inserted_logs += 1
-
+            parsed_logs.append((idx, parse_call_log(log)))
         except Exception as e:
             frappe.log_error(message=str(e), title=f"Create Call Log Error (Record #{idx+1})")
             failed_logs.append({"index": idx, "error": str(e)})
 
+    keys = list({call_log.call_key for _idx, call_log in parsed_logs})
+    existing_keys = set()
+    for i in range(0, len(keys), CALL_LOG_INSERT_CHUNK_SIZE):
+        existing_keys.update(
+            frappe.get_all(
+                "Call Logs",
+                filters={"call_key": ["in", keys[i:i + CALL_LOG_INSERT_CHUNK_SIZE]]},
+                pluck="call_key",
+            )
+        )
+
+    now_datetime = frappe.utils.now()
+    user = frappe.session.user
+    new_logs = []
+    for idx, call_log in parsed_logs:
+        if call_log.call_key in existing_keys:
+            skipped_logs += 1
+            continue
+        existing_keys.add(call_log.call_key)
+        new_logs.append((idx, call_log))
+
+    for i in range(0, len(new_logs), CALL_LOG_INSERT_CHUNK_SIZE):
+        chunk = new_logs[i:i + CALL_LOG_INSERT_CHUNK_SIZE]
+        values = [
+            (
+                frappe.generate_hash(length=10), now_datetime, now_datetime, user, user, 0, 0,
+                call_log.device_id, call_log.phone_number, call_log.status, call_log.datetime,
+                call_log.duration, call_log.agent_name, call_log.agent_phone_number,
+                call_log.agent_id, call_log.call_key,
+            )
+            for _idx, call_log in chunk
+        ]
+        try:
+            # call_key is unique: a record stored by an overlapping resync since the check above is ignored
+            frappe.db.bulk_insert("Call Logs", CALL_LOG_FIELDS, values, ignore_duplicates=True)
+            inserted = frappe.db.count("Call Logs", {"name": ["in", [row[0] for row in values]]})
+            inserted_logs += inserted
+            skipped_logs += len(chunk) - inserted
+        except Exception as e:
+            frappe.log_error(message=str(e), title=f"Create Call Log Error (Records #{chunk[0][0]+1}-#{chunk[-1][0]+1})")
+            failed_logs.extend({"index": idx, "error": str(e)} for idx, _call_log in chunk)
+
     frappe.db.commit()
 
     return {
         "status": "partial_success" if failed_logs else "success",
         "message": _("Some call logs failed to create") if failed_logs else _("All call logs created successfully"),
         "inserted": inserted_logs,
+        "skipped": skipped_logs,
         "failed": failed_logs
     }
 
@@ -0,0 +1,242 @@
+import hashlib
+
+import frappe
+from frappe.utils import cint, flt, getdate
+
+# doctype -> (status field, amount field) of the "income till date" totals
+INCOME_SOURCES = {
+    "Surgery": ("status", "total_amount"),
+    "Consultation": ("payment_status", "total_amount"),
+    "Treatment": ("status", "total_amount"),
+}
+INCOME_CACHE_KEY = "hfhg_income_till_date"
+# Rebuilt from the tables once a day so edits that bypass the hooks (db_set, imports) can not drift for long
+INCOME_CACHE_TTL = 24 * 60 * 60
+# Bounds how long a worker that died mid-transaction keeps its write counted as in flight
+INCOME_WRITE_TTL = 60 * 60
+
+# Applies a committed Paid amount change and releases the write in one step, so
+# the counter can not expire between the check and the increment (INCRBYFLOAT
+# on a missing key would create a TTL-less counter holding only the delta).
+FINISH_INCOME_WRITE_SCRIPT = """
+if redis.call("EXISTS", KEYS[1]) == 1 then
+    redis.call("INCRBYFLOAT", KEYS[1], ARGV[1])
+end
+if tonumber(redis.call("GET", KEYS[3]) or "0") > 0 then
+    redis.call("DECR", KEYS[3])
+end
+"""
+
+# Stores a rebuilt total only if no write started since the rebuild read the generation
+STORE_INCOME_SCRIPT = """
+if (redis.call("GET", KEYS[2]) or "0") == ARGV[1] then
+    redis.call("SET", KEYS[1], ARGV[2], "EX", ARGV[3], "NX")
+end
+"""
+
+
+def _income_keys(doctype):
+    """Keys of the counter of `doctype`, its generation (bumped when a write starts) and its writes in flight."""
+    return [
+        frappe.cache().make_key(f"{INCOME_CACHE_KEY}:{doctype}{suffix}")
+        for suffix in ("", ":generation", ":writes")
+    ]
+
+
+def get_income_till_date(doctype):
+    """All-time sum of `total_amount` over the Paid documents of `doctype`.
+
+    Served from a redis counter that the doc_events below keep up to date;
+    the full SUM only runs when the counter is missing. A rebuilt total is
+    only stored when no write was in flight or started while it was summed,
+    any of those could otherwise be missed or counted twice.
+    """
+    key, generation_key, writes_key = _income_keys(doctype)
+    value = frappe.cache().get(key)
+    if value is not None:
+        return flt(value)
+
+    writes, generation = frappe.cache().pipeline().get(writes_key).get(generation_key).execute()
+    status_field, amount_field = INCOME_SOURCES[doctype]
+    result = frappe.db.sql(
+        f"""
+        SELECT IFNULL(SUM(`{amount_field}`), 0)
+        FROM `tab{doctype}`
+        WHERE `{status_field}` = 'Paid'
+        """
+    )
+    value = flt(result[0][0]) if result else 0
+    if not cint(writes):
+        frappe.cache().register_script(STORE_INCOME_SCRIPT)(
+            keys=[key, generation_key],
+            args=[frappe.safe_decode(generation) or "0", value, INCOME_CACHE_TTL],
+        )
+    return value
+
+
+def _paid_amount(doc):
+    if not doc:
+        return 0
+    status_field, amount_field = INCOME_SOURCES[doc.doctype]
+    return flt(doc.get(amount_field)) if doc.get(status_field) == "Paid" else 0
+
+
+def _begin_income_write(doctype):
+    _key, generation_key, writes_key = _income_keys(doctype)
+    pipe = frappe.cache().pipeline()
+    pipe.incr(generation_key)
+    pipe.incr(writes_key)
+    pipe.expire(writes_key, INCOME_WRITE_TTL)
+    pipe.execute()
+
+
+def _finish_income_write(doctype, delta):
+    frappe.cache().register_script(FINISH_INCOME_WRITE_SCRIPT)(keys=_income_keys(doctype), args=[delta])
+
+
+def update_income_till_date(doc, method=None):
+    """Surgery / Consultation / Treatment on_update and on_trash: apply the change of Paid amount.
+
+    The write is marked in flight until the transaction ends so a rebuild can
+    not store a total that misses it, the delta itself is applied after commit.
+    """
+    if doc.doctype not in INCOME_SOURCES:
+        return
+
+    if method == "on_trash":
+        delta = -_paid_amount(doc)
+    else:
+        delta = _paid_amount(doc) - _paid_amount(doc.get_doc_before_save())
+
+    if delta:
+        _begin_income_write(doc.doctype)
+        frappe.db.after_commit.add(lambda: _finish_income_write(doc.doctype, delta))
+        frappe.db.after_rollback.add(lambda: _finish_income_write(doc.doctype, 0))
+
+
+# Month-bucketed cache of the calendar endpoints (get_calendar_data, get_surgery_data, ...)
+CALENDAR_CACHE_KEY = "hfhg_calendar"
+CALENDAR_VERSION_KEY = "hfhg_calendar_version"
+CALENDAR_CACHE_TTL = 6 * 60 * 60
+
+# doctype -> date field that puts a document on a calendar month
+CALENDAR_DATE_FIELDS = {
+    "Surgery": "surgery_date",
+    "Consultation": "date",
+    "Treatment": "procedure_date",
+}
+
+
+def _month_bucket(value):
+    value = getdate(value)
+    return f"{value.year}-{value.month:02d}"
+
+
+def _calendar_version(bucket):
+    return cint(frappe.cache().get(frappe.cache().make_key(f"{CALENDAR_VERSION_KEY}:{bucket}")))
+
+
+def _permission_scope(user=None):
+    """Short signature of the roles the calendar is served for."""
+    roles = sorted(frappe.get_roles(user or frappe.session.user))
+    return hashlib.md5("|".join(roles).encode()).hexdigest()[:12]
+
+
+def get_cached_calendar_response(endpoint, year, month, center, types, build, income_sources):
+    """Serve a calendar endpoint from the cache of its (year, month, center, type, permission scope).
+
+    Entries hang off a per-month version that `invalidate_calendar_months`
+    bumps, so a write only drops the months it touches. `income_till_today`
+    spans every month and is refreshed from the income counters on each call.
+    Sends an ETag and answers a matching If-None-Match with 304.
+    """
+    bucket = f"{int(year)}-{int(month):02d}"
+    key = ":".join([
+        CALENDAR_CACHE_KEY, endpoint, bucket, str(center), str(types), _permission_scope(),
+        str(_calendar_version(bucket)),
+    ])
+
+    result = frappe.cache().get_value(key)
+    if result is None:
+        result = build()
+        frappe.cache().set_value(key, result, expires_in_sec=CALENDAR_CACHE_TTL)
+
+    result["income_till_today"] = sum(get_income_till_date(doctype) for doctype in income_sources)
+
+    etag = '"{}"'.format(hashlib.md5(frappe.as_json(result).encode()).hexdigest())
+    response_headers = getattr(frappe.local, "response_headers", None)
+    if response_headers is not None:
+        response_headers["ETag"] = etag
+
+    if_none_match = frappe.get_request_header("If-None-Match") if frappe.request else None
+    if if_none_match and if_none_match == etag:
+        frappe.local.response.http_status_code = 304
+        return None
+
+    return result
+
+
+def invalidate_calendar_months(doc, method=None):
+    """Surgery / Consultation / Treatment on_update and on_trash: drop the cached months the document was or is in.
+
+    For Surgery the Graft Entry dates are included.
+    """
+    if doc.doctype not in CALENDAR_DATE_FIELDS:
+        return
+
+    date_field = CALENDAR_DATE_FIELDS[doc.doctype]
+    buckets = set()
+    for version in (doc, doc.get_doc_before_save()):
+        if not version:
+            continue
+        if version.get(date_field):
+            buckets.add(_month_bucket(version.get(date_field)))
+        if doc.doctype == "Surgery":
+            buckets.update(_month_bucket(row.date) for row in version.get("grafts_surgeries") or [] if row.date)
+
+    if buckets:
+        _bump_calendar_versions(buckets)
+        # Again after commit, so a request racing the transaction can not keep the old rows
+        frappe.db.after_commit.add(lambda: _bump_calendar_versions(buckets))
+
+
+# Lead fields the calendar entries show
+CALENDAR_LEAD_FIELDS = ("full_name",)
+
+
+def invalidate_lead_calendar_months(doc, method=None, *args):
+    """Lead on_update / after_rename / on_trash: drop the cached months of the lead's surgeries
+    (with their Graft Entry dates), treatments and consultations when the name they show changes."""
+    if method == "on_update":
+        old_doc = doc.get_doc_before_save()
+        if not old_doc or all(old_doc.get(field) == doc.get(field) for field in CALENDAR_LEAD_FIELDS):
+            return
+
+    dates = frappe.db.sql(
+        """
+        SELECT s.surgery_date FROM `tabSurgery` s
+        INNER JOIN `tabCosting` c ON s.patient = c.name
+        WHERE c.patient = %(lead)s
+        UNION
+        SELECT g.date FROM `tabGraft Entry` g
+        INNER JOIN `tabSurgery` s ON g.parent = s.name AND g.parenttype = 'Surgery'
+        INNER JOIN `tabCosting` c ON s.patient = c.name
+        WHERE c.patient = %(lead)s
+        UNION
+        SELECT t.procedure_date FROM `tabTreatment` t
+        INNER JOIN `tabCosting` c ON t.patient = c.name
+        WHERE c.patient = %(lead)s
+        UNION
+        SELECT date FROM `tabConsultation` WHERE patient = %(lead)s
+        """,
+        {"lead": doc.name},
+    )
+    buckets = {_month_bucket(row[0]) for row in dates if row[0]}
+    if buckets:
+        _bump_calendar_versions(buckets)
+        frappe.db.after_commit.add(lambda: _bump_calendar_versions(buckets))
+
+
+def _bump_calendar_versions(buckets):
+    for bucket in buckets:
+        frappe.cache().incr(frappe.cache().make_key(f"{CALENDAR_VERSION_KEY}:{bucket}"))
@@ -0,0 +1,283 @@
+import frappe
+from datetime import timedelta
+from frappe.utils import add_days, getdate, today
+
+from frappe_hfhg.user_scope import get_user_scope
+
+FULL_ACCESS_ROLES = ["Lead Distributor", "HOD", "Marketing Head", "Accountant", "Lead checker", "Surbhi-backend"]
+
+
+def get_dashboard_scope(user=None):
+    """Role scope of a user for the number cards.
+
+    Executive / Receptionist / Center links come from the cached user scope,
+    so resolving it costs no queries once the scope is warm.
+    """
+    user = user or frappe.session.user
+    roles = frappe.get_roles(user)
+
+    scope = get_user_scope(user)
+    scope.full_access = any(role in roles for role in FULL_ACCESS_ROLES)
+    return scope
+
+
+def _card(value, route_options, route):
+    return {
+        "value": value,
+        "fieldtype": "Int",
+        "route_options": route_options,
+        "route": route,
+    }
+
+
+def _count_reminders(filters, scope_filter=None):
+    """Count Reminders in one query; `scope_filter` is ("executive", values) or ("center", center)."""
+    conditions = ["1=1"]
+    params = {}
+    join = ""
+
+    if filters.get("status"):
+        conditions.append("r.status = %(status)s")
+        params["status"] = filters["status"]
+    conditions.append("r.date BETWEEN %(from_date)s AND %(to_date)s")
+    params["from_date"] = filters["from_date"]
+    params["to_date"] = filters["to_date"]
+
+    if scope_filter:
+        kind, value = scope_filter
+        if kind == "executive":
+            values = tuple(v for v in value if v)
+            if not values:
+                return 0
+            conditions.append("r.executive IN %(executives)s")
+            params["executives"] = values
+        elif kind == "center":
+            join = "INNER JOIN `tabLead` l ON l.name = r.parent"
+            conditions.append("l.center = %(center)s")
+            params["center"] = value
+
+    result = frappe.db.sql(
+        f"""
+        SELECT COUNT(*)
+        FROM `tabReminders` r
+        {join}
+        WHERE {" AND ".join(conditions)}
+        """,
+        params,
+    )
+    return result[0][0] if result else 0
+
+
+def _reminder_card(scope, filters, route_options, route):
+    if scope.full_access:
+        return _card(_count_reminders(filters), route_options, route)
+
+    if scope.clinic_manager_center:
+        executives = (scope.executive, scope.executive_fullname)
+        return _card(_count_reminders(filters, ("executive", executives)), route_options, route)
+
+    if scope.receptionist:
+        return _card(_count_reminders(filters, ("center", scope.receptionist_center)), route_options, route)
+
+    if scope.executive:
+        executives = (scope.executive, scope.executive_fullname)
+        return _card(_count_reminders(filters, ("executive", executives)), route_options, route)
+
+    return _card(_count_reminders(filters), route_options, route)
+
+
+def _total_leads(scope):
+    route_options = {"from_date": "2024-01-01"}
+    if scope.full_access:
+        return _card(frappe.db.count("Lead"), route_options, ["lead"])
+
+    if scope.clinic_manager_center:
+        center = scope.clinic_manager_center
+        return _card(frappe.db.count("Lead", {"center": center}), route_options, ["lead", "?center=" + center])
+
+    if scope.receptionist:
+        center = scope.receptionist_center
+        return _card(frappe.db.count("Lead", {"center": center}), route_options, ["lead", "?center=" + center])
+
+    if scope.executive:
+        executive = scope.executive
+        return _card(frappe.db.count("Lead", {"executive": executive}), route_options, ["lead", "?executive=" + executive])
+
+    return _card(frappe.db.count("Lead"), route_options, ["lead"])
+
+
+def _open_reminders(scope):
+    three_days_later = add_days(today(), 3)
+    return _reminder_card(
+        scope,
+        {"status": "Open", "from_date": today(), "to_date": three_days_later},
+        {"from_date": today(), "to_date": three_days_later, "status": "Upcoming"},
+        ["query-report", "Reminder Report"],
+    )
+
+
+def _all_reminders(scope):
+    month_later = add_days(today(), 30)
+    return _reminder_card(
+        scope,
+        {"from_date": today(), "to_date": month_later},
+        {"from_date": today(), "to_date": month_later},
+        ["query-report", "Master Reminder Report"],
+    )
+
+
+def _closed_reminders(scope):
+    month_ago = add_days(today(), -30)
+    return _reminder_card(
+        scope,
+        {"status": "Close", "from_date": month_ago, "to_date": today()},
+        {"from_date": month_ago, "to_date": today(), "status": "Completed"},
+        ["query-report", "Master Reminder Report"],
+    )
+
+
+def _missed_reminders(scope):
+    month_ago = add_days(today(), -30)
+    previous_day = getdate(today()) - timedelta(days=1)
+    return _reminder_card(
+        scope,
+        {"status": "Open", "from_date": month_ago, "to_date": previous_day},
+        {"from_date": month_ago, "to_date": previous_day, "status": "Missed"},
+        ["query-report", "Master Reminder Report"],
+    )
+
+
+def _today_reminders(scope):
+    return _reminder_card(
+        scope,
+        {"status": "Open", "from_date": today(), "to_date": today()},
+        {"from_date": today(), "to_date": today(), "status": "Upcoming"},
+        ["query-report", "Reminder Report"],
+    )
+
+
+def _upcoming_consultation(scope):
+    month_later = add_days(today(), 30)
+    filters = {"status": "Scheduled", "date": ("between", [today(), month_later])}
+    route_options = {"from_date": today(), "to_date": month_later}
+    route = ["query-report", "Consultation Report"]
+
+    if scope.full_access:
+        pass
+    elif scope.clinic_manager_center:
+        filters["center"] = scope.clinic_manager_center
+    elif scope.receptionist:
+        filters["center"] = scope.receptionist_center
+    elif scope.executive:
+        filters["executive"] = scope.executive
+
+    return _card(frappe.db.count("Consultation", filters), route_options, route)
+
+
+def _upcoming_surgery(scope):
+    month_later = add_days(today(), 30)
+    filters = {"surgery_status": "Booked", "surgery_date": ("between", [today(), month_later])}
+    route_options = {"from_date": today(), "to_date": month_later}
+    route = ["query-report", "Surgery Report"]
+
+    if scope.full_access:
+        pass
+    elif scope.clinic_manager_center:
+        filters["center"] = route_options["center"] = scope.clinic_manager_center
+    elif scope.receptionist:
+        filters["center"] = route_options["center"] = scope.receptionist_center
+    elif scope.executive:
+        filters["executive"] = route_options["executive"] = scope.executive
+
+    return _card(frappe.db.count("Surgery", filters), route_options, route)
+
+
+def _todays_list_card(scope, doctype, date_field, route):
+    filters = {date_field: ("=", today())}
+    route_options = {date_field: today()}
+
+    if scope.full_access:
+        pass
+    elif scope.clinic_manager_center:
+        filters["center"] = route_options["center"] = scope.clinic_manager_center
+    elif scope.receptionist:
+        filters["center"] = route_options["center"] = scope.receptionist_desk_center
+    elif scope.executive:
+        filters["executive"] = route_options["executive"] = scope.executive
+
+    return _card(frappe.db.count(doctype, filters), route_options, route)
+
+
+def _todays_surgery(scope):
+    return _todays_list_card(scope, "Surgery", "surgery_date", ["surgery", "view", "list"])
+
+
+def _todays_consultation(scope):
+    return _todays_list_card(scope, "Consultation", "date", ["consultation", "view", "list"])
+
+
+def _todays_costing_card(scope, date_field, status):
+    # Costing cards check the executive before the centre roles.
+    filters = {date_field: ("=", today()), "status": status}
+    route_options = {date_field: today(), "status": status}
+    route = ["costing", "view", "list"]
+
+    if scope.full_access:
+        pass
+    elif scope.executive:
+        filters["executive"] = scope.executive
+        route_options = {date_field: today(), "executive": scope.executive}
+    elif scope.clinic_manager_center:
+        filters["center"] = scope.clinic_manager_center
+        route_options = {date_field: today(), "center": scope.clinic_manager_center}
+    elif scope.receptionist:
+        filters["center"] = scope.receptionist_desk_center
+        route_options = {date_field: today(), "center": scope.receptionist_desk_center}
+
+    return _card(frappe.db.count("Costing", filters), route_options, route)
+
+
+def _todays_prospect(scope):
+    return _todays_costing_card(scope, "booking_date", "Prospect")
+
+
+def _todays_booking(scope):
+    return _todays_costing_card(scope, "book_date", "Booking")
+
+
+DASHBOARD_CARDS = {
+    "total_leads": _total_leads,
+    "open_reminders": _open_reminders,
+    "all_reminders": _all_reminders,
+    "closed_reminders": _closed_reminders,
+    "missed_reminders": _missed_reminders,
+    "today_reminders": _today_reminders,
+    "upcoming_consultation": _upcoming_consultation,
+    "upcoming_surgery": _upcoming_surgery,
+    "todays_surgery": _todays_surgery,
+    "todays_consultation": _todays_consultation,
+    "todays_prospect": _todays_prospect,
+    "todays_booking": _todays_booking,
+}
+
+
+def get_dashboard_card(card, user=None):
+    if card not in DASHBOARD_CARDS:
+        frappe.throw(f"Unknown dashboard card: {card}")
+    return DASHBOARD_CARDS[card](get_dashboard_scope(user))
+
+
+@frappe.whitelist()
+def get_dashboard_counts(cards=None):
+    """Return several number cards in one round trip, keyed by card name."""
+    if isinstance(cards, str):
+        cards = frappe.parse_json(cards)
+    cards = cards or list(DASHBOARD_CARDS)
+
+    scope = get_dashboard_scope()
+    result = {}
+    for card in cards:
+        if card not in DASHBOARD_CARDS:
+            frappe.throw(f"Unknown dashboard card: {card}")
+        result[card] = DASHBOARD_CARDS[card](scope)
+    return result
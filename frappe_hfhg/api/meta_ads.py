@@ -1,6 +1,8 @@
 import re
 from typing import Optional
 
+from frappe_hfhg.ad_key import get_ad_key, get_ads_name_key
+
 
 TRAILING_DIGITS_PATTERN = re.compile(r"(?:_)?\d{6,}$")
 
@@ -17,3 +19,8 @@ def clean_meta_ads_name(doc, method: Optional[str] = None) -> None:
     else:
         doc.ads_name = ads_name
 
+
+def set_meta_ads_keys(doc, method: Optional[str] = None) -> None:
+    """Keep `ad_key` (from the ad id, the document name) and `ads_name_key` in sync."""
+    doc.ad_key = get_ad_key(doc.name)
+    doc.ads_name_key = get_ads_name_key(doc.ads_name)
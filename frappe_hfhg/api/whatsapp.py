@@ -1,6 +1,11 @@
 import frappe
 import json
 from frappe import _
+from frappe_hfhg.frappe_hfhg.doctype.lead.lead import get_phone_key
+
+# number key -> Lead name ("" when no lead matches), kept for an hour at most
+LEAD_NUMBER_CACHE_KEY = "hfhg_whatsapp_lead_by_number"
+LEAD_NUMBER_CACHE_TTL = 60 * 60
 
 def validate(doc, method):
     if doc.type == "Incoming" and doc.get("from"):
@@ -87,25 +92,48 @@ def notify_agent(doc):
         frappe.log_error(f"Failed to notify Executive/Administrator: {str(e)}", "WhatsApp Notification")
 
 def get_lead_from_number(number):
-    """Get lead from the given number using Query Builder."""
-    mobile_no = parse_mobile_no(number)
-    query = """
-        SELECT name, contact_number, executive
-        FROM `tabLead`
-        WHERE status != 'Duplicate Lead'
-        AND REPLACE(REPLACE(REPLACE(contact_number, ' ', ''), '-', ''), '+', '') LIKE %(mobile_no)s
-        ORDER BY creation DESC
-        LIMIT 1
-    """
+    """Get the latest non-duplicate lead whose contact number matches `number`.
 
-    lead = frappe.db.sql(query, {"mobile_no": f"%{mobile_no}%"}, as_dict=True)
+    Uses the indexed Lead.contact_number_key; recent lookups are cached in redis
+    and dropped when a lead's numbers or status change (see `clear_lead_number_cache`).
+    """
+    key = get_phone_key(number)
+    if not key:
+        return None, None
+
+    cache_key = f"{LEAD_NUMBER_CACHE_KEY}:{key}"
+    lead_name = frappe.cache().get_value(cache_key)
+    if lead_name is None:
+        lead = frappe.db.sql(
+            """
+            SELECT name
+            FROM `tabLead`
+            WHERE contact_number_key = %(key)s
+            AND status != 'Duplicate Lead'
+            ORDER BY creation DESC
+            LIMIT 1
+            """,
+            {"key": key},
+        )
+        lead_name = lead[0][0] if lead else ""
+        frappe.cache().set_value(cache_key, lead_name, expires_in_sec=LEAD_NUMBER_CACHE_TTL)
 
-    if lead:
-        lead_name = lead[0].get("name")
+    if lead_name:
         return lead_name, "Lead"
 
     return None, None
 
+def clear_lead_number_cache(doc, method=None):
+    """Lead on_update / on_trash: forget cached lookups for the lead's old and new contact number."""
+    keys = {doc.get("contact_number_key") or get_phone_key(doc.get("contact_number"))}
+    old_doc = doc.get_doc_before_save()
+    if old_doc:
+        keys.add(old_doc.get("contact_number_key") or get_phone_key(old_doc.get("contact_number")))
+
+    for key in keys:
+        if key:
+            frappe.cache().delete_value(f"{LEAD_NUMBER_CACHE_KEY}:{key}")
+
 def parse_mobile_no(mobile_no: str):
     """Parse mobile number to remove spaces, brackets, etc.
     >>> parse_mobile_no('+91 (766) 667 6666')
@@ -0,0 +1,290 @@
+import json
+
+import frappe
+from frappe import _
+from frappe.desk.form.assign_to import notify_assignment
+from frappe.utils import now
+
+FULL_ACCESS = frappe._dict(read=1, write=1, share=1)
+READ_ACCESS = frappe._dict(read=1, write=0, share=0)
+# Rows per multi-row INSERT / UPDATE
+WRITE_CHUNK_SIZE = 500
+
+
+def reconcile_assignments(doctype, names, reset=(), release=None, reset_on_new_executive=False, notify=True):
+	"""Bring the ToDo assignments and DocShare rows of `names` in line with who should have them.
+
+	Who should have them comes from `get_desired_assignees`: the executive,
+	receptionist, clinic manager and (outside Lead) doctor, all with write and
+	share. Missing assignments and shares are added, and shares with too few
+	rights are upgraded. Nothing else is touched unless asked for:
+
+	- `reset`: names whose assignments and shares outside the desired set are dropped
+	- `release`: {name: users} to drop from a document unless they are still desired
+	- `reset_on_new_executive`: also reset a document whose executive is not assigned yet,
+	  as the on_update hooks always did when the executive changed
+
+	Reads and writes are set based, a whole batch of documents costs a fixed
+	number of queries.
+	"""
+	names = [name for name in dict.fromkeys(names) if name]
+	if not names:
+		return
+
+	desired, executives = get_desired_assignees(doctype, names)
+	assigned = get_open_assignments(doctype, names)
+	shares = get_shares(doctype, names)
+	reset = set(reset or ())
+	release = release or {}
+
+	assign, share, unassign, unshare = set(), {}, set(), set()
+	for name in names:
+		wanted = desired.get(name, {})
+		current = assigned.get(name, [])
+		current_shares = shares.get(name, {})
+
+		drop = set()
+		if name in reset or (reset_on_new_executive and executives.get(name) and executives[name] not in current):
+			drop = (set(current) | set(current_shares)) - set(wanted)
+		drop |= set(release.get(name) or ()) - set(wanted)
+
+		for user, rights in wanted.items():
+			if user not in current:
+				assign.add((name, user))
+			share[(name, user)] = rights
+		for user in drop:
+			if user in current:
+				unassign.add((name, user))
+			if user in current_shares:
+				unshare.add((name, user))
+
+	apply_assignment_changes(
+		doctype, assign=assign, share=share, unassign=unassign, unshare=unshare,
+		notify=notify, assigned=assigned, shares=shares,
+	)
+
+
+def get_desired_assignees(doctype, names):
+	"""{name: {user: rights}} of the users that should be assigned to and share each document,
+	and {name: executive user} of the documents that have an executive.
+	"""
+	if doctype == "Lead":
+		fields = ["name", "executive", "receptionist", "center"]
+	else:
+		fields = ["name", "executive", "center", "doctor"]
+	docs = frappe.get_all(doctype, filters={"name": ["in", names]}, fields=fields)
+
+	executive_emails = get_emails("Executive", {doc.executive for doc in docs})
+	doctor_emails = get_emails("Doctor", {doc.get("doctor") for doc in docs})
+	centers = {
+		center.name: center
+		for center in frappe.get_all(
+			"Center",
+			filters={"name": ["in", list({doc.center for doc in docs if doc.center}) or [""]]},
+			fields=["name", "receptionist", "clinic_manager"],
+		)
+	}
+	receptionist_emails = get_emails(
+		"Receptionist",
+		{doc.get("receptionist") for doc in docs} | {center.receptionist for center in centers.values()},
+	)
+
+	desired, executives = {}, {}
+	for doc in docs:
+		center = centers.get(doc.center) or frappe._dict()
+		if doctype == "Lead":
+			users = [executive_emails.get(doc.executive), receptionist_emails.get(doc.receptionist), center.clinic_manager]
+		else:
+			users = [
+				executive_emails.get(doc.executive),
+				receptionist_emails.get(center.receptionist),
+				center.clinic_manager,
+				doctor_emails.get(doc.doctor),
+			]
+		desired[doc.name] = {user: FULL_ACCESS for user in users if user}
+		if executive_emails.get(doc.executive):
+			executives[doc.name] = executive_emails[doc.executive]
+	return desired, executives
+
+
+def get_emails(doctype, names):
+	names = [name for name in names if name]
+	if not names:
+		return {}
+	return dict(frappe.get_all(doctype, filters={"name": ["in", names]}, fields=["name", "email"], as_list=True))
+
+
+def get_open_assignments(doctype, names):
+	"""{name: users} of the open ToDos on `names`, in assignment order."""
+	assigned = {}
+	for name, user in frappe.get_all(
+		"ToDo",
+		filters={"reference_type": doctype, "reference_name": ["in", names], "status": "Open"},
+		fields=["reference_name", "allocated_to"],
+		order_by="creation asc",
+		as_list=True,
+	):
+		users = assigned.setdefault(name, [])
+		if user not in users:
+			users.append(user)
+	return assigned
+
+
+def get_shares(doctype, names):
+	"""{name: {user: share row}} of the DocShare rows on `names`."""
+	shares = {}
+	for row in frappe.get_all(
+		"DocShare",
+		filters={"share_doctype": doctype, "share_name": ["in", names]},
+		fields=["name", "share_name", "user", "read", "write", "share"],
+	):
+		if row.user:
+			shares.setdefault(row.share_name, {})[row.user] = row
+	return shares
+
+
+def apply_assignment_changes(
+	doctype, assign=(), share=None, unassign=(), unshare=(), notify=False, assigned=None, shares=None
+):
+	"""Apply assignment and share changes to `doctype` in bulk.
+
+	- `assign` / `unassign`: (name, user) pairs to open / cancel a ToDo for
+	- `share`: {(name, user): rights} shares to grant, existing shares only ever gain rights
+	- `unshare`: (name, user) pairs whose DocShare rows are deleted
+
+	`assigned` / `shares` are the current rows when the caller already read them.
+	"""
+	share = share or {}
+	names = list({name for name, _user in [*assign, *unassign, *share, *unshare]})
+	if not names:
+		return
+	if assigned is None and (assign or unassign):
+		assigned = get_open_assignments(doctype, names)
+	if shares is None and share:
+		shares = get_shares(doctype, names)
+	assigned, shares = assigned or {}, shares or {}
+
+	assign = [(name, user) for name, user in assign if user not in assigned.get(name, [])]
+	unassign = [(name, user) for name, user in unassign if user in assigned.get(name, [])]
+
+	timestamp = now()
+	user = frappe.session.user
+	if assign:
+		values = [
+			(
+				frappe.generate_hash(length=10), user, timestamp, timestamp, user, "Open", "Medium", allocated_to,
+				_("Assignment for {0} {1}").format(_(doctype), name), doctype, name, user,
+			)
+			for name, allocated_to in assign
+		]
+		frappe.db.bulk_insert(
+			"ToDo",
+			fields=[
+				"name", "owner", "creation", "modified", "modified_by", "status", "priority", "allocated_to",
+				"description", "reference_type", "reference_name", "assigned_by",
+			],
+			values=values,
+			chunk_size=WRITE_CHUNK_SIZE,
+		)
+
+	if unassign:
+		for chunk in chunks(unassign):
+			frappe.db.sql(
+				"""
+				UPDATE `tabToDo`
+				SET status = 'Cancelled', modified = %(modified)s, modified_by = %(user)s
+				WHERE reference_type = %(doctype)s AND status = 'Open'
+					AND (reference_name, allocated_to) IN %(pairs)s
+				""",
+				{"doctype": doctype, "pairs": tuple(chunk), "modified": timestamp, "user": user},
+			)
+
+	apply_share_changes(doctype, share, unshare, shares, timestamp, user)
+
+	if assign or unassign:
+		update_assign_field(doctype, assigned, assign, unassign)
+
+	if notify:
+		for name, allocated_to in assign:
+			if frappe.get_cached_value("User", allocated_to, "enabled"):
+				notify_assignment(user, allocated_to, doctype, name, action="ASSIGN")
+
+
+def apply_share_changes(doctype, share, unshare, shares, timestamp, user):
+	inserts, upgrades = [], {}
+	for (name, share_user), rights in share.items():
+		row = shares.get(name, {}).get(share_user)
+		if not row:
+			inserts.append(
+				(
+					frappe.generate_hash(length=10), user, timestamp, timestamp, user, share_user, doctype, name,
+					rights.read, rights.write, rights.share, 0, 0, 1,
+				)
+			)
+		elif any(rights[right] and not row[right] for right in ("read", "write", "share")):
+			upgrades.setdefault((rights.read, rights.write, rights.share), []).append(row.name)
+
+	if inserts:
+		frappe.db.bulk_insert(
+			"DocShare",
+			fields=[
+				"name", "owner", "creation", "modified", "modified_by", "user", "share_doctype", "share_name",
+				"read", "write", "share", "submit", "everyone", "notify_by_email",
+			],
+			values=inserts,
+			chunk_size=WRITE_CHUNK_SIZE,
+		)
+
+	for (read, write, share_right), row_names in upgrades.items():
+		for chunk in chunks(row_names):
+			frappe.db.sql(
+				"""
+				UPDATE `tabDocShare`
+				SET `read` = GREATEST(`read`, %(read)s), `write` = GREATEST(`write`, %(write)s),
+					`share` = GREATEST(`share`, %(share)s), modified = %(modified)s
+				WHERE name IN %(names)s
+				""",
+				{"read": read, "write": write, "share": share_right, "names": tuple(chunk), "modified": timestamp},
+			)
+
+	for chunk in chunks(list(unshare)):
+		frappe.db.sql(
+			"""
+			DELETE FROM `tabDocShare`
+			WHERE share_doctype = %(doctype)s AND (share_name, user) IN %(pairs)s
+			""",
+			{"doctype": doctype, "pairs": tuple(chunk)},
+		)
+
+
+def update_assign_field(doctype, assigned, assign, unassign):
+	"""Rewrite the `_assign` column of the documents whose open assignments changed."""
+	users_by_name = {}
+	for name, _user in [*unassign, *assign]:
+		users_by_name.setdefault(name, list(assigned.get(name, [])))
+	for name, user in unassign:
+		users_by_name[name] = [existing for existing in users_by_name[name] if existing != user]
+	for name, user in assign:
+		if user not in users_by_name[name]:
+			users_by_name[name].append(user)
+
+	for chunk in chunks(list(users_by_name.items())):
+		params = {"names": tuple(name for name, _users in chunk)}
+		cases = []
+		for i, (name, users) in enumerate(chunk):
+			params[f"name_{i}"] = name
+			params[f"assign_{i}"] = json.dumps(users)
+			cases.append(f"WHEN %(name_{i})s THEN %(assign_{i})s")
+		frappe.db.sql(
+			f"""
+			UPDATE `tab{doctype}`
+			SET `_assign` = CASE name {" ".join(cases)} END
+			WHERE name IN %(names)s
+			""",
+			params,
+		)
+
+
+def chunks(rows, size=WRITE_CHUNK_SIZE):
+	for start in range(0, len(rows), size):
+		yield rows[start : start + size]
@@ -0,0 +1,22 @@
+import click
+from frappe.commands import get_site, pass_context
+
+
+@click.command("rebuild-original-leads")
+@pass_context
+def rebuild_original_leads(context):
+	"""Rebuild the Original Lead mapping (contact number -> original lead) from all leads."""
+	import frappe
+
+	from frappe_hfhg.frappe_hfhg.doctype.original_lead.original_lead import rebuild_original_leads
+
+	site = get_site(context)
+	frappe.init(site=site)
+	frappe.connect()
+	try:
+		rebuild_original_leads()
+	finally:
+		frappe.destroy()
+
+
+commands = [rebuild_original_leads]
@@ -0,0 +1,348 @@
+# Copyright (c) 2026, redsoft and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import getdate
+
+DIMENSIONS = ("date", "source", "campaign", "ad_id", "form_id", "center", "subsource")
+METRICS = ("expense_entries", "expense", "leads", "costings", "surgeries", "surgery_revenue", "costing_revenue")
+
+# Attribution of a row that hangs off a Lead
+LEAD_DIMENSIONS_SQL = """
+	IFNULL(l.source, '') AS source,
+	TRIM(IFNULL(l.campaign_name, '')) AS campaign,
+	TRIM(IFNULL(l.meta_ad_id, '')) AS ad_id,
+	TRIM(IFNULL(l.form_id, '')) AS form_id,
+	IFNULL(l.center, '') AS center,
+	TRIM(IFNULL(l.subsource, '')) AS subsource
+"""
+LEAD_GROUP_BY_SQL = "date, source, campaign, ad_id, form_id, center, subsource"
+
+# Surgery payments that count as revenue (same eligibility as the report always used)
+ELIGIBLE_SURGERY_PAYMENT_SQL = """
+	p.docstatus < 2
+	AND p.type = 'Payment'
+	AND p.payment_type = 'Surgery'
+	AND IFNULL(s.pending_amount, 0) = 0
+	AND IFNULL(l.status, '') != 'Duplicate Lead'
+"""
+
+# Fields whose change moves a document's contribution to the facts
+TRACKED_FIELDS = {
+	"Lead": ("source", "campaign_name", "meta_ad_id", "form_id", "center", "subsource", "status", "created_on"),
+	"Campaign Expense": ("date", "source", "campaign", "ad_id", "meta_lead_form", "total_amount"),
+	"Costing": ("patient", "booking_date"),
+	"Surgery": ("patient", "pending_amount", "surgery_date"),
+	"Payment": (
+		"payment_type", "type", "patient", "transaction_date", "total_amount_received", "total_amount",
+		"without_gst_amount", "with_gst_amount", "with_gst_check", "docstatus",
+	),
+}
+
+
+# Redis set of the fact dates waiting for a refresh, and the marker of the job queued to refresh them
+PENDING_DATES_KEY = "hfhg_ad_attribution_pending_dates"
+REFRESH_QUEUED_KEY = "hfhg_ad_attribution_refresh_queued"
+# A queued marker whose job never ran stops blocking new jobs after this long
+REFRESH_QUEUED_TTL = 60 * 60
+
+
+class AdAttributionDaily(Document):
+	pass
+
+
+def sql_line_amount(alias):
+	"""Amount of a Payment row: received amount, else total, else without + with GST."""
+	a = alias
+	return f"""CASE
+		WHEN {a}.total_amount_received IS NOT NULL AND TRIM(COALESCE({a}.total_amount_received, '')) != ''
+		THEN CAST({a}.total_amount_received AS DECIMAL(18,2))
+		WHEN {a}.total_amount IS NOT NULL
+		THEN CAST({a}.total_amount AS DECIMAL(18,2))
+		ELSE CAST(COALESCE({a}.without_gst_amount, 0) AS DECIMAL(18,2))
+			+ CAST(
+				CASE WHEN IFNULL({a}.with_gst_check, 0) = 1
+				THEN COALESCE({a}.with_gst_amount, 0) ELSE 0 END
+				AS DECIMAL(18,2))
+	END"""
+
+
+def build_ad_attribution_rows(from_date=None, to_date=None):
+	"""Daily fact rows for `from_date`..`to_date` (every date when both are empty), one per
+	(date, source, campaign, ad_id, form_id, center, subsource).
+
+	- expense: Campaign Expense by `date`
+	- leads: Lead by `created_on` (creation date when empty)
+	- costings / surgeries: by booking / surgery date (creation date when empty), completed surgeries only
+	- surgery_revenue: eligible Surgery payments by `transaction_date`
+	- costing_revenue: all Costing payments of a costing, on the date of its first eligible Surgery payment
+	"""
+	params = {"from_date": from_date, "to_date": to_date}
+
+	def in_range(date_sql):
+		if from_date and to_date:
+			return f"{date_sql} BETWEEN %(from_date)s AND %(to_date)s"
+		return f"{date_sql} IS NOT NULL"
+
+	queries = [
+		f"""
+		SELECT
+			ce.date AS date,
+			TRIM(IFNULL(ce.source, '')) AS source,
+			TRIM(IFNULL(ce.campaign, '')) AS campaign,
+			CASE WHEN TRIM(ce.source) = 'Meta' THEN TRIM(COALESCE(ce.ad_id, '')) ELSE '' END AS ad_id,
+			TRIM(IFNULL(ce.meta_lead_form, '')) AS form_id,
+			'' AS center,
+			'' AS subsource,
+			COUNT(*) AS expense_entries,
+			COALESCE(SUM(
+				CASE
+					WHEN ce.total_amount IS NOT NULL AND ce.total_amount != ''
+					THEN CAST(ce.total_amount AS DECIMAL(18,2))
+					ELSE 0
+				END
+			), 0) AS expense
+		FROM `tabCampaign Expense` ce
+		WHERE {in_range("ce.date")}
+		GROUP BY {LEAD_GROUP_BY_SQL}
+		""",
+		f"""
+		SELECT
+			COALESCE(l.created_on, DATE(l.creation)) AS date,
+			{LEAD_DIMENSIONS_SQL},
+			COUNT(*) AS leads
+		FROM `tabLead` l
+		WHERE {in_range("COALESCE(l.created_on, DATE(l.creation))")}
+		GROUP BY {LEAD_GROUP_BY_SQL}
+		""",
+		f"""
+		SELECT
+			COALESCE(c.booking_date, DATE(c.creation)) AS date,
+			{LEAD_DIMENSIONS_SQL},
+			COUNT(DISTINCT c.name) AS costings
+		FROM `tabCosting` c
+		INNER JOIN `tabLead` l ON c.patient = l.name
+		WHERE {in_range("COALESCE(c.booking_date, DATE(c.creation))")}
+		GROUP BY {LEAD_GROUP_BY_SQL}
+		""",
+		f"""
+		SELECT
+			COALESCE(s.surgery_date, DATE(s.creation)) AS date,
+			{LEAD_DIMENSIONS_SQL},
+			COUNT(DISTINCT s.name) AS surgeries
+		FROM `tabSurgery` s
+		INNER JOIN `tabCosting` c ON s.patient = c.name
+		INNER JOIN `tabLead` l ON c.patient = l.name
+		WHERE IFNULL(s.pending_amount, 0) = 0
+			AND {in_range("COALESCE(s.surgery_date, DATE(s.creation))")}
+		GROUP BY {LEAD_GROUP_BY_SQL}
+		""",
+		f"""
+		SELECT
+			p.transaction_date AS date,
+			{LEAD_DIMENSIONS_SQL},
+			COALESCE(SUM(
+				CASE
+					WHEN p.total_amount_received IS NOT NULL AND p.total_amount_received != ''
+					THEN CAST(p.total_amount_received AS DECIMAL(18,2))
+					ELSE 0
+				END
+			), 0) AS surgery_revenue
+		FROM `tabPayment` p
+		INNER JOIN `tabSurgery` s ON s.name = p.patient
+		INNER JOIN `tabCosting` c ON s.patient = c.name
+		INNER JOIN `tabLead` l ON c.patient = l.name
+		WHERE {ELIGIBLE_SURGERY_PAYMENT_SQL}
+			AND {in_range("p.transaction_date")}
+		GROUP BY {LEAD_GROUP_BY_SQL}
+		""",
+		f"""
+		SELECT
+			e.first_date AS date,
+			{LEAD_DIMENSIONS_SQL},
+			COALESCE(SUM({sql_line_amount("pc")}), 0) AS costing_revenue
+		FROM (
+			SELECT c.name AS costing_name, c.patient AS lead, MIN(p.transaction_date) AS first_date
+			FROM `tabPayment` p
+			INNER JOIN `tabSurgery` s ON s.name = p.patient
+			INNER JOIN `tabCosting` c ON s.patient = c.name
+			INNER JOIN `tabLead` l ON c.patient = l.name
+			WHERE {ELIGIBLE_SURGERY_PAYMENT_SQL}
+				AND c.name IN (
+					SELECT s2.patient
+					FROM `tabPayment` p2
+					INNER JOIN `tabSurgery` s2 ON s2.name = p2.patient
+					WHERE p2.payment_type = 'Surgery' AND {in_range("p2.transaction_date")}
+				)
+			GROUP BY c.name, c.patient
+			HAVING {in_range("first_date")}
+		) e
+		INNER JOIN `tabLead` l ON l.name = e.lead
+		INNER JOIN `tabPayment` pc ON pc.patient = e.costing_name
+			AND pc.docstatus < 2
+			AND pc.type = 'Payment'
+			AND pc.payment_type = 'Costing'
+		GROUP BY {LEAD_GROUP_BY_SQL}
+		""",
+	]
+
+	facts = {}
+	for query in queries:
+		for row in frappe.db.sql(query, params, as_dict=True):
+			key = tuple(row[dimension] for dimension in DIMENSIONS)
+			fact = facts.get(key)
+			if not fact:
+				fact = facts[key] = frappe._dict(zip(DIMENSIONS, key))
+				fact.update(dict.fromkeys(METRICS, 0))
+			for metric in METRICS:
+				if metric in row:
+					fact[metric] += row[metric] or 0
+
+	rows = list(facts.values())
+	for row in rows:
+		for metric in ("expense", "surgery_revenue", "costing_revenue"):
+			row[metric] = float(row[metric])
+	return rows
+
+
+def refresh_ad_attribution(from_date=None, to_date=None):
+	"""Replace the facts of `from_date`..`to_date`, or of every date when both are empty."""
+	rows = build_ad_attribution_rows(from_date, to_date)
+
+	if from_date and to_date:
+		frappe.db.delete("Ad Attribution Daily", {"date": ["between", [from_date, to_date]]})
+	else:
+		frappe.db.delete("Ad Attribution Daily")
+
+	now = frappe.utils.now()
+	fields = ["name", "creation", "modified", "owner", "modified_by", *DIMENSIONS, *METRICS]
+	values = [
+		(frappe.generate_hash(length=12), now, now, "Administrator", "Administrator")
+		+ tuple(row[field] for field in (*DIMENSIONS, *METRICS))
+		for row in rows
+	]
+	frappe.db.bulk_insert("Ad Attribution Daily", fields, values, chunk_size=1000)
+	frappe.db.commit()
+
+
+def rebuild_ad_attribution():
+	"""Nightly full rebuild, the safety net for writes the doc_events below do not see."""
+	refresh_ad_attribution()
+
+
+def refresh_ad_attribution_dates(dates):
+	for date in sorted(set(dates)):
+		refresh_ad_attribution(date, date)
+
+
+def refresh_pending_ad_attribution():
+	"""Background job: refresh every fact date queued by `queue_ad_attribution_refresh`.
+
+	The queued marker is dropped before the dates are taken, so a write that
+	commits while this runs queues a new job instead of being lost.
+	"""
+	cache = frappe.cache()
+	pipeline = cache.pipeline()
+	pipeline.delete(cache.make_key(REFRESH_QUEUED_KEY))
+	pipeline.execute()
+
+	pipeline = cache.pipeline()
+	pipeline.smembers(cache.make_key(PENDING_DATES_KEY))
+	pipeline.delete(cache.make_key(PENDING_DATES_KEY))
+	dates, _ = pipeline.execute()
+	refresh_ad_attribution_dates(frappe.safe_decode(date) for date in dates)
+
+
+def queue_ad_attribution_refresh(doc, method=None):
+	"""Lead / Campaign Expense / Costing / Surgery / Payment on_update and on_trash:
+	refresh, after commit, the fact dates the document contributed to before and after the change."""
+	if frappe.flags.in_patch or frappe.flags.in_install or doc.doctype not in TRACKED_FIELDS:
+		return
+
+	old_doc = doc.get_doc_before_save()
+	if (
+		method == "on_update"
+		and old_doc
+		and all(old_doc.get(field) == doc.get(field) for field in TRACKED_FIELDS[doc.doctype])
+	):
+		return
+
+	versions = [version for version in (doc, old_doc) if version]
+	if doc.doctype == "Campaign Expense":
+		dates = {version.date for version in versions}
+	else:
+		dates = get_lead_attribution_dates(get_attributed_leads(doc.doctype, versions))
+		for version in versions:
+			for fieldname in ("created_on", "booking_date", "surgery_date", "transaction_date"):
+				if version.get(fieldname):
+					dates.add(version.get(fieldname))
+
+	dates = sorted({str(getdate(date)) for date in dates if date})
+	if not dates:
+		return
+
+	frappe.db.after_commit.add(lambda: _enqueue_ad_attribution_refresh(dates))
+
+
+def _enqueue_ad_attribution_refresh(dates):
+	"""Add `dates` to the pending set and queue a refresh job unless one is queued and not started yet."""
+	cache = frappe.cache()
+	pipeline = cache.pipeline()
+	pipeline.sadd(cache.make_key(PENDING_DATES_KEY), *dates)
+	pipeline.execute()
+	if cache.set(cache.make_key(REFRESH_QUEUED_KEY), 1, ex=REFRESH_QUEUED_TTL, nx=True):
+		frappe.enqueue(
+			"frappe_hfhg.frappe_hfhg.doctype.ad_attribution_daily.ad_attribution_daily.refresh_pending_ad_attribution",
+			queue="short",
+		)
+
+
+def get_attributed_leads(doctype, versions):
+	"""Leads whose attribution a Lead / Costing / Surgery / Payment document feeds."""
+	if doctype == "Lead":
+		return {version.name for version in versions}
+	if doctype == "Costing":
+		return {version.patient for version in versions if version.patient}
+
+	costings = set()
+	if doctype == "Surgery":
+		costings = {version.patient for version in versions if version.patient}
+	elif doctype == "Payment":
+		surgeries = {version.patient for version in versions if version.payment_type == "Surgery" and version.patient}
+		costings = {version.patient for version in versions if version.payment_type == "Costing" and version.patient}
+		if surgeries:
+			costings.update(frappe.get_all("Surgery", filters={"name": ["in", list(surgeries)]}, pluck="patient"))
+
+	costings.discard(None)
+	if not costings:
+		return set()
+	return set(frappe.get_all("Costing", filters={"name": ["in", list(costings)]}, pluck="patient"))
+
+
+def get_lead_attribution_dates(leads):
+	"""Every fact date the given leads and their costings, surgeries and surgery payments land on."""
+	leads = [lead for lead in leads if lead]
+	if not leads:
+		return set()
+
+	rows = frappe.db.sql(
+		"""
+		SELECT COALESCE(l.created_on, DATE(l.creation)) FROM `tabLead` l WHERE l.name IN %(leads)s
+		UNION
+		SELECT COALESCE(c.booking_date, DATE(c.creation)) FROM `tabCosting` c WHERE c.patient IN %(leads)s
+		UNION
+		SELECT COALESCE(s.surgery_date, DATE(s.creation))
+		FROM `tabSurgery` s
+		INNER JOIN `tabCosting` c ON s.patient = c.name
+		WHERE c.patient IN %(leads)s
+		UNION
+		SELECT p.transaction_date
+		FROM `tabPayment` p
+		INNER JOIN `tabSurgery` s ON s.name = p.patient
+		INNER JOIN `tabCosting` c ON s.patient = c.name
+		WHERE p.payment_type = 'Surgery' AND c.patient IN %(leads)s
+		""",
+		{"leads": leads},
+	)
+	return {row[0] for row in rows if row[0]}
@@ -0,0 +1,78 @@
+# Copyright (c) 2026, redsoft and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import today
+
+from frappe_hfhg.frappe_hfhg.doctype.ad_attribution_daily.ad_attribution_daily import (
+	build_ad_attribution_rows,
+	refresh_ad_attribution,
+)
+from frappe_hfhg.frappe_hfhg.report.ad_expense_report.ad_expense_report import get_data
+from frappe_hfhg.tests.utils import insert_rows
+
+
+class TestAdAttributionDaily(FrappeTestCase):
+	def test_stored_facts_match_live_facts(self):
+		"""The report reads the same rows from the stored facts as from the live build."""
+		date = today()
+		insert_rows(
+			"Campaign Expense",
+			[{"date": date, "source": "Google Adword", "campaign": "_Test Attribution Campaign", "total_amount": "1000"}],
+		)
+		leads = insert_rows(
+			"Lead",
+			[
+				{"created_on": date, "source": "Google Adword", "campaign_name": "_test attribution campaign"},
+				{"created_on": date, "source": "Google Adword", "campaign_name": "_Test Attribution Campaign"},
+			],
+		)
+		costings = insert_rows("Costing", [{"patient": leads[0], "booking_date": date}])
+		surgeries = insert_rows(
+			"Surgery", [{"patient": costings[0], "surgery_date": date, "surgery_status": "Completed", "pending_amount": 0}]
+		)
+		insert_rows(
+			"Payment",
+			[
+				{
+					"patient": surgeries[0], "type": "Payment", "payment_type": "Surgery",
+					"transaction_date": date, "total_amount_received": "5000",
+				},
+				{
+					"patient": costings[0], "type": "Payment", "payment_type": "Costing",
+					"transaction_date": date, "total_amount_received": "2000",
+				},
+			],
+		)
+
+		# Keep the refresh inside the test transaction
+		with patch.object(frappe.db, "commit"):
+			refresh_ad_attribution(date, date)
+
+		stored = frappe.get_all(
+			"Ad Attribution Daily",
+			filters={"date": date},
+			fields=["date", "source", "campaign", "ad_id", "form_id", "center", "subsource", "expense_entries",
+				"expense", "leads", "costings", "surgeries", "surgery_revenue", "costing_revenue"],
+		)
+		self.assertEqual(sorted(map(fact_key, stored)), sorted(map(fact_key, build_ad_attribution_rows(date, date))))
+
+		filters = frappe._dict(from_date=date, to_date=date, campaign_name="_Test Attribution Campaign")
+		from_facts = get_data(frappe._dict(filters, live_today=0))
+		live = get_data(frappe._dict(filters, live_today=1))
+		self.assertEqual(from_facts, live)
+		self.assertEqual(len(live), 1)
+		self.assertEqual(live[0]["leads_in_period"], 2)
+		self.assertEqual(live[0]["total_expense"], 1000.0)
+		self.assertEqual(live[0]["surgery_revenue"], 7000.0)
+
+
+def fact_key(row):
+	return (
+		str(row["date"]), row["source"], row["campaign"], row["ad_id"], row["form_id"], row["center"], row["subsource"],
+		int(row["expense_entries"]), float(row["expense"]), int(row["leads"]), int(row["costings"]),
+		int(row["surgeries"]), float(row["surgery_revenue"]), float(row["costing_revenue"]),
+	)
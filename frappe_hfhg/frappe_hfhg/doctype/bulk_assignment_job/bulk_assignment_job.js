@@ -0,0 +1,8 @@
+// Copyright (c) 2026, redsoft and contributors
+// For license information, please see license.txt
+
+// frappe.ui.form.on("Bulk Assignment Job", {
+// 	refresh(frm) {
+
+// 	},
+// });
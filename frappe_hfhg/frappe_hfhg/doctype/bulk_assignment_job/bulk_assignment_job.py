@@ -0,0 +1,148 @@
+# Copyright (c) 2026, redsoft and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import add_to_date, now_datetime
+
+from frappe_hfhg.assignment import reconcile_assignments
+
+BULK_ASSIGNMENT_DOCTYPES = ("Lead", "Costing", "Surgery", "Consultation")
+BULK_ASSIGNMENT_CHUNK_SIZE = 2000
+# A Running job that has not moved for this long lost its worker and is picked up again
+STALLED_AFTER_MINUTES = 30
+
+
+class BulkAssignmentJob(Document):
+	pass
+
+
+def start_bulk_assignment(center, clinic_manager=None):
+	"""Create a Bulk Assignment Job for `center` and queue it after the commit."""
+	job = frappe.get_doc(
+		{
+			"doctype": "Bulk Assignment Job",
+			"center": center,
+			"clinic_manager": clinic_manager,
+			"status": "Queued",
+			"progress": frappe.as_json(get_initial_progress(center)),
+		}
+	).insert(ignore_permissions=True)
+	enqueue_bulk_assignment(job.name)
+	return job.name
+
+
+def get_initial_progress(center):
+	return {
+		doctype: {"after": None, "done": 0, "total": frappe.db.count(doctype, {"center": center})}
+		for doctype in BULK_ASSIGNMENT_DOCTYPES
+	}
+
+
+def enqueue_bulk_assignment(job_name):
+	frappe.enqueue(
+		"frappe_hfhg.frappe_hfhg.doctype.bulk_assignment_job.bulk_assignment_job.run_bulk_assignment",
+		queue="long",
+		job_id=f"bulk_assignment:{job_name}",
+		deduplicate=True,
+		enqueue_after_commit=True,
+		job_name=job_name,
+	)
+
+
+def run_bulk_assignment(job_name):
+	"""Reconcile the assignments of every document of the job's center, chunk by chunk.
+
+	Each chunk is read with a keyset cursor (name > the last name done) and
+	committed together with the job's progress, so a restart carries on after
+	the last committed chunk. Reconciling only adds what is missing, a chunk
+	that is run twice assigns nobody twice.
+	"""
+	job = frappe.get_doc("Bulk Assignment Job", job_name)
+	if job.status == "Completed":
+		return
+
+	progress = frappe.parse_json(job.progress) if job.progress else get_initial_progress(job.center)
+	set_job_state(job_name, "Running", progress)
+
+	try:
+		for doctype in BULK_ASSIGNMENT_DOCTYPES:
+			state = progress.setdefault(doctype, {"after": None, "done": 0, "total": 0})
+			while True:
+				filters = {"center": job.center}
+				if state["after"]:
+					filters["name"] = [">", state["after"]]
+				names = frappe.get_all(
+					doctype, filters=filters, pluck="name", order_by="name asc", limit=BULK_ASSIGNMENT_CHUNK_SIZE
+				)
+				if not names:
+					break
+
+				reconcile_assignments(doctype, names, notify=False)
+				state["after"] = names[-1]
+				state["done"] += len(names)
+				state["total"] = max(state["total"], state["done"])
+				set_job_state(job_name, "Running", progress)
+
+		set_job_state(job_name, "Completed", progress)
+	except Exception:
+		frappe.db.rollback()
+		set_job_state(job_name, "Failed", progress, error=frappe.get_traceback())
+		raise
+
+
+def set_job_state(job_name, status, progress, error=None):
+	frappe.db.set_value(
+		"Bulk Assignment Job",
+		job_name,
+		{"status": status, "progress": frappe.as_json(progress), "error": error},
+	)
+	frappe.db.commit()
+
+
+@frappe.whitelist()
+def resume_bulk_assignment(job_name):
+	"""Queue a Failed or stalled job again, it continues from its last committed chunk."""
+	frappe.only_for("System Manager")
+	if frappe.db.get_value("Bulk Assignment Job", job_name, "status") != "Completed":
+		enqueue_bulk_assignment(job_name)
+
+
+def resume_stalled_bulk_assignments():
+	"""Hourly: queue again the jobs whose worker died (Queued / Running but untouched for a while)."""
+	for job_name in frappe.get_all(
+		"Bulk Assignment Job",
+		filters={
+			"status": ["in", ["Queued", "Running"]],
+			"modified": ["<", add_to_date(now_datetime(), minutes=-STALLED_AFTER_MINUTES)],
+		},
+		pluck="name",
+	):
+		enqueue_bulk_assignment(job_name)
+
+
+@frappe.whitelist()
+def get_bulk_assignment_progress(center):
+	"""Status and done / total per doctype of the latest Bulk Assignment Job of `center`."""
+	frappe.has_permission("Center", "read", center, throw=True)
+	job = frappe.get_all(
+		"Bulk Assignment Job",
+		filters={"center": center},
+		fields=["name", "status", "progress", "modified"],
+		order_by="creation desc",
+		limit=1,
+	)
+	if not job:
+		return None
+
+	job = job[0]
+	progress = frappe.parse_json(job.progress) if job.progress else {}
+	return {
+		"job": job.name,
+		"status": job.status,
+		"modified": job.modified,
+		"progress": {
+			doctype: {"done": state.get("done", 0), "total": state.get("total", 0)}
+			for doctype, state in progress.items()
+		},
+	}
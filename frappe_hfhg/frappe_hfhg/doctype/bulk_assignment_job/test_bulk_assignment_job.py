@@ -0,0 +1,67 @@
+# Copyright (c) 2026, redsoft and Contributors
+# See license.txt
+
+from unittest.mock import patch
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from frappe_hfhg.assignment import reconcile_assignments
+from frappe_hfhg.frappe_hfhg.doctype.bulk_assignment_job import bulk_assignment_job
+from frappe_hfhg.tests.utils import insert_rows
+
+CENTER = "_Test Bulk Assignment Center"
+CLINIC_MANAGER = "_test_bulk_assignment_manager@example.com"
+EXECUTIVE_EMAIL = "_test_bulk_assignment_executive@example.com"
+
+
+class TestBulkAssignmentJob(FrappeTestCase):
+	def test_resumed_job_continues_after_its_last_chunk(self):
+		"""A job restarted after a crash carries on from `after` and assigns nobody twice."""
+		insert_rows("Center", [{"name": CENTER, "clinic_manager": CLINIC_MANAGER}])
+		insert_rows(
+			"Executive",
+			[{"name": "_Test Bulk Assignment Executive", "fullname": "_Test Bulk Assignment Executive", "email": EXECUTIVE_EMAIL}],
+		)
+		leads = insert_rows(
+			"Lead",
+			[
+				{"name": f"_Test Bulk Assignment Lead {i}", "center": CENTER, "executive": "_Test Bulk Assignment Executive"}
+				for i in range(5)
+			],
+		)
+
+		# The worker died after reconciling a third lead, before committing that chunk's progress
+		reconcile_assignments("Lead", leads[:3], notify=False)
+		progress = bulk_assignment_job.get_initial_progress(CENTER)
+		progress["Lead"].update(after=leads[1], done=2)
+		job = frappe.get_doc(
+			{
+				"doctype": "Bulk Assignment Job",
+				"center": CENTER,
+				"status": "Running",
+				"progress": frappe.as_json(progress),
+			}
+		).insert(ignore_permissions=True)
+
+		# Keep the job's commits inside the test transaction
+		with (
+			patch.object(frappe.db, "commit"),
+			patch.object(bulk_assignment_job, "reconcile_assignments", wraps=reconcile_assignments) as reconcile,
+		):
+			bulk_assignment_job.run_bulk_assignment(job.name)
+
+		lead_batches = [call.args[1] for call in reconcile.call_args_list if call.args[0] == "Lead"]
+		self.assertEqual(lead_batches, [leads[2:]])
+
+		job.reload()
+		self.assertEqual(job.status, "Completed")
+		self.assertEqual(frappe.parse_json(job.progress)["Lead"], {"after": leads[-1], "done": 5, "total": 5})
+
+		for lead in leads:
+			for doctype, filters in (
+				("ToDo", {"reference_type": "Lead", "reference_name": lead, "status": "Open"}),
+				("DocShare", {"share_doctype": "Lead", "share_name": lead}),
+			):
+				users = frappe.get_all(doctype, filters=filters, pluck="allocated_to" if doctype == "ToDo" else "user")
+				self.assertEqual(sorted(users), sorted([EXECUTIVE_EMAIL, CLINIC_MANAGER]))
@@ -6,6 +6,7 @@ import pandas as pd
 import os
 from frappe import _
 from frappe.utils import formatdate, flt
+from frappe_hfhg.ad_key import get_ad_key
 
 
 def _normalize_excel_header(name):
@@ -46,6 +47,7 @@ class CampaignExpense(Document):
             self.ads = self.ad_name
         if getattr(self, "ads", None) and not getattr(self, "ad_name", None):
             self.ad_name = self.ads
+        self.ad_key = get_ad_key(self.ad_id)
 
         # Calculate the total amount if both amount and gst_amount are provided
         if self.amount and self.gst_amount:
@@ -217,6 +219,7 @@ class CampaignExpense(Document):
                             {
                                 "source": self.source,
                                 "ad_id": self.ad_id,
+                                "ad_key": get_ad_key(self.ad_id),
                                 "meta_lead_form": self.meta_lead_form,
                                 "ads": self.ads,
                                 "meta_ad_id": getattr(self, "meta_ad_id", None),
@@ -4,6 +4,11 @@
 import frappe
 from frappe.model.document import Document
 from frappe import _
+from frappe_hfhg.user_scope import (
+	clear_user_scope_for_doc,
+	get_cached_permission_query_condition,
+	get_user_scope,
+)
 
 
 class CentreAssignment(Document):
@@ -31,12 +36,16 @@ class CentreAssignment(Document):
 	
 	def on_update(self):
 		"""Grant permissions when centres are assigned"""
+		clear_user_scope_for_doc(self, "user")
 		if self.user:
 			self.ensure_user_has_role()
 			self.grant_doctype_permissions()
 			self.grant_report_permissions()
 			self.setup_user_permissions()
 	
+	def on_trash(self):
+		clear_user_scope_for_doc(self, "user")
+
 	def ensure_user_has_role(self):
 		"""Ensure user has Marketing Head(new) role"""
 		role = "Marketing Head(new)"
@@ -226,18 +235,8 @@ def get_assigned_centres_for_user(user=None):
 	"""Helper function for reports to get assigned centres for a user"""
 	if not user:
 		user = frappe.session.user
-	
-	# Check if user has Centre Assignment
-	assignment = frappe.db.exists("Centre Assignment", {"user": user})
-	
-	if not assignment:
-		return []
-	
-	# Get the assignment document
-	assignment_doc = frappe.get_doc("Centre Assignment", assignment)
-	
-	# Return list of assigned centre names
-	return [c.center for c in assignment_doc.centres]
+
+	return list(get_user_scope(user).assigned_centres)
 
 
 def apply_marketing_head_center_filter(query, params, center_field="center", table_alias=""):
@@ -319,39 +318,38 @@ def get_center_permission_query_condition(user, doctype=None):
 	if "Marketing Head(new)" not in user_roles:
 		# Not a Marketing Head, return empty (no additional filtering)
 		return ""
-	
-	# Check if user has Centre Assignment (similar to checking if user is Executive)
-	assignment_name = frappe.db.exists("Centre Assignment", {"user": user})
-	
-	if not assignment_name:
-		# No centre assignment, return empty
-		return ""
-	
-	# Get the assignment document by name (autoname is format:{user})
+
+	# The compiled condition is memoised per (user, doctype) and dropped when the Centre Assignment changes.
+	# Errors are not cached, the next call rebuilds the condition.
 	try:
-		assignment_doc = frappe.get_doc("Centre Assignment", assignment_name)
-		assigned_centres = [c.center for c in assignment_doc.centres]
-		
-		if not assigned_centres:
-			return ""
-		
-		# Return SQL condition to filter by assigned centres
-		# Use proper SQL escaping to prevent injection
-		# Handle both single and multiple centres
-		if len(assigned_centres) == 1:
-			# Escape the centre name
-			escaped_centre = frappe.db.escape(assigned_centres[0])
-			return f"`tab{doctype}`.center = {escaped_centre}"
-		else:
-			# Escape all centre names
-			escaped_centres = [frappe.db.escape(centre) for centre in assigned_centres]
-			centres_str = ", ".join(escaped_centres)
-			return f"`tab{doctype}`.center IN ({centres_str})"
+		return get_cached_permission_query_condition(user, doctype, build_center_permission_query_condition)
 	except Exception as e:
 		frappe.logger().error(f"Error in get_center_permission_query_condition: {str(e)}")
 		return ""
 
 
+def build_center_permission_query_condition(user, doctype):
+	"""Build the `IN (...)` condition for the centres assigned to a Marketing Head(new) user"""
+	# Assigned centres come from the cached user scope (no Centre Assignment means no centres)
+	assigned_centres = get_user_scope(user).assigned_centres
+	
+	if not assigned_centres:
+		return ""
+	
+	# Return SQL condition to filter by assigned centres
+	# Use proper SQL escaping to prevent injection
+	# Handle both single and multiple centres
+	if len(assigned_centres) == 1:
+		# Escape the centre name
+		escaped_centre = frappe.db.escape(assigned_centres[0])
+		return f"`tab{doctype}`.center = {escaped_centre}"
+	else:
+		# Escape all centre names
+		escaped_centres = [frappe.db.escape(centre) for centre in assigned_centres]
+		centres_str = ", ".join(escaped_centres)
+		return f"`tab{doctype}`.center IN ({centres_str})"
+
+
 @frappe.whitelist()
 @frappe.validate_and_sanitize_search_inputs
 def get_all_users(doctype, txt, searchfield, start, page_len, filters):
@@ -2,9 +2,8 @@
 # For license information, please see license.txt
 
 import frappe
-from frappe.desk.form import assign_to
 from frappe.model.document import Document
-from frappe.share import set_permission
+from frappe_hfhg.assignment import reconcile_assignments
 from frappe.utils.data import today
 from frappe import _
 from frappe.utils import getdate, nowdate
@@ -23,91 +22,17 @@ class Consultation(Document):
 			if current_date != previous_doc.date and self.status == "Not Visited":
 				self.status = "Rescheduled"
 
+	def on_trash(self):
+		update_latest_consultation(self.patient, exclude=self.name)
+
 	def on_update(self):
-		if self.executive:
-			executive = frappe.get_doc('Executive', self.executive)
-			assignes = assign_to.get({
-				"doctype": 'Consultation',
-				"name": self.name
-			})
+		update_latest_consultation(self.patient)
+		previous_doc = self.get_doc_before_save()
+		if previous_doc and previous_doc.patient != self.patient:
+			update_latest_consultation(previous_doc.patient)
+
+		reconcile_assignments("Consultation", [self.name], reset_on_new_executive=True)
 
-			assignes_list = [x.owner for x in assignes]
-
-			if executive.email not in assignes_list:
-				assign_to.clear('Consultation',self.name)
-				frappe.db.delete("DocShare", {
-					"share_doctype": 'Consultation',
-					"share_name": self.name
-				})
-				assign_to.add({
-					"assign_to": [executive.email],
-					"doctype": 'Consultation',
-					"name": self.name
-				}, ignore_permissions=True)
-				set_permission('Consultation', self.name, executive.email, 'write')
-				set_permission('Consultation', self.name, executive.email, 'share')
-
-				frappe.db.commit()
-			assignes = assign_to.get({
-					"doctype": 'Lead',
-					"name": self.name
-				})
-			assignes_list = [x.owner for x in assignes]
-			# if self.previous_executive:
-			# 	previous_executive = frappe.get_doc('Executive', self.previous_executive)
-			# 	if previous_executive.email not in assignes_list:
-			# 		assign_to.add({
-			# 			"assign_to": [previous_executive.email],
-			# 			"doctype": 'Consultation',
-			# 			"name": self.name
-			# 		}, ignore_permissions=True)
-		
-		if self.center:
-			assignes = assign_to.get({
-				"doctype": 'Consultation',
-				"name": self.name
-			})
-			assignes_list = [x.owner for x in assignes]
-
-			center = frappe.get_doc('Center', self.center)
-			receptionist = frappe.get_doc('Receptionist', center.receptionist)
-			if receptionist.email not in assignes_list:
-				assign_to.add({
-					"assign_to": [receptionist.email],
-					"doctype": 'Consultation',
-					"name": self.name
-				}, ignore_permissions=True)
-				set_permission('Consultation', self.name, receptionist.email, 'write')
-				set_permission('Consultation', self.name, receptionist.email, 'share')
-			if center.clinic_manager and center.clinic_manager not in assignes_list:
-				assign_to.add({
-					"assign_to": [center.clinic_manager],
-					"doctype": 'Consultation',
-					"name": self.name
-				}, ignore_permissions=True)
-				set_permission('Consultation', self.name, center.clinic_manager, 'write')
-				set_permission('Consultation', self.name, center.clinic_manager, 'share')
-
-				frappe.db.commit()
-		
-		if self.doctor:
-			assignes = assign_to.get({
-				"doctype": 'Consultation',
-				"name": self.name
-			})
-			assignes_list = [x.owner for x in assignes]
-
-			doctor = frappe.get_doc('Doctor', self.doctor)
-			if doctor.email not in assignes_list:
-				assign_to.add({
-					"assign_to": [doctor.email],
-					"doctype": 'Consultation',
-					"name": self.name
-				}, ignore_permissions=True)
-				set_permission('Consultation', self.name, doctor.email, 'write')
-				set_permission('Consultation', self.name, doctor.email, 'share')
-				frappe.db.commit()
-	
 		lead_exists = frappe.db.exists("Lead", {"name": self.patient})
 		if lead_exists:
 			lead = frappe.get_doc("Lead", self.patient)
@@ -134,6 +59,53 @@ class Consultation(Document):
 				lead.save(ignore_permissions=True)
 
 
+def get_latest_consultation(lead, exclude=None):
+	"""(date, status) of the latest Consultation of `lead`, ignoring the consultation `exclude`"""
+	result = frappe.db.sql(
+		"""
+		SELECT date, status
+		FROM `tabConsultation`
+		WHERE patient = %(lead)s AND name != %(exclude)s
+		ORDER BY date DESC, creation DESC
+		LIMIT 1
+		""",
+		{"lead": lead, "exclude": exclude or ""},
+	)
+	return (result[0][0], result[0][1]) if result else (None, None)
+
+
+def update_latest_consultation(lead, exclude=None):
+	"""Keep Lead.latest_consultation_date / latest_consultation_status in step (read by the reports)"""
+	if not lead or not frappe.db.exists("Lead", lead):
+		return
+	date, status = get_latest_consultation(lead, exclude=exclude)
+	frappe.db.set_value(
+		"Lead",
+		lead,
+		{"latest_consultation_date": date, "latest_consultation_status": status},
+		update_modified=False,
+	)
+
+
+def rebuild_latest_consultations():
+	"""Backfill Lead.latest_consultation_date / latest_consultation_status for every lead.
+
+	bench --site <site> execute frappe_hfhg.frappe_hfhg.doctype.consultation.consultation.rebuild_latest_consultations
+	"""
+	frappe.db.sql(
+		"""
+		UPDATE `tabLead` l
+		LEFT JOIN (
+			SELECT patient, date, status,
+				ROW_NUMBER() OVER (PARTITION BY patient ORDER BY date DESC, creation DESC) AS rn
+			FROM `tabConsultation`
+		) c ON c.patient = l.name AND c.rn = 1
+		SET l.latest_consultation_date = c.date, l.latest_consultation_status = c.status
+		"""
+	)
+	frappe.db.commit()
+
+
 @frappe.whitelist()
 def get_slots(doctor):
 	consultations = frappe.get_all('Consultation', filters={'doctor': doctor, "date": [">=", today()]}, fields=['date', 'slot', 'mode'], order_by='date')
@@ -2,10 +2,10 @@
 # For license information, please see license.txt
 
 import frappe
-from frappe.desk.form import assign_to
 from frappe.model.document import Document
 from frappe import _
-from frappe.share import set_permission
+from frappe_hfhg.assignment import reconcile_assignments
+from frappe_hfhg.name_allocator import allocate_name, format_name
 
 class Costing(Document):
 	def before_insert(self):
@@ -16,13 +16,9 @@ class Costing(Document):
 				frappe.throw(_("You can not create a costing for a duplicate lead."))
 
 	def autoname(self):
-		available = frappe.get_all(
-			"Costing",
-			filters={"patient": self.patient},
-		)
-		if len(available) != 0:
-			new_name = self.patient + " (Session - " + str(len(available) + 1) + ")"
-			self.name = new_name.strip()
+		number = allocate_name("Costing", self.patient, " (Session - ", ")")
+		if number > 1:
+			self.name = format_name(self.patient, number, " (Session - ", ")").strip()
 
 	def on_update(self):
 		if self.surgery_date and self.status == "Booking" :
@@ -62,90 +58,7 @@ class Costing(Document):
 				if surgery_doc.note != self.note:
 					surgery_doc.note = self.note
 					surgery_doc.save(ignore_permissions=True)
-		if self.executive:
-			executive = frappe.get_doc('Executive', self.executive)
-			assignes = assign_to.get({
-				"doctype": 'Costing',
-				"name": self.name
-			})
-
-			assignes_list = [x.owner for x in assignes]
-
-			if executive.email not in assignes_list:
-				assign_to.clear('Costing',self.name)
-				frappe.db.delete("DocShare", {
-					"share_doctype": 'Costing',
-					"share_name": self.name
-				})
-				assign_to.add({
-					"assign_to": [executive.email],
-					"doctype": 'Costing',
-					"name": self.name
-				}, ignore_permissions=True)
-				set_permission('Costing', self.name, executive.email, 'write')
-				set_permission('Costing', self.name, executive.email, 'share')
-
-				frappe.db.commit()
-			assignes = assign_to.get({
-					"doctype": 'Costing',
-					"name": self.name
-				})
-			assignes_list = [x.owner for x in assignes]
-			# if self.previous_executive:
-			# 	previous_executive = frappe.get_doc('Executive', self.previous_executive)
-			# 	if previous_executive.email not in assignes_list:
-			# 		assign_to.add({
-			# 			"assign_to": [previous_executive.email],
-			# 			"doctype": 'Costing',
-			# 			"name": self.name
-			# 		}, ignore_permissions=True)
-
-		if self.center:
-			assignes = assign_to.get({
-				"doctype": 'Costing',
-				"name": self.name
-			})
-			assignes_list = [x.owner for x in assignes]
-
-			center = frappe.get_doc('Center', self.center)
-			receptionist = frappe.get_doc('Receptionist', center.receptionist)
-			if receptionist.email not in assignes_list:
-				assign_to.add({
-					"assign_to": [receptionist.email],
-					"doctype": 'Costing',
-					"name": self.name
-				}, ignore_permissions=True)
-				set_permission('Costing', self.name, receptionist.email, 'write')
-				set_permission('Costing', self.name, receptionist.email, 'share')
-			if center.clinic_manager and center.clinic_manager not in assignes_list:
-				assign_to.add({
-					"assign_to": [center.clinic_manager],
-					"doctype": 'Costing',
-					"name": self.name
-				}, ignore_permissions=True)
-				set_permission('Costing', self.name, center.clinic_manager, 'write')
-				set_permission('Costing', self.name, center.clinic_manager, 'share')
-
-			frappe.db.commit()
-
-		if self.doctor:
-			assignes = assign_to.get({
-				"doctype": 'Costing',
-				"name": self.name
-			})
-			assignes_list = [x.owner for x in assignes]
-
-			doctor = frappe.get_doc('Doctor', self.doctor)
-			if doctor.email not in assignes_list:
-				assign_to.add({
-					"assign_to": [doctor.email],
-					"doctype": 'Costing',
-					"name": self.name
-				}, ignore_permissions=True)
-				set_permission('Costing', self.name, doctor.email, 'write')
-				set_permission('Costing', self.name, doctor.email, 'share')
-
-			frappe.db.commit()
+		reconcile_assignments("Costing", [self.name], reset_on_new_executive=True)
 
 		if frappe.db.exists("Lead", self.patient):
 			lead = frappe.get_doc("Lead", self.patient)
@@ -4,6 +4,7 @@
 import frappe
 from frappe.model.document import Document
 from frappe import _
+from frappe_hfhg.name_allocator import allocate_name, format_name
 
 class Doctor(Document):
 	def after_insert(self):
@@ -29,13 +30,10 @@ class Doctor(Document):
 		frappe.db.commit()
 		
 	def before_insert(self):
-		available = frappe.get_all(
-			"Doctor",
-			filters={"name": self.fullname},
-		)
-		if len(available) != 0:
+		number = allocate_name("Doctor", self.fullname, "-")
+		if number > 1:
 			old_name = self.fullname
-			self.fullname = self.fullname + "-" + str(len(available) + 1)
+			self.fullname = format_name(self.fullname, number, "-")
 			frappe.msgprint(
 				_("Changed doctor name to '{}' as '{}' already exists.").format(
 					self.fullname, old_name
@@ -1,9 +1,31 @@
 # Copyright (c) 2025, redsoft and contributors
 # For license information, please see license.txt
 
-# import frappe
+import json
+
 from frappe.model.document import Document
 
 
 class DuplicateLeadsLogs(Document):
-	pass
+	def before_insert(self):
+		if not self.original_lead_status:
+			self.original_lead_status = get_status_from_log_object(self.object)
+
+
+def get_status_from_log_object(log_object):
+	"""Status of the original lead stored in a log `object`.
+
+	The object is the duplicate lead's JSON followed by the original lead's,
+	so the second document wins; a log with a single document uses that one.
+	"""
+	if not log_object:
+		return None
+	try:
+		decoder = json.JSONDecoder()
+		first_json, idx = decoder.raw_decode(log_object)
+		if idx < len(log_object):
+			second_json, _ = decoder.raw_decode(log_object, idx)
+			return second_json.get("status") if isinstance(second_json, dict) else None
+		return first_json.get("status") if isinstance(first_json, dict) else None
+	except (json.JSONDecodeError, TypeError, AttributeError, ValueError):
+		return None
@@ -4,6 +4,7 @@
 import frappe
 from frappe.model.document import Document
 from frappe import _
+from frappe_hfhg.user_scope import clear_user_scope_for_doc
 
 class Executive(Document):
 	def after_insert(self):
@@ -55,4 +56,10 @@ class Executive(Document):
 	def validate(self):
 		self.email = self.email.lower()
 
+	def on_update(self):
+		clear_user_scope_for_doc(self, "email")
+
+	def on_trash(self):
+		clear_user_scope_for_doc(self, "email")
+
 
@@ -1,9 +1,121 @@
 # Copyright (c) 2024, redsoft and Contributors
 # See license.txt
 
-# import frappe
+import frappe
 from frappe.tests.utils import FrappeTestCase
 
+from frappe_hfhg.frappe_hfhg.report.executive_business_report.executive_business_report import (
+	get_executive_rows,
+)
+from frappe_hfhg.tests.utils import count_queries, insert_rows
+
 
 class TestExecutive(FrappeTestCase):
-	pass
+	def test_business_report_query_count_is_constant(self):
+		"""The executive business report must not run a set of queries per executive."""
+		filters = frappe._dict(from_date="2099-01-01", to_date="2099-01-31")
+		few = insert_executives("few", 2)
+		many = insert_executives("many", 40)
+
+		small = count_queries(lambda: get_executive_rows(few, filters))
+		large = count_queries(lambda: get_executive_rows(many, filters))
+
+		self.assertEqual(small, large)
+		rows = get_executive_rows(many, filters)
+		self.assertEqual([row["executive"] for row in rows], [executive.name for executive in many])
+
+	def test_business_report_rows(self):
+		"""Each column matches what the per-executive lookups added up."""
+		filters = frappe._dict(from_date="2024-01-01", to_date="2024-01-31")
+		busy, idle = insert_executives("rows", 2)
+
+		insert_rows(
+			"Lead",
+			[
+				{"executive": busy.name, "assign_by": busy.email, "creation": "2024-01-05 10:00:00"},
+				{"executive": busy.name, "assign_by": "Administrator", "creation": "2024-01-06 10:00:00"},
+				{"executive": busy.name, "assign_by": None, "creation": "2024-01-30 18:00:00"},
+				{"executive": busy.name, "assign_by": busy.email, "creation": "2024-02-01 10:00:00"},
+			],
+		)
+		insert_rows(
+			"Reminders",
+			[
+				{"executive": busy.name, "date": "2024-01-10", "status": "Close"},
+				{"executive": busy.name, "date": "2024-01-11", "status": "Open"},
+				{"executive": busy.name, "date": "2024-01-12", "status": None},
+				{"executive": busy.name, "date": "2024-02-10", "status": "Open"},
+			],
+		)
+		insert_rows(
+			"Consultation",
+			[
+				{"executive": busy.name, "date": "2024-01-10", "status": "Booked"},
+				{"executive": busy.name, "date": "2024-01-11", "status": "Medi-PRP"},
+				{"executive": busy.name, "date": "2024-01-12", "status": "Not Visited"},
+				{"executive": busy.name, "date": "2024-01-13", "status": None},
+			],
+		)
+		insert_rows(
+			"Costing",
+			[
+				{"executive": busy.name, "booking_date": "2024-01-10", "amount_paid": 1500.25},
+				{"executive": busy.name, "booking_date": "2024-01-20", "amount_paid": 999.5},
+			],
+		)
+		insert_rows(
+			"Surgery",
+			[
+				{"executive": busy.name, "surgery_date": "2024-01-10", "surgery_status": "Completed", "total_amount": 50000.75},
+				{"executive": busy.name, "surgery_date": "2024-01-11", "surgery_status": "Booked", "total_amount": 20000},
+			],
+		)
+
+		self.assertEqual(
+			get_executive_rows([busy, idle], filters),
+			[
+				{
+					"executive": busy.name,
+					"self_leads": 1,
+					"system_leads": 2,
+					"total_reminder": 3,
+					"total_missed_reminder": 2,
+					"total_reminder_attended": 1,
+					"total_consultation": 4,
+					"total_consultation_done": 2,
+					"total_consultation_pending": 2,
+					"no_of_costing": 2,
+					"booking_amount": 2499.75,
+					"income_generated": 50000.75,
+				},
+				{
+					"executive": idle.name,
+					"self_leads": 0,
+					"system_leads": 0,
+					"total_reminder": 0,
+					"total_missed_reminder": 0,
+					"total_reminder_attended": 0,
+					"total_consultation": 0,
+					"total_consultation_done": 0,
+					"total_consultation_pending": 0,
+					"no_of_costing": 0,
+					"booking_amount": 0,
+					"income_generated": 0,
+				},
+			],
+		)
+
+
+def insert_executives(prefix, count):
+	executives = [
+		frappe._dict(name=f"_Test Executive {prefix} {i}", email=f"_test_executive_{prefix}_{i}@example.com")
+		for i in range(count)
+	]
+	insert_rows(
+		"Executive",
+		[
+			{"name": executive.name, "fullname": executive.name, "email": executive.email, "contact_number": "9999999999"}
+			for executive in executives
+		],
+	)
+	return executives
@@ -3,10 +3,15 @@
 
 import frappe
 from frappe.model.document import Document
+from frappe_hfhg.user_scope import clear_user_scope_for_doc, get_cached_permission_query_condition
 
 
 class FutureSurgeryAssignment(Document):
-	pass
+	def on_update(self):
+		clear_user_scope_for_doc(self, "user")
+
+	def on_trash(self):
+		clear_user_scope_for_doc(self, "user")
 
 
 @frappe.whitelist()
@@ -84,36 +89,46 @@ def get_future_surgery_permission_query_condition(user, doctype=None):
 	if "Future Surgery" not in user_roles:
 		# Not a Future Surgery user, return empty (no additional filtering)
 		return ""
-	
-	# Check if user has Future Surgery Assignment
-	assignment_exists = frappe.db.exists("Future Surgery Assignment", {"user": user})
-	
-	if not assignment_exists:
-		# No assignment, return empty (user won't see any followups)
-		return ""
-	
-	# Get the assignment document to fetch assigned centres
+
+	# The compiled condition is memoised per (user, doctype) and dropped when the assignment changes.
+	# Errors are not cached, the next call rebuilds the condition.
 	try:
-		assignment_doc = frappe.get_doc("Future Surgery Assignment", {"user": user})
-		assigned_centers = [center.center for center in assignment_doc.centers]
-		
-		if not assigned_centers:
-			# No centers assigned, return a condition that matches nothing
-			return "1=0"
-		
-		# Return SQL condition to filter by assigned centres
-		# Use proper SQL escaping to prevent injection
-		# Handle both single and multiple centres
-		if len(assigned_centers) == 1:
-			# Escape the centre name
-			escaped_center = frappe.db.escape(assigned_centers[0])
-			return f"`tab{doctype}`.center = {escaped_center}"
-		else:
-			# Escape all centre names
-			escaped_centers = [frappe.db.escape(center) for center in assigned_centers]
-			centers_str = ", ".join(escaped_centers)
-			return f"`tab{doctype}`.center IN ({centers_str})"
+		return get_cached_permission_query_condition(user, doctype, build_future_surgery_permission_query_condition)
 	except Exception as e:
 		frappe.logger().error(f"Error in get_future_surgery_permission_query_condition: {str(e)}")
 		return ""
 
+
+def build_future_surgery_permission_query_condition(user, doctype):
+	"""Build the centre condition from the user's Future Surgery Assignment"""
+	# Check if user has Future Surgery Assignment
+	assignment = frappe.db.get_value("Future Surgery Assignment", {"user": user}, "name")
+	
+	if not assignment:
+		# No assignment, return empty (user won't see any followups)
+		return ""
+	
+	# Fetch the assigned centres straight from the child table
+	assigned_centers = frappe.get_all(
+		"Center Selection",
+		filters={"parenttype": "Future Surgery Assignment", "parent": assignment},
+		pluck="center",
+		order_by="idx asc",
+	)
+	
+	if not assigned_centers:
+		# No centers assigned, return a condition that matches nothing
+		return "1=0"
+	
+	# Return SQL condition to filter by assigned centres
+	# Use proper SQL escaping to prevent injection
+	# Handle both single and multiple centres
+	if len(assigned_centers) == 1:
+		# Escape the centre name
+		escaped_center = frappe.db.escape(assigned_centers[0])
+		return f"`tab{doctype}`.center = {escaped_center}"
+	else:
+		# Escape all centre names
+		escaped_centers = [frappe.db.escape(center) for center in assigned_centers]
+		centers_str = ", ".join(escaped_centers)
+		return f"`tab{doctype}`.center IN ({centers_str})"
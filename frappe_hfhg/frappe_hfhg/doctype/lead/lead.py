@@ -3,13 +3,16 @@
 
 import json
 import frappe
-from frappe.desk.form import assign_to
 from frappe.model.document import Document
 from frappe import _
-from frappe.share import set_permission, remove
-import random
-from datetime import datetime
 from frappe.utils import today
+from frappe_hfhg.frappe_hfhg.doctype.consultation.consultation import get_latest_consultation
+from frappe_hfhg.frappe_hfhg.doctype.original_lead.original_lead import update_original_lead
+from frappe_hfhg.ad_key import get_ad_key, get_ads_name_key, has_meta_ads_keys
+from frappe_hfhg.name_allocator import allocate_name, format_name
+from frappe_hfhg.lead_load import pick_executive, sync_lead_load, uncount_lead
+from frappe_hfhg.assignment import FULL_ACCESS, READ_ACCESS, apply_assignment_changes, reconcile_assignments
+from frappe_hfhg.user_scope import get_user_scope
 
 AUTO_LINK_SOURCE_EXCLUSIONS = {"META", "FACEBOOK", "INSTAGRAM"}
 # Webform/Curl leads: do not link ad_name from source so Webform Campaign assignment is not overwritten
@@ -94,22 +97,11 @@ def assign_executive_from_webform_campaign(lead_doc):
 				)
 				return
 			# Round-robin: Nth lead today for this campaign -> executive at index (N % team_size)
-			today_date = datetime.now().strftime("%Y-%m-%d")
-			today_start = f"{today_date} 00:00:00"
-			today_end = f"{today_date} 23:59:59"
-			lead_count_today = frappe.db.count(
-				"Lead",
-				filters={
-					"campaign_name": campaign_name,
-					"created_on": ["between", [today_start, today_end]],
-					"status": ["!=", "Duplicate Lead"],
-				},
+			lead_doc.executive = pick_executive(
+				lead_doc, [r["executive"] for r in all_team_executives], "round_robin"
 			)
-			team_size = len(all_team_executives)
-			assigned_index = lead_count_today % team_size
-			lead_doc.executive = all_team_executives[assigned_index]["executive"]
 			frappe.logger().info(
-				f"Webform campaign '{campaign_name}': round-robin assign (count today={lead_count_today}, index={assigned_index}) -> {lead_doc.executive}"
+				f"Webform campaign '{campaign_name}': round-robin assign -> {lead_doc.executive}"
 			)
 	except Exception as e:
 		frappe.log_error(frappe.get_traceback(), "Lead Executive Assignment (Webform)")
@@ -126,7 +118,9 @@ def auto_link_ad_name_from_source(lead_doc: Document) -> None:
 		return
 
 	meta_ad_name = frappe.db.get_value("Meta Ads", {"ads_name": source_value}, "name")
-	if not meta_ad_name:
+	if not meta_ad_name and has_meta_ads_keys():
+		meta_ad_name = frappe.db.get_value("Meta Ads", {"ads_name_key": get_ads_name_key(source_value)}, "name")
+	elif not meta_ad_name:
 		meta_ad_name = frappe.db.sql(
 			"""
 			SELECT name
@@ -165,6 +159,7 @@ def auto_link_ad_name_from_source(lead_doc: Document) -> None:
 class Lead(Document):
 	def validate(self):
 		auto_link_ad_name_from_source(self)
+		self.ad_key = get_ad_key(self.meta_ad_id)
 		self.contact_number_copy = self.contact_number.split("-")[-1] if self.contact_number else None
 		self.alternative_number_copy = self.alternative_number.split("-")[-1] if self.alternative_number else None
 
@@ -197,11 +192,21 @@ class Lead(Document):
 			if len(number) > 10 and number[0] == "0":
 				number = number[1:]
 				self.alternative_number = self.alternative_number.split("-")[0] + "-" + number
+
+		# Indexed keys used for duplicate detection (see get_original_lead_name)
+		self.contact_number_key = get_phone_key(self.contact_number)
+		self.alternative_number_key = get_phone_key(self.alternative_number)
+
+		if not self.is_new():
+			# Re-read so a save from a stale form can not overwrite it
+			self.latest_consultation_date, self.latest_consultation_status = get_latest_consultation(self.name)
 		
 		# Validate mandatory fields when status is changed (except for specific statuses)
 		self.validate_mandatory_fields_on_status_change()
 
 	def after_insert(self):
+		update_original_lead(self, "after_insert")
+		sync_lead_load(self)
 		lead = get_original_lead_name(self.contact_number, self.alternative_number)
 		if lead:
 			lead_doc = frappe.get_doc("Lead", lead)
@@ -241,6 +246,7 @@ class Lead(Document):
 						"contacts": lead_doc.contact,
 						"contact_number": self.contact_number,
 						"object": json.dumps(self.as_dict(), default=str) + json.dumps(lead_doc.as_dict(), default=str),
+						"original_lead_status": lead_doc.status,
 					}).insert(ignore_permissions=True)
 					self.status = "Duplicate Lead"
 					self.contact = lead_doc.contact
@@ -466,18 +472,7 @@ class Lead(Document):
 								fields=["executive"]
 							)
 							if website_form_executives:
-								today_date = datetime.now().strftime("%Y-%m-%d")
-								lead_counts = {
-									r["executive"]: frappe.db.count("Lead", filters={
-										"executive": r["executive"],
-										"created_on": ["between", [f"{today_date} 00:00:00", f"{today_date} 23:59:59"]],
-										"status": ["!=", "Duplicate Lead"]
-									})
-									for r in website_form_executives
-								}
-								min_leads = min(lead_counts.values(), default=0)
-								least_loaded = [e for e, c in lead_counts.items() if c == min_leads]
-								self.executive = random.choice(least_loaded)
+								self.executive = pick_executive(self, [r["executive"] for r in website_form_executives])
 								frappe.logger().info(f"SEO_Form: Assigned to {self.executive}")
 							else:
 								frappe.log_error("No executives in 'website form' campaign team for SEO_Form.")
@@ -532,23 +527,9 @@ class Lead(Document):
 							fields=["executive"]
 						)
 						if all_team_executives:
-							today_date = datetime.now().strftime("%Y-%m-%d")
-							lead_counts = {
-								record["executive"]: frappe.db.count(
-									"Lead",
-									filters={
-										"executive": record["executive"],
-										"created_on": ["between", [f"{today_date} 00:00:00", f"{today_date} 23:59:59"]],
-										"status": ["!=", "Duplicate Lead"],
-										**({"ad_name": self.ad_name} if self.ad_name else {}),
-										**({"campaign_name": self.campaign_name} if self.campaign_name else {})
-									}
-								)
-								for record in all_team_executives
-							}
-							min_leads = min(lead_counts.values(), default=0)
-							least_loaded_executives = [exec_name for exec_name, count in lead_counts.items() if count == min_leads]
-							self.executive = random.choice(least_loaded_executives)
+							self.executive = pick_executive(
+								self, [record["executive"] for record in all_team_executives], "least_loaded_scoped"
+							)
 						else:
 							frappe.log_error(f"No executives found in Campaign Team '{assign_to}'. Skipping assignment.")
 				except Exception as e:
@@ -560,166 +541,14 @@ class Lead(Document):
 			self.status = "New Lead"
 
 	def on_update(self):
-		old_doc = self.get_doc_before_save()
-		if self.executive:
-			executive = frappe.get_doc('Executive', self.executive)
-			assignes = assign_to.get({
-				"doctype": 'Lead',
-				"name": self.name
-			})
-
-			assignes_list = [x.owner for x in assignes]
-
-			if (executive.email not in assignes_list) or (old_doc.executive != self.executive):
-				assign_to.clear('Lead',self.name)
-				frappe.db.delete("DocShare", {
-					"share_doctype": 'Lead',
-					"share_name": self.name
-				})
-
-				assign_to.add({
-					"assign_to": [executive.email],
-					"doctype": 'Lead',
-					"name": self.name
-				}, ignore_permissions=True)
-				set_permission('Lead', self.name, executive.email, 'write')
-				set_permission('Lead', self.name, executive.email, 'share')
-				frappe.db.commit()
-			else:	
-				has_write_access = frappe.db.exists("DocShare", {
-                    "share_doctype": 'Lead',
-                    "share_name": self.name,
-                    "user": executive.email,
-                    "read": 1,
-                    "write": 1 
-                })
-				if not has_write_access and self.executive == executive.name:
-					set_permission('Lead', self.name, executive.email, 'write')
-					set_permission('Lead', self.name, executive.email, 'share')
-					frappe.db.commit()
-				
-			assignes = assign_to.get({
-					"doctype": 'Lead',
-					"name": self.name
-				    })
-			assignes_list = [x.owner for x in assignes]
-			
-			# Sync executive change to duplicate leads (if this is an original lead)
-			if old_doc and old_doc.executive != self.executive and self.status != "Duplicate Lead":
-				sync_executive_to_duplicates(self.name)
-			
-			# Sync executive change from duplicate lead to original lead
-			if old_doc and old_doc.executive != self.executive and self.status == "Duplicate Lead":
-				sync_executive_to_original_lead(self)
-			
-			costing_exists = frappe.db.exists("Costing", {"patient": self.name})
-			if costing_exists:
-				costing = frappe.get_doc('Costing', {"patient": self.name})
-				if costing.executive != self.executive or costing.assign_by != self.assign_by or costing.previous_executive != self.previous_executive or str(costing.executive_changed_date) != str(self.executive_changed_date):
-					costing.executive = self.executive
-					costing.assign_by = self.assign_by
-					if self.previous_executive:
-						costing.previous_executive = self.previous_executive
-						costing.executive_changed_date = self.executive_changed_date
-					costing.save(ignore_permissions=True)
-
-			surgery_exists = frappe.db.exists("Surgery", {"patient": self.name})
-			if surgery_exists:
-				surgery = frappe.get_doc('Surgery', {"patient": self.name})
-				if surgery.executive != self.executive or surgery.assign_by != self.assign_by or surgery.previous_executive != self.previous_executive or str(surgery.executive_changed_date) != str(self.executive_changed_date):
-					surgery.executive = self.executive
-					surgery.assign_by = self.assign_by
-					if self.previous_executive:
-						surgery.previous_executive = self.previous_executive
-						surgery.executive_changed_date = self.executive_changed_date
-					surgery.save(ignore_permissions=True)
-
-		if self.receptionist:
-			receptionist = frappe.get_doc('Receptionist', self.receptionist)
-			assignes = assign_to.get({
-				"doctype": 'Lead',
-				"name": self.name
-			})
-
-			assignes_list = [x.owner for x in assignes]
-
-			if receptionist.email not in assignes_list:
-				assign_to.add({
-					"assign_to": [receptionist.email],
-					"doctype": 'Lead',
-					"name": self.name
-				}, ignore_permissions=True)
-				set_permission('Lead', self.name, receptionist.email, 'write')
-				set_permission('Lead', self.name, receptionist.email, 'share')
-				frappe.db.commit()
-
-		if self.center:
-			assignes = assign_to.get({
-				"doctype": 'Lead',
-				"name": self.name
-			})
-			assignes_list = [x.owner for x in assignes]
-
-		# Check if center exists before trying to get it
-		if frappe.db.exists('Center', self.center):
-			center = frappe.get_doc('Center', self.center)
-			if center.clinic_manager and center.clinic_manager not in assignes_list:
-				assign_to.add({
-					"assign_to": [center.clinic_manager],
-					"doctype": 'Lead',
-					"name": self.name
-				}, ignore_permissions=True)
-				set_permission('Lead', self.name, center.clinic_manager, 'write')
-				set_permission('Lead', self.name, center.clinic_manager, 'share')
-
-				frappe.db.commit()
-		else:
-			frappe.logger().warning(f"Center '{self.center}' not found for lead {self.name}. Skipping clinic manager assignment.")
-
-		if old_doc and old_doc.center and old_doc.center != self.center:
-			assignes = assign_to.get({
-				"doctype": 'Lead',
-				"name": self.name
-			})
-			assignes_list = [x.owner for x in assignes]
-
-			old_center = frappe.get_doc('Center', old_doc.center)
-			old_receptionist = frappe.get_doc('Receptionist', old_center.receptionist)
-
-			if old_receptionist.email in assignes_list:
-				assign_to.remove("Lead", self.name, old_receptionist.email, ignore_permissions=True)
-				set_permission('Lead', self.name, old_receptionist.email, 'read', 0)
-				frappe.db.commit()
-			
-			if old_center.clinic_manager and old_center.clinic_manager in assignes_list:
-				assign_to.remove("Lead", self.name, old_center.clinic_manager, ignore_permissions=True)
-				set_permission('Lead', self.name, old_center.clinic_manager, 'read', 0)
-				frappe.db.commit()
-
-		if old_doc and old_doc.executive and old_doc.executive != self.executive:
-			restricted_statuses = ["Booked", "Spot Booking", "Non Booked", "Medi-PRP"]
-			if frappe.db.exists("Consultation", {"patient": self.name}):
-				consultations = frappe.get_all("Consultation", filters={"patient": self.name}, fields=["name", "status", "executive", "previous_executive"])
-				for consultation in consultations:
-					assign_to.add({
-                       "assign_to": [executive.email],
-                       "doctype": "Consultation",
-                       "name": consultation.name
-                    }, ignore_permissions=True)
-					set_permission("Consultation", consultation.name, executive.email, "read")
-					if consultation.status not in restricted_statuses:
-						set_permission("Consultation", consultation.name, executive.email, "write")
-						set_permission('Consultation', consultation.name, executive.email, 'share')
-						frappe.db.set_value("Consultation", consultation.name, "previous_executive", self.previous_executive)
-						frappe.db.set_value("Consultation", consultation.name, "executive", self.executive)
-            
-					attachments = frappe.get_all("File", filters={
-                        "attached_to_doctype": "Consultation",
-                        "attached_to_name": consultation.name
-                    }, fields=["name"])
-					for attachment in attachments:
-						set_permission("File", attachment.name, executive.email, "read")
-				frappe.db.commit()
+		update_original_lead(self, "on_update")
+		if self.get_doc_before_save():
+			sync_lead_load(self, self.get_doc_before_save())
+		queue_lead_side_effects(self)
+
+	def on_trash(self):
+		update_original_lead(self, "on_trash")
+		uncount_lead(self)
 
 	def autoname(self):
 		fullname = self.first_name
@@ -727,25 +556,9 @@ class Lead(Document):
 			fullname = fullname + " " + self.middle_name
 		if self.last_name:
 			fullname = fullname + " " + self.last_name
-		available = frappe.get_all(
-			"Lead",
-			filters={"name": fullname},
-		)
-		new_name = fullname
-		if len(available) != 0:
-			new_name = fullname + " - " + str(len(available) + 1)
-			exists = True
-			count = 3
-			while exists:
-				available = frappe.get_all(
-					"Lead",
-					filters={"name": new_name},
-				)
-				if len(available) != 0:
-					new_name = fullname + " - " + str(count)
-					count += 1
-				else:
-					exists = False
+		number = allocate_name("Lead", fullname.strip(), " - ")
+		if number > 1:
+			new_name = format_name(fullname.strip(), number, " - ")
 			frappe.msgprint(
 				_("Changed lead name to '{}' as '{}' already exists.").format(
 					new_name, fullname
@@ -753,15 +566,12 @@ class Lead(Document):
 				title=_("Note"),
 				indicator="yellow",
 			)
-			self.name = new_name.strip()
+			self.name = new_name
 		self.full_name = fullname.strip()
-		new_name = new_name.strip()
-
-		is_executive_exist = frappe.db.exists({"doctype": "Executive", "email": frappe.session.user})
 
-		if is_executive_exist:
-			executive = frappe.get_doc("Executive", {"email": frappe.session.user})
-			self.executive = executive.name
+		scope = get_user_scope()
+		if scope.executive:
+			self.executive = scope.executive
 			self.assign_by = frappe.session.user
 	
 	def validate_mandatory_fields_on_status_change(self):
@@ -861,6 +671,182 @@ def validate_phone_number(phone):
     if not re.match(phone_regex, phone):
         frappe.throw(f"Phone number '{phone}' must be in the format +<country code>-<number>, e.g., +91-7699889988.")
 
+def get_phone_key(phone):
+	"""Digits-only, last 10 digits of a phone number, e.g. "+91-7699889988" -> "7699889988"."""
+	if not phone:
+		return None
+	digits = "".join(ch for ch in str(phone) if ch.isdigit())
+	return digits[-10:] or None
+
+# Values from before a save that tell the side-effects job what changed
+LEAD_SIDE_EFFECT_FIELDS = ("executive", "center")
+LEAD_SIDE_EFFECTS_KEY = "hfhg_lead_side_effects"
+# A pending marker whose job never ran stops blocking new jobs after this long
+LEAD_SIDE_EFFECTS_TTL = 60 * 60
+# Runs of a failing job before it gives up, leaving the failure in the job log
+LEAD_SIDE_EFFECTS_ATTEMPTS = 3
+
+
+def queue_lead_side_effects(lead_doc):
+	"""Lead on_update: run `apply_lead_side_effects` in the background once the save is committed.
+
+	A burst of saves to one lead collapses into one job: the first save stores
+	the values the lead had before it, later saves find that marker pending and
+	enqueue nothing, and the job propagates from those values to whatever the
+	lead holds when it runs.
+	"""
+	old_doc = lead_doc.get_doc_before_save()
+	before = {field: old_doc.get(field) for field in LEAD_SIDE_EFFECT_FIELDS} if old_doc else {}
+	lead_name = lead_doc.name
+	frappe.db.after_commit.add(lambda: _enqueue_lead_side_effects(lead_name, before))
+
+
+def _enqueue_lead_side_effects(lead_name, before):
+	pending = {"since": frappe.utils.now(), "before": before}
+	if frappe.cache().set(get_lead_side_effects_key(lead_name), frappe.as_json(pending), ex=LEAD_SIDE_EFFECTS_TTL, nx=True):
+		_enqueue_lead_side_effects_job(lead_name, pending)
+
+
+def _enqueue_lead_side_effects_job(lead_name, pending, attempt=1):
+	frappe.enqueue(
+		"frappe_hfhg.frappe_hfhg.doctype.lead.lead.apply_lead_side_effects",
+		queue="short",
+		lead_name=lead_name,
+		pending=pending,
+		attempt=attempt,
+	)
+
+
+def get_lead_side_effects_key(lead_name):
+	return frappe.cache().make_key(f"{LEAD_SIDE_EFFECTS_KEY}:{lead_name}")
+
+
+def pop_lead_side_effects_pending(lead_name):
+	"""Take the pending marker of `lead_name` ({since, before}), so a save from now on queues a new job."""
+	pipeline = frappe.cache().pipeline()
+	pipeline.get(get_lead_side_effects_key(lead_name))
+	pipeline.delete(get_lead_side_effects_key(lead_name))
+	value, _ = pipeline.execute()
+	return json.loads(value) if value else None
+
+
+def restore_lead_side_effects_pending(lead_name, pending, attempt):
+	"""Put back the marker of a failed job and queue its retry.
+
+	The marker predates any save since the job took it, so it replaces a newer
+	pending marker, whose job (already queued) then does the failed one's work.
+	"""
+	pipeline = frappe.cache().pipeline()
+	pipeline.getset(get_lead_side_effects_key(lead_name), frappe.as_json(pending))
+	pipeline.expire(get_lead_side_effects_key(lead_name), LEAD_SIDE_EFFECTS_TTL)
+	newer, _ = pipeline.execute()
+	if newer is None:
+		_enqueue_lead_side_effects_job(lead_name, pending, attempt)
+
+
+def apply_lead_side_effects(lead_name, pending=None, attempt=1):
+	"""Assignments, shares and linked Costing / Surgery / Consultation updates that follow a Lead save.
+
+	Runs as a background job, see `queue_lead_side_effects`. `pending` is the
+	marker the job was queued with: it still holds the "before" values when the
+	marker expired before the job ran, the older of the two is used. A failed
+	run is queued again from the same values.
+	"""
+	candidates = [marker for marker in (pop_lead_side_effects_pending(lead_name), pending) if marker]
+	pending = min(candidates, key=lambda marker: marker["since"]) if candidates else {"since": frappe.utils.now(), "before": {}}
+	try:
+		propagate_lead_changes(lead_name, frappe._dict(pending["before"]))
+	except Exception:
+		if attempt < LEAD_SIDE_EFFECTS_ATTEMPTS:
+			restore_lead_side_effects_pending(lead_name, pending, attempt + 1)
+		raise
+
+
+def propagate_lead_changes(lead_name, before):
+	if not frappe.db.exists("Lead", lead_name):
+		return
+	lead = frappe.get_doc("Lead", lead_name)
+	executive_changed = bool(before) and before.executive != lead.executive
+
+	# The receptionist and clinic manager of the center the lead left lose it
+	release = {}
+	if before.center and before.center != lead.center:
+		old_center = frappe.db.get_value("Center", before.center, ["receptionist", "clinic_manager"], as_dict=True) or frappe._dict()
+		old_receptionist_email = frappe.db.get_value("Receptionist", old_center.receptionist, "email") if old_center.receptionist else None
+		release[lead.name] = [user for user in (old_receptionist_email, old_center.clinic_manager) if user]
+
+	reconcile_assignments(
+		"Lead",
+		[lead.name],
+		reset=[lead.name] if executive_changed and lead.executive else (),
+		release=release,
+		reset_on_new_executive=True,
+	)
+
+	if lead.executive:
+		# Sync executive change to duplicate leads (if this is an original lead)
+		if executive_changed and lead.status != "Duplicate Lead":
+			sync_executive_to_duplicates(lead.name)
+
+		# Sync executive change from duplicate lead to original lead
+		if executive_changed and lead.status == "Duplicate Lead":
+			sync_executive_to_original_lead(lead)
+
+		for doctype in ("Costing", "Surgery"):
+			linked_name = frappe.db.exists(doctype, {"patient": lead.name})
+			if not linked_name:
+				continue
+			linked = frappe.get_doc(doctype, linked_name)
+			if linked.executive != lead.executive or linked.assign_by != lead.assign_by or linked.previous_executive != lead.previous_executive or str(linked.executive_changed_date) != str(lead.executive_changed_date):
+				linked.executive = lead.executive
+				linked.assign_by = lead.assign_by
+				if lead.previous_executive:
+					linked.previous_executive = lead.previous_executive
+					linked.executive_changed_date = lead.executive_changed_date
+				linked.save(ignore_permissions=True)
+
+	if before.executive and executive_changed and lead.executive:
+		share_consultations_with_executive(lead)
+
+
+def share_consultations_with_executive(lead):
+	"""Hand the consultations of `lead` and their attachments to its new executive.
+
+	Consultations already past booking stay read-only for the new executive and keep their executive.
+	"""
+	executive_email = frappe.db.get_value("Executive", lead.executive, "email")
+	if not executive_email:
+		return
+
+	restricted_statuses = ["Booked", "Spot Booking", "Non Booked", "Medi-PRP"]
+	consultations = frappe.get_all("Consultation", filters={"patient": lead.name}, fields=["name", "status"])
+	if not consultations:
+		return
+
+	apply_assignment_changes(
+		"Consultation",
+		assign={(consultation.name, executive_email) for consultation in consultations},
+		share={
+			(consultation.name, executive_email): READ_ACCESS if consultation.status in restricted_statuses else FULL_ACCESS
+			for consultation in consultations
+		},
+		notify=True,
+	)
+
+	open_consultations = [consultation.name for consultation in consultations if consultation.status not in restricted_statuses]
+	if open_consultations:
+		frappe.db.set_value("Consultation", {"name": ["in", open_consultations]}, {
+			"previous_executive": lead.previous_executive,
+			"executive": lead.executive
+		})
+
+	attachments = frappe.get_all("File", filters={
+		"attached_to_doctype": "Consultation",
+		"attached_to_name": ["in", [consultation.name for consultation in consultations]]
+	}, pluck="name")
+	apply_assignment_changes("File", share={(attachment, executive_email): READ_ACCESS for attachment in attachments})
+
+
 def log_executive_change(lead_doc):
     frappe.get_doc({
         'doctype': 'Lead Executive Change Log',
@@ -887,31 +873,43 @@ def get_dashboard_stats(lead):
 def get_original_lead_name(contact_number, alternative_number=None, frontend_call=False):
 	if not contact_number:
 		return None
-	leads_1 = frappe.get_all("Lead", fields=["name", "status", "creation"], filters={"contact_number": contact_number}, ignore_permissions=True)
-	leads_2 = frappe.get_all("Lead", fields=["name", "status", "creation"], filters={"alternative_number": contact_number}, ignore_permissions=True)
-	leads = leads_1 + leads_2 
-	if alternative_number:
-		leads_3 = frappe.get_all("Lead", fields=["name", "status", "creation"], filters={"alternative_number": alternative_number}, ignore_permissions=True)
-		leads_4 = frappe.get_all("Lead", fields=["name", "status", "creation"], filters={"contact_number": alternative_number}, ignore_permissions=True)
-		leads = leads + leads_3 + leads_4
-	new_leads = []
-	for lead in leads:
-		if lead["status"] != "Duplicate Lead":
-			new_leads.append(lead)
-	if len(new_leads) == 1:
-		return new_leads[0]["name"]
-	elif len(new_leads) > 1:
-		new_leads.sort(key=lambda lead: lead["creation"])
-		return new_leads[0]["name"]
+	keys = tuple({key for key in (get_phone_key(contact_number), get_phone_key(alternative_number)) if key})
+	if not keys:
+		return None
+
+	leads = get_leads_by_phone_keys(keys, "status != 'Duplicate Lead'", limit=1)
+	if leads:
+		return leads[0].name
 	
 	if frontend_call:
-		for lead in leads:
-			if lead.status == "Duplicate Lead":
-				lead_doc = frappe.get_doc("Lead", lead.name)
-				lead_doc.status = "New Lead"
-				lead_doc.save(ignore_permissions=True)
+		for lead in get_leads_by_phone_keys(keys, "status = 'Duplicate Lead'"):
+			lead_doc = frappe.get_doc("Lead", lead.name)
+			lead_doc.status = "New Lead"
+			lead_doc.save(ignore_permissions=True)
 	return None
 
+
+def get_leads_by_phone_keys(keys, condition="1=1", limit=None):
+	"""Leads whose contact or alternative number key is in `keys`, oldest first.
+
+	Each side of the UNION is served by the index on its key column.
+	"""
+	return frappe.db.sql(
+		f"""
+		SELECT name, status, creation FROM (
+			SELECT name, status, creation FROM `tabLead`
+			WHERE contact_number_key IN %(keys)s AND {condition}
+			UNION
+			SELECT name, status, creation FROM `tabLead`
+			WHERE alternative_number_key IN %(keys)s AND {condition}
+		) leads
+		ORDER BY creation ASC, name ASC
+		{f"LIMIT {int(limit)}" if limit else ""}
+		""",
+		{"keys": keys},
+		as_dict=True,
+	)
+
 @frappe.whitelist()
 def get_source_list():
 	"""Return all Source records without limit for the source field dropdown"""
@@ -946,7 +944,7 @@ def get_dynamic_source_fields():
 def sync_executive_to_duplicates(lead_name):
 	"""
 	Sync executive changes from original lead to all duplicate leads.
-	Can be called from Lead.on_update() or manually.
+	Called from the Lead side-effects job (apply_lead_side_effects) or manually.
 	
 	Args:
 		lead_name: Name of the original lead
@@ -985,50 +983,27 @@ def sync_executive_to_duplicates(lead_name):
 			return 0
 		
 		# Update executive for each duplicate lead
-		updated_count = 0
-		executive = frappe.get_doc('Executive', lead.executive)
-		
-		for duplicate in duplicate_leads:
-			if duplicate.executive != lead.executive:
-				# Update executive field
-				frappe.db.set_value(
-					"Lead", 
-					duplicate.name, 
-					{
-						"executive": lead.executive,
-						"assign_by": lead.assign_by
-					},
-					update_modified=True
-				)
-				
-				# Update assignments and permissions (like original lead)
-				try:
-					# Clear old assignments
-					assign_to.clear('Lead', duplicate.name)
-					
-					# Clear old permissions
-					frappe.db.delete("DocShare", {
-						"share_doctype": 'Lead',
-						"share_name": duplicate.name
-					})
-					
-					# Add new assignment to executive
-					assign_to.add({
-						"assign_to": [executive.email],
-						"doctype": 'Lead',
-						"name": duplicate.name
-					}, ignore_permissions=True)
-					
-					# Set permissions for executive
-					set_permission('Lead', duplicate.name, executive.email, 'write')
-					set_permission('Lead', duplicate.name, executive.email, 'share')
-					
-					frappe.logger().info(f"Synced executive and permissions to duplicate lead: {duplicate.name}")
-				except Exception as perm_error:
-					frappe.logger().error(f"Error setting permissions for {duplicate.name}: {str(perm_error)}")
-				
-				updated_count += 1
-		
+		updated = [duplicate.name for duplicate in duplicate_leads if duplicate.executive != lead.executive]
+		updated_count = len(updated)
+
+		if updated:
+			frappe.db.set_value(
+				"Lead",
+				{"name": ["in", updated]},
+				{
+					"executive": lead.executive,
+					"assign_by": lead.assign_by
+				},
+				update_modified=True
+			)
+
+			# Update assignments and permissions (like original lead)
+			try:
+				reconcile_assignments("Lead", updated, reset=updated)
+				frappe.logger().info(f"Synced executive and permissions to duplicate leads: {', '.join(updated)}")
+			except Exception as perm_error:
+				frappe.logger().error(f"Error setting permissions for duplicate leads of {lead_name}: {str(perm_error)}")
+
 		if updated_count > 0:
 			frappe.db.commit()
 			frappe.msgprint(
@@ -1,9 +1,178 @@
 # Copyright (c) 2024, redsoft and Contributors
 # See license.txt
 
-# import frappe
+from unittest.mock import patch
+
+import frappe
 from frappe.tests.utils import FrappeTestCase
+from frappe.utils import today
+
+from frappe_hfhg.frappe_hfhg.doctype.lead.lead import (
+	_enqueue_lead_side_effects,
+	apply_lead_side_effects,
+	get_lead_side_effects_key,
+	get_phone_key,
+)
+from frappe_hfhg.lead_load import build_lead_load, get_lead_load, pick_executive, reconcile_lead_load
+from frappe_hfhg.name_allocator import allocate_name, get_highest_suffix, get_name_counter_key
+from frappe_hfhg.tests.utils import insert_rows
 
 
 class TestLead(FrappeTestCase):
-	pass
+	def test_name_allocator_continues_after_highest_suffix(self):
+		"""Only numeric suffixes count, and every allocation gets a new number."""
+		base = "_Test Allocator Lead"
+		for name in (base, f"{base} - 2", f"{base} - 7", f"{base} - x", f"{base} - 3 Kumar"):
+			insert_lead(name)
+		frappe.cache().delete(get_name_counter_key("Lead", base))
+
+		self.assertEqual(get_highest_suffix("Lead", base, " - "), 7)
+		self.assertEqual(allocate_name("Lead", base, " - "), 8)
+		with patch.object(frappe.db, "sql", wraps=frappe.db.sql) as sql:
+			self.assertEqual(allocate_name("Lead", base, " - "), 9)
+		# The counter exists: no suffix scan, only the exists check
+		self.assertEqual(sql.call_count, 1)
+
+	def test_name_allocator_keeps_free_base(self):
+		base = "_Test Allocator Unused Lead"
+		frappe.cache().delete(get_name_counter_key("Lead", base))
+
+		self.assertEqual(get_highest_suffix("Lead", base, " - "), 0)
+		self.assertEqual(allocate_name("Lead", base, " - "), 1)
+
+	def test_name_allocator_shares_counter_across_case(self):
+		"""Spellings the name column compares equal draw from one counter."""
+		base = "_Test Allocator Case Lead"
+		insert_lead(base)
+		insert_lead(f"{base} - 4")
+		frappe.cache().delete(get_name_counter_key("Lead", base))
+
+		self.assertEqual(allocate_name("Lead", base, " - "), 5)
+		self.assertEqual(allocate_name("Lead", base.lower(), " - "), 6)
+		self.assertEqual(allocate_name("Lead", base.upper(), " - "), 7)
+
+	def test_pick_executive_uses_counters(self):
+		"""Picks go to the least loaded executive, count right away, and read nothing from the database."""
+		campaign = "_Test Load Campaign"
+		for i in range(2):
+			insert_lead(f"_Test Load Lead {i}", executive="_Test Load Busy", campaign_name=campaign, created_on=today())
+		insert_lead("_Test Load Lead dup", executive="_Test Load Free", campaign_name=campaign, created_on=today(), status="Duplicate Lead")
+		reset_lead_load()
+
+		executives = ["_Test Load Busy", "_Test Load Free"]
+		with patch.object(frappe.db, "sql", wraps=frappe.db.sql) as sql:
+			picks = [pick_executive(frappe.get_doc({"doctype": "Lead", "campaign_name": campaign}), executives, "least_loaded_scoped") for _i in range(2)]
+		self.assertEqual(picks, ["_Test Load Free", "_Test Load Free"])
+		self.assertEqual(sql.call_count, 0)
+
+		# Four leads of the campaign today: the round-robin lands on index 4 % 2
+		self.assertEqual(pick_executive(frappe.get_doc({"doctype": "Lead", "campaign_name": campaign}), executives, "round_robin"), "_Test Load Busy")
+
+	def test_reconcile_keeps_recent_picks(self):
+		"""A pick whose lead is not in the table yet survives the hourly reconcile, older drift does not."""
+		executive = "_Test Load Recent Executive"
+		reset_lead_load()
+		pick_executive(frappe.get_doc({"doctype": "Lead"}), [executive])
+		self.assertEqual(get_lead_load(executive), 1)
+
+		reconcile_lead_load()
+		self.assertEqual(get_lead_load(executive), 1)
+
+		reconcile_lead_load(settle=0)
+		self.assertEqual(get_lead_load(executive), 0)
+
+	def test_duplicate_lead_is_not_counted(self):
+		"""A lead that turns into a Duplicate Lead on insert leaves the executive's count as it was."""
+		executive = "_Test Load Dup Executive"
+		number = "+91-9876501234"
+		insert_rows("Executive", [{"name": executive, "fullname": executive, "email": "_test_load_dup@example.com"}])
+		insert_rows("Contacts", [{"name": "_Test Load Dup Contact", "contact_number": number}])
+		insert_lead(
+			"_Test Load Original",
+			executive=executive,
+			contact="_Test Load Dup Contact",
+			contact_number=number,
+			contact_number_key=get_phone_key(number),
+			status="New Lead",
+			created_on=today(),
+		)
+		reset_lead_load()
+		self.assertEqual(get_lead_load(executive), 1)
+
+		duplicate = frappe.get_doc(
+			{"doctype": "Lead", "first_name": "_Test Load Duplicate", "contact_number": number, "city": "Pune"}
+		).insert(ignore_permissions=True)
+
+		self.assertEqual(duplicate.status, "Duplicate Lead")
+		self.assertEqual(duplicate.executive, executive)
+		self.assertEqual(get_lead_load(executive), 1)
+
+		reset_lead_load()
+		self.assertEqual(get_lead_load(executive), 1)
+
+	def test_side_effects_burst_runs_one_job_from_the_first_values(self):
+		"""Saves queued behind a pending job add no job; the job sees the executive change even if its marker expired."""
+		first, second = insert_side_effect_executives()
+		lead = insert_lead("_Test Side Effects Lead", executive=second)
+		key = get_lead_side_effects_key(lead)
+		frappe.cache().delete(key)
+		self.addCleanup(frappe.cache().delete, key)
+
+		with patch("frappe.enqueue") as enqueue:
+			_enqueue_lead_side_effects(lead, {"executive": first, "center": None})
+			_enqueue_lead_side_effects(lead, {"executive": second, "center": None})
+		self.assertEqual(enqueue.call_count, 1)
+		job = enqueue.call_args.kwargs
+		self.assertEqual(job["pending"]["before"]["executive"], first)
+
+		# The marker expired before the job ran
+		frappe.cache().delete(key)
+		with patch("frappe_hfhg.frappe_hfhg.doctype.lead.lead.share_consultations_with_executive") as share:
+			apply_lead_side_effects(lead, pending=job["pending"], attempt=job["attempt"])
+		self.assertEqual(share.call_count, 1)
+
+	def test_failed_side_effects_are_queued_again(self):
+		first, second = insert_side_effect_executives()
+		lead = insert_lead("_Test Side Effects Retry Lead", executive=second)
+		key = get_lead_side_effects_key(lead)
+		frappe.cache().delete(key)
+		self.addCleanup(frappe.cache().delete, key)
+
+		with patch("frappe.enqueue") as enqueue:
+			_enqueue_lead_side_effects(lead, {"executive": first, "center": None})
+		pending = enqueue.call_args.kwargs["pending"]
+
+		with (
+			patch("frappe_hfhg.frappe_hfhg.doctype.lead.lead.reconcile_assignments", side_effect=frappe.ValidationError),
+			patch("frappe.enqueue") as enqueue,
+		):
+			self.assertRaises(frappe.ValidationError, apply_lead_side_effects, lead, pending=pending)
+			self.assertEqual(enqueue.call_args.kwargs["pending"], pending)
+			self.assertEqual(enqueue.call_args.kwargs["attempt"], 2)
+			self.assertEqual(frappe.parse_json(frappe.cache().get(key)), pending)
+
+			# The last attempt gives up
+			enqueue.reset_mock()
+			self.assertRaises(frappe.ValidationError, apply_lead_side_effects, lead, pending=pending, attempt=3)
+			self.assertEqual(enqueue.call_count, 0)
+			self.assertIsNone(frappe.cache().get(key))
+
+
+def reset_lead_load():
+	"""Set today's counters to what the table holds."""
+	build_lead_load()
+	reconcile_lead_load(settle=0)
+
+
+def insert_side_effect_executives():
+	return insert_rows(
+		"Executive",
+		[
+			{"name": f"_Test Side Effects Executive {i}", "fullname": f"_Test Side Effects Executive {i}", "email": f"_test_side_effects_{i}@example.com"}
+			for i in range(2)
+		],
+	)
+
+
+def insert_lead(name, **fields):
+	return insert_rows("Lead", [{"name": name, **fields}])[0]
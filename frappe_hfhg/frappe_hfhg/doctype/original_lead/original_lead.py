@@ -0,0 +1,126 @@
+# Copyright (c) 2026, redsoft and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+# Lead fields that decide which lead is the original of a contact number
+ORIGINAL_LEAD_FIELDS = ("contact_number", "status", "created_on")
+
+
+class OriginalLead(Document):
+	pass
+
+
+def update_original_lead(lead_doc, method=None):
+	"""Lead after_insert / on_update / on_trash: refresh the mapping of the contact numbers
+	the lead had before the change and has now."""
+	old_doc = lead_doc.get_doc_before_save()
+	if (
+		method == "on_update"
+		and old_doc
+		and all(old_doc.get(field) == lead_doc.get(field) for field in ORIGINAL_LEAD_FIELDS)
+	):
+		return
+
+	contact_numbers = {lead_doc.contact_number}
+	if old_doc:
+		contact_numbers.add(old_doc.contact_number)
+
+	exclude = lead_doc.name if method == "on_trash" else None
+	for contact_number in contact_numbers:
+		if contact_number:
+			refresh_original_lead(contact_number, exclude=exclude, changed_lead=lead_doc.name)
+
+
+def refresh_original_lead(contact_number, exclude=None, changed_lead=None):
+	"""Point `contact_number` at its earliest non-duplicate Lead, or drop it when there is none.
+
+	Concurrent inserts of one number can not see each other's leads, so the
+	mapping is only ever moved to an earlier lead (by the order stored on it),
+	unless it points at `changed_lead`, the lead whose change is refreshed,
+	which may have stopped being the original.
+	"""
+	lead = frappe.db.sql(
+		"""
+		SELECT name, created_on, creation
+		FROM `tabLead`
+		WHERE contact_number = %(contact_number)s
+			AND status != 'Duplicate Lead'
+			AND name != %(exclude)s
+		ORDER BY created_on ASC, creation ASC, name ASC
+		LIMIT 1
+		""",
+		{"contact_number": contact_number, "exclude": exclude or ""},
+	)
+
+	if not lead:
+		filters = {"name": contact_number}
+		if changed_lead:
+			filters["lead"] = changed_lead
+		frappe.db.delete("Original Lead", filters)
+		return
+
+	lead, created_on, creation = lead[0]
+	params = {
+		"contact_number": contact_number,
+		"lead": lead,
+		"created_on": created_on,
+		"creation": creation,
+		"changed_lead": changed_lead or "",
+		"now": frappe.utils.now(),
+		"user": frappe.session.user,
+	}
+	# Waits for a concurrent insert of the same number to commit, then the UPDATE sees its row
+	frappe.db.sql(
+		"""
+		INSERT IGNORE INTO `tabOriginal Lead`
+			(name, contact_number, lead, lead_created_on, lead_creation, creation, modified, owner, modified_by)
+		VALUES
+			(%(contact_number)s, %(contact_number)s, %(lead)s, %(created_on)s, %(creation)s, %(now)s, %(now)s, %(user)s, %(user)s)
+		""",
+		params,
+	)
+	frappe.db.sql(
+		"""
+		UPDATE `tabOriginal Lead`
+		SET lead = %(lead)s, lead_created_on = %(created_on)s, lead_creation = %(creation)s,
+			modified = %(now)s, modified_by = %(user)s
+		WHERE name = %(contact_number)s
+			AND lead != %(lead)s
+			AND (
+				lead = %(changed_lead)s
+				OR (IFNULL(%(created_on)s, '0001-01-01'), IFNULL(%(creation)s, '0001-01-01'), %(lead)s)
+					< (IFNULL(lead_created_on, '0001-01-01'), IFNULL(lead_creation, '0001-01-01'), lead)
+			)
+		""",
+		params,
+	)
+
+
+def rebuild_original_leads():
+	"""Recompute the whole mapping from Lead (`bench --site <site> rebuild-original-leads`)."""
+	now = frappe.utils.now()
+	frappe.db.sql("DELETE FROM `tabOriginal Lead`")
+	frappe.db.sql(
+		"""
+		INSERT INTO `tabOriginal Lead`
+			(name, contact_number, lead, lead_created_on, lead_creation, creation, modified, owner, modified_by)
+		SELECT contact_number, contact_number, name, created_on, creation, %(now)s, %(now)s, 'Administrator', 'Administrator'
+		FROM (
+			SELECT
+				name,
+				contact_number,
+				created_on,
+				creation,
+				ROW_NUMBER() OVER (
+					PARTITION BY contact_number ORDER BY created_on ASC, creation ASC, name ASC
+				) AS rn
+			FROM `tabLead`
+			WHERE status != 'Duplicate Lead' AND IFNULL(contact_number, '') != ''
+		) ranked
+		WHERE rn = 1
+		""",
+		{"now": now},
+	)
+	frappe.db.commit()
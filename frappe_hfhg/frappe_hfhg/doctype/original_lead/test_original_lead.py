@@ -0,0 +1,57 @@
+# Copyright (c) 2026, redsoft and Contributors
+# See license.txt
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+from frappe.utils import add_to_date, now_datetime, today
+
+from frappe_hfhg.frappe_hfhg.doctype.original_lead.original_lead import refresh_original_lead
+from frappe_hfhg.tests.utils import insert_rows
+
+NUMBER = "+91-9876502345"
+OTHER_NUMBER = "+91-9876503456"
+
+
+class TestOriginalLead(FrappeTestCase):
+	def test_mapping_follows_the_earliest_lead(self):
+		first = frappe.get_doc(
+			{"doctype": "Lead", "first_name": "_Test Original First", "contact_number": NUMBER, "city": "Pune"}
+		).insert(ignore_permissions=True)
+		self.assertEqual(get_original_lead(NUMBER), first.name)
+
+		# A later lead, as a concurrent insert that did not see the first one would refresh it
+		later = insert_rows(
+			"Lead",
+			[
+				{
+					"contact_number": NUMBER, "status": "New Lead", "created_on": today(),
+					"creation": add_to_date(now_datetime(), minutes=5),
+				}
+			],
+		)[0]
+		refresh_original_lead(NUMBER, changed_lead=later)
+		self.assertEqual(get_original_lead(NUMBER), first.name)
+
+		# Status change
+		first.status = "Duplicate Lead"
+		first.save(ignore_permissions=True)
+		self.assertEqual(get_original_lead(NUMBER), later)
+
+		first.status = "New Lead"
+		first.save(ignore_permissions=True)
+		self.assertEqual(get_original_lead(NUMBER), first.name)
+
+		# Number change
+		first.contact_number = OTHER_NUMBER
+		first.save(ignore_permissions=True)
+		self.assertEqual(get_original_lead(NUMBER), later)
+		self.assertEqual(get_original_lead(OTHER_NUMBER), first.name)
+
+		# Trash
+		frappe.delete_doc("Lead", first.name, force=True, ignore_permissions=True)
+		self.assertIsNone(get_original_lead(OTHER_NUMBER))
+		self.assertEqual(get_original_lead(NUMBER), later)
+
+
+def get_original_lead(contact_number):
+	return frappe.db.get_value("Original Lead", contact_number, "lead")
@@ -194,6 +194,7 @@ class Payment(Document):
 					surgery.status = "Paid"
 					surgery.surgery_transaction_date = self.transaction_date
 				surgery.save(ignore_permissions=True)
+				update_latest_payment_confirmation(self.patient)
 
 	def on_trash(self):
 		if self.type == "Payment":
@@ -245,7 +246,61 @@ class Payment(Document):
 					surgery.status = "Partially Paid"
 				surgery.save(ignore_permissions=True)
 
+		if self.type == "Payment" and self.payment_type == "Surgery":
+			update_latest_payment_confirmation(self.patient, exclude=self.name)
+
 				
+def get_latest_payment_confirmation(surgery, exclude=None):
+	"""payment_confirmation of the newest Surgery payment of `surgery`, ignoring the payment `exclude`"""
+	result = frappe.db.sql(
+		"""
+		SELECT payment_confirmation
+		FROM `tabPayment`
+		WHERE patient = %(surgery)s
+			AND payment_type = 'Surgery'
+			AND type = 'Payment'
+			AND name != %(exclude)s
+		ORDER BY creation DESC
+		LIMIT 1
+		""",
+		{"surgery": surgery, "exclude": exclude or ""},
+	)
+	return result[0][0] if result else None
+
+
+def update_latest_payment_confirmation(surgery, exclude=None):
+	"""Keep Surgery.latest_payment_confirmation in step with its payments (read by the surgery reports)"""
+	if not surgery or not frappe.db.exists("Surgery", surgery):
+		return
+	frappe.db.set_value(
+		"Surgery",
+		surgery,
+		"latest_payment_confirmation",
+		get_latest_payment_confirmation(surgery, exclude=exclude),
+		update_modified=False,
+	)
+
+
+def rebuild_latest_payment_confirmations():
+	"""Backfill Surgery.latest_payment_confirmation for every surgery.
+
+	bench --site <site> execute frappe_hfhg.frappe_hfhg.doctype.payment.payment.rebuild_latest_payment_confirmations
+	"""
+	frappe.db.sql(
+		"""
+		UPDATE `tabSurgery` s
+		LEFT JOIN (
+			SELECT patient, payment_confirmation,
+				ROW_NUMBER() OVER (PARTITION BY patient ORDER BY creation DESC) AS rn
+			FROM `tabPayment`
+			WHERE payment_type = 'Surgery' AND type = 'Payment'
+		) p ON p.patient = s.name AND p.rn = 1
+		SET s.latest_payment_confirmation = p.payment_confirmation
+		"""
+	)
+	frappe.db.commit()
+
+
 @frappe.whitelist()
 def get_payment_amount(patient, payment_type):
 	if payment_type == "Treatment":
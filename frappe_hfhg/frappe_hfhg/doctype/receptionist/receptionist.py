@@ -4,6 +4,7 @@
 import frappe
 from frappe.model.document import Document
 from frappe import _
+from frappe_hfhg.user_scope import clear_user_scope_for_doc
 
 class Receptionist(Document):
 	def after_insert(self):
@@ -50,4 +51,10 @@ class Receptionist(Document):
 				),
 				title=_("Note"),
 				indicator="yellow",
-			)
\ No newline at end of file
+			)
+
+	def on_update(self):
+		clear_user_scope_for_doc(self, "email")
+
+	def on_trash(self):
+		clear_user_scope_for_doc(self, "email")
@@ -2,13 +2,14 @@
 # For license information, please see license.txt
 
 import frappe
-from frappe.desk.form import assign_to
 from frappe.model.document import Document
 from frappe import _
 from datetime import datetime, timedelta
 from frappe.utils import getdate, today
 
-from frappe.share import set_permission
+from frappe_hfhg.assignment import reconcile_assignments
+from frappe_hfhg.name_allocator import allocate_name, format_name
+from frappe_hfhg.frappe_hfhg.doctype.payment.payment import get_latest_payment_confirmation
 
 def add_days_to_date(given_date_str, n):
 	if type(given_date_str) == str:
@@ -19,13 +20,9 @@ def add_days_to_date(given_date_str, n):
 	return new_date.strftime("%Y-%m-%d")
 class Surgery(Document):
 	def autoname(self):
-		available = frappe.get_all(
-			"Surgery",
-			filters={"patient": self.patient},
-		)
-		if len(available) != 0:
-			new_name = self.patient + " (Session - " + str(len(available) + 1) + ")"
-			self.name = new_name.strip()
+		number = allocate_name("Surgery", self.patient, " (Session - ", ")")
+		if number > 1:
+			self.name = format_name(self.patient, number, " (Session - ", ")").strip()
 	
 	def before_save(self):
 		if self.get_doc_before_save() and self.get_doc_before_save().surgery_date and str(self.get_doc_before_save().surgery_date) != str(self.surgery_date):
@@ -86,89 +83,7 @@ class Surgery(Document):
 								"date": add_days_to_date(self.surgery_date, int(followup_settings.followup_intervals[len(all_followups)+i].days)),
 							}
 						).insert(ignore_permissions=True)
-		if self.executive:
-			executive = frappe.get_doc('Executive', self.executive)
-			assignes = assign_to.get({
-				"doctype": 'Surgery',
-				"name": self.name
-			})
-
-			assignes_list = [x.owner for x in assignes]
-
-			if executive.email not in assignes_list:
-				assign_to.clear('Surgery',self.name)
-				frappe.db.delete("DocShare", {
-					"share_doctype": 'Surgery',
-					"share_name": self.name
-				})
-				assign_to.add({
-					"assign_to": [executive.email],
-					"doctype": 'Surgery',
-					"name": self.name
-				}, ignore_permissions=True)
-				set_permission('Surgery', self.name, executive.email, 'write')
-				set_permission('Surgery', self.name, executive.email, 'share')
-
-				frappe.db.commit()
-			assignes = assign_to.get({
-					"doctype": 'Surgery',
-					"name": self.name
-				})
-			assignes_list = [x.owner for x in assignes]
-			# if self.previous_executive:
-			# 	previous_executive = frappe.get_doc('Executive', self.previous_executive)
-			# 	if previous_executive.email not in assignes_list:
-			# 		assign_to.add({
-			# 			"assign_to": [previous_executive.email],
-			# 			"doctype": 'Surgery',
-			# 			"name": self.name
-			# 		}, ignore_permissions=True)
-		if self.center:
-			assignes = assign_to.get({
-				"doctype": 'Surgery',
-				"name": self.name
-			})
-			assignes_list = [x.owner for x in assignes]
-
-			center = frappe.get_doc('Center', self.center)
-			receptionist = frappe.get_doc('Receptionist', center.receptionist)
-			if receptionist.email not in assignes_list:
-				assign_to.add({
-					"assign_to": [receptionist.email],
-					"doctype": 'Surgery',
-					"name": self.name
-				}, ignore_permissions=True)
-				set_permission('Surgery', self.name, receptionist.email, 'write')
-				set_permission('Surgery', self.name, receptionist.email, 'share')
-			if center.clinic_manager and center.clinic_manager not in assignes_list:
-				assign_to.add({
-					"assign_to": [center.clinic_manager],
-					"doctype": 'Surgery',
-					"name": self.name
-				}, ignore_permissions=True)
-				set_permission('Surgery', self.name, center.clinic_manager, 'write')
-				set_permission('Surgery', self.name, center.clinic_manager, 'share')
-
-			frappe.db.commit()
-
-		if self.doctor:
-			assignes = assign_to.get({
-				"doctype": 'Surgery',
-				"name": self.name
-			})
-			assignes_list = [x.owner for x in assignes]
-
-			doctor = frappe.get_doc('Doctor', self.doctor)
-			if doctor.email not in assignes_list:
-				assign_to.add({
-					"assign_to": [doctor.email],
-					"doctype": 'Surgery',
-					"name": self.name
-				}, ignore_permissions=True)
-				set_permission('Surgery', self.name, doctor.email, 'write')
-				set_permission('Surgery', self.name, doctor.email, 'share')
-
-			frappe.db.commit()
+		reconcile_assignments("Surgery", [self.name], reset_on_new_executive=True)
 
 		if self.status == "Paid":
 			costing = frappe.get_doc("Costing", self.patient)
@@ -194,6 +109,10 @@ class Surgery(Document):
 
 
 	def validate(self):
+		if not self.is_new():
+			# Re-read so a save from a stale form can not overwrite it
+			self.latest_payment_confirmation = get_latest_payment_confirmation(self.name)
+
 		if self.surgery_status != "Cancelled":
 			if len(self.grafts_surgeries) == 0:
 				self.pending_grafts = self.grafts
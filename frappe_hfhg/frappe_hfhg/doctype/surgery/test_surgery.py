@@ -1,9 +1,87 @@
 # Copyright (c) 2024, redsoft and Contributors
 # See license.txt
 
-# import frappe
+from unittest.mock import patch
+
+import frappe
 from frappe.tests.utils import FrappeTestCase
+from frappe.utils import flt
+
+from frappe_hfhg.api import build_surgery_data
+from frappe_hfhg.api.calendar import (
+	_begin_income_write,
+	_finish_income_write,
+	_income_keys,
+	get_income_till_date,
+)
+from frappe_hfhg.tests.utils import count_queries, insert_rows
 
 
 class TestSurgery(FrappeTestCase):
-	pass
+	def test_surgery_data_query_count_is_constant(self):
+		"""get_surgery_data must not run one Graft Entry query per surgery."""
+		small_month = insert_surgeries("2099-01-10", 2)
+		large_month = insert_surgeries("2099-02-10", 25)
+
+		# Warm up meta and the income counter so only the feed's own queries are counted
+		build_surgery_data(2099, 1)
+
+		small = count_queries(lambda: build_surgery_data(2099, 1))
+		large = count_queries(lambda: build_surgery_data(2099, 2))
+
+		self.assertEqual(small, large)
+		self.assertEqual(len(build_surgery_data(2099, 1)["data"]), 2 * len(small_month))
+		self.assertEqual(len(build_surgery_data(2099, 2)["data"]), 2 * len(large_month))
+
+	def test_income_rebuild_racing_a_write_is_not_stored(self):
+		"""A rebuilt income total is only stored when no Paid write overlapped its SUM."""
+		key = _income_keys("Surgery")[0]
+		frappe.cache().delete(key)
+		self.addCleanup(frappe.cache().delete, key)
+
+		# A write in flight when the rebuild starts
+		_begin_income_write("Surgery")
+		get_income_till_date("Surgery")
+		self.assertIsNone(frappe.cache().get(key))
+		_finish_income_write("Surgery", 100)
+		# The delta does not create a counter holding only itself
+		self.assertIsNone(frappe.cache().get(key))
+
+		# A write starting while the rebuild sums the table
+		sql = frappe.db.sql
+
+		def sum_then_write(*args, **kwargs):
+			result = sql(*args, **kwargs)
+			_begin_income_write("Surgery")
+			return result
+
+		with patch.object(frappe.db, "sql", side_effect=sum_then_write):
+			get_income_till_date("Surgery")
+		self.assertIsNone(frappe.cache().get(key))
+		_finish_income_write("Surgery", 100)
+
+		value = get_income_till_date("Surgery")
+		self.assertEqual(flt(frappe.cache().get(key)), value)
+		_begin_income_write("Surgery")
+		_finish_income_write("Surgery", 100)
+		self.assertEqual(get_income_till_date("Surgery"), value + 100)
+
+
+def insert_surgeries(surgery_date, count):
+	"""Surgery rows with two Graft Entry rows each."""
+	names = insert_rows(
+		"Surgery",
+		[{"name": f"_Test Surgery {surgery_date} {i}", "surgery_date": surgery_date} for i in range(count)],
+	)
+	insert_rows(
+		"Graft Entry",
+		[
+			{
+				"parent": name, "parenttype": "Surgery", "parentfield": "grafts_surgeries",
+				"idx": idx, "date": surgery_date,
+			}
+			for name in names
+			for idx in (1, 2)
+		],
+	)
+	return names
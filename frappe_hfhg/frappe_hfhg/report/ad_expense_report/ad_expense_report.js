@@ -81,6 +81,12 @@ frappe.query_reports["Ad Expense Report"] = {
       label: __("Ad ID"),
       fieldtype: "Data",
     },
+    {
+      fieldname: "live_today",
+      label: __("Live Data For Today"),
+      fieldtype: "Check",
+      default: 1,
+    },
   ],
 };
 
@@ -93,6 +99,12 @@ const setupShowDetailHandler = function (report) {
     const campaign_name = decodeURIComponent($button.attr("data-campaign-name") || "");
     const ad_id = decodeURIComponent($button.attr("data-ad-id") || "");
 
+    const preloaded = (report.__lifetime_details || {})[lifetimeDetailsKey({ source, campaign_name, ad_id })];
+    if (preloaded) {
+      showLifetimeDetails(preloaded);
+      return;
+    }
+
     frappe.call({
       method:
         "frappe_hfhg.frappe_hfhg.report.ad_expense_report.ad_expense_report.get_row_lifetime_details",
@@ -100,27 +112,59 @@ const setupShowDetailHandler = function (report) {
       freeze: true,
       freeze_message: __("Fetching details..."),
       callback: function (r) {
-        const details = r.message || {};
-        const lifetimeExpense = details.lifetime_expense || 0;
-        const lifetimeRevenue = details.lifetime_revenue || 0;
-        frappe.msgprint({
-          title: __("Lifetime Details"),
-          message: `
-            <div>
-              <p><strong>${__("Leads Generated")}:</strong> ${details.leads_created_lifetime || 0}</p>
-              <p><strong>${__("Booking Count")}:</strong> ${details.costings_created_lifetime || 0}</p>
-              <p><strong>${__("Surgery Count")}:</strong> ${details.surgeries_created_lifetime || 0}</p>
-              <p><strong>${__("Lifetime Expense")}:</strong> ₹ ${frappe.format(lifetimeExpense, {fieldtype: 'Float', precision: 2})}</p>
-              <p><strong>${__("Lifetime Revenue")}:</strong> ₹ ${frappe.format(lifetimeRevenue, {fieldtype: 'Float', precision: 2})}</p>
-            </div>
-          `,
-          indicator: "blue",
-        });
+        showLifetimeDetails(r.message || {});
       },
     });
   });
 };
 
+const showLifetimeDetails = function (details) {
+  const lifetimeExpense = details.lifetime_expense || 0;
+  const lifetimeRevenue = details.lifetime_revenue || 0;
+  frappe.msgprint({
+    title: __("Lifetime Details"),
+    message: `
+      <div>
+        <p><strong>${__("Leads Generated")}:</strong> ${details.leads_created_lifetime || 0}</p>
+        <p><strong>${__("Booking Count")}:</strong> ${details.costings_created_lifetime || 0}</p>
+        <p><strong>${__("Surgery Count")}:</strong> ${details.surgeries_created_lifetime || 0}</p>
+        <p><strong>${__("Lifetime Expense")}:</strong> ₹ ${frappe.format(lifetimeExpense, {fieldtype: 'Float', precision: 2})}</p>
+        <p><strong>${__("Lifetime Revenue")}:</strong> ₹ ${frappe.format(lifetimeRevenue, {fieldtype: 'Float', precision: 2})}</p>
+      </div>
+    `,
+    indicator: "blue",
+  });
+};
+
+const lifetimeDetailsKey = function (row) {
+  return [row.source || "", row.campaign_name || "", row.ad_id || ""].join("\u0000");
+};
+
+// Preload the lifetime details of the report rows in one request, so "Show Detail" opens instantly
+const preloadLifetimeDetails = function (report, data) {
+  report.__lifetime_details = {};
+  const rows = (data || [])
+    .filter((row) => row && !row.is_total_row && !row.__is_total_row)
+    .slice(0, 500)
+    .map((row) => ({ source: row.source, campaign_name: row.campaign_name, ad_id: row.ad_id }));
+  if (!rows.length) {
+    return;
+  }
+
+  frappe.call({
+    method:
+      "frappe_hfhg.frappe_hfhg.report.ad_expense_report.ad_expense_report.get_rows_lifetime_details",
+    args: { rows },
+    callback: function (r) {
+      const details = {};
+      (r.message || []).forEach(function (row_details, i) {
+        details[lifetimeDetailsKey(rows[i])] = row_details;
+      });
+      report.__lifetime_details = details;
+    },
+  });
+};
+
 const updateSummary = function (report) {
   frappe.call({
     method:
@@ -131,6 +175,7 @@ const updateSummary = function (report) {
     callback: function (r) {
       if (r.message && r.message[1]) {
         let data = r.message[1];
+        preloadLifetimeDetails(report, data);
 
         // Calculate totals
         let totalExpense = 0;
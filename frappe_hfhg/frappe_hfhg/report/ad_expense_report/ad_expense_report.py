@@ -1,6 +1,12 @@
 import frappe
 from frappe import _
-from frappe_hfhg.frappe_hfhg.doctype.centre_assignment.centre_assignment import apply_marketing_head_center_filter
+from frappe.utils import add_days, cint, getdate, today
+from frappe_hfhg.ad_key import get_ad_key
+from frappe_hfhg.frappe_hfhg.doctype.ad_attribution_daily.ad_attribution_daily import build_ad_attribution_rows
+from frappe_hfhg.frappe_hfhg.doctype.centre_assignment.centre_assignment import (
+    apply_marketing_head_center_filter,
+    get_assigned_centres_for_user,
+)
 
 Filters = frappe._dict
 
@@ -46,120 +52,82 @@ def get_columns(filters: Filters) -> list[dict]:
     ]
 
 
+# Sources the report has expense rows for, by casefolded spelling
+EXPENSE_SOURCES = {"meta": "Meta", "google adword": "Google Adword"}
+
+# How a report row is matched for its lifetime details, per casefolded source
+LIFETIME_MATCHERS = {
+    # Meta: match by meta_ad_id only (ignore Lead.source)
+    "meta": {
+        "lead_key": "l.ad_key",
+        "expense_key": "ce.ad_key",
+    },
+    # Google Adword: match by campaign_name only (ignore Lead.source)
+    "google adword": {
+        "lead_key": "LOWER(TRIM(COALESCE(l.campaign_name, '')))",
+        "expense_key": "LOWER(TRIM(COALESCE(ce.campaign, '')))",
+    },
+}
+MAX_LIFETIME_ROWS = 500
+
+
 @frappe.whitelist()
 def get_row_lifetime_details(source: str | None = None, campaign_name: str | None = None, ad_id: str | None = None) -> dict:
-    normalized_source = normalize_identifier(source)
-    normalized_campaign = normalize_identifier(campaign_name)
-    normalized_ad_id = normalize_identifier(ad_id)
-    source_key = normalized_source.casefold()
-
-    if source_key == "meta":
-        if not normalized_ad_id:
-            return {
-                "leads_created_lifetime": 0,
-                "costings_created_lifetime": 0,
-                "surgeries_created_lifetime": 0,
-                "lifetime_expense": 0.0,
-                "lifetime_revenue": 0.0,
-            }
-        # Meta: match by meta_ad_id only (ignore Lead.source)
-        where_clause = (
-            "REPLACE(LOWER(TRIM(COALESCE(l.meta_ad_id, ''))), '.0', '') = "
-            "REPLACE(LOWER(TRIM(%(match_value)s)), '.0', '')"
-        )
-        params: dict[str, object] = {"match_value": normalized_ad_id}
-        expense_query = """
-            SELECT COALESCE(SUM(
-                CASE
-                    WHEN ce.total_amount IS NOT NULL AND ce.total_amount != ''
-                    THEN CAST(ce.total_amount AS DECIMAL(18,2))
-                    ELSE 0
-                END
-            ), 0) AS total
-            FROM `tabCampaign Expense` ce
-            WHERE LOWER(TRIM(COALESCE(ce.source, ''))) = 'meta'
-              AND REPLACE(LOWER(TRIM(COALESCE(ce.ad_id, ''))), '.0', '') = REPLACE(LOWER(TRIM(%(match_value)s)), '.0', '')
-        """
-    elif source_key == "google adword":
-        if not normalized_campaign:
-            return {
-                "leads_created_lifetime": 0,
-                "costings_created_lifetime": 0,
-                "surgeries_created_lifetime": 0,
-                "lifetime_expense": 0.0,
-                "lifetime_revenue": 0.0,
-            }
-        # Google Adword: match by campaign_name only (ignore Lead.source)
-        where_clause = "LOWER(TRIM(COALESCE(l.campaign_name, ''))) = LOWER(TRIM(%(match_value)s))"
-        params = {"match_value": normalized_campaign}
-        expense_query = """
-            SELECT COALESCE(SUM(
-                CASE
-                    WHEN ce.total_amount IS NOT NULL AND ce.total_amount != ''
-                    THEN CAST(ce.total_amount AS DECIMAL(18,2))
-                    ELSE 0
-                END
-            ), 0) AS total
-            FROM `tabCampaign Expense` ce
-            WHERE LOWER(TRIM(COALESCE(ce.source, ''))) = 'google adword'
-              AND LOWER(TRIM(COALESCE(ce.campaign, ''))) = LOWER(TRIM(%(match_value)s))
-        """
-    else:
-        frappe.throw(_("Unsupported source for lifetime details"))
+    return get_rows_lifetime_details([{"source": source, "campaign_name": campaign_name, "ad_id": ad_id}])[0]
 
-    leads_query = f"""
-        SELECT COUNT(*) AS total
-        FROM `tabLead` l
-        WHERE {where_clause}
-    """
-    leads_created_lifetime = int((frappe.db.sql(leads_query, params, as_dict=True) or [{}])[0].get("total") or 0)
 
-    costings_query = f"""
-        SELECT COUNT(DISTINCT c.name) AS total
-        FROM `tabCosting` c
-        INNER JOIN `tabLead` l ON c.patient = l.name
-        WHERE {where_clause}
-    """
-    costings_created_lifetime = int((frappe.db.sql(costings_query, params, as_dict=True) or [{}])[0].get("total") or 0)
+@frappe.whitelist()
+def get_rows_lifetime_details(rows: list[dict] | str) -> list[dict]:
+    """Lifetime details of many report rows ({source, campaign_name, ad_id}), in the order given.
 
-    surgeries_query = f"""
-        SELECT COUNT(DISTINCT s.name) AS total
-        FROM `tabSurgery` s
-        INNER JOIN `tabCosting` c ON s.patient = c.name
-        INNER JOIN `tabLead` l ON c.patient = l.name
-        WHERE {where_clause}
-          AND IFNULL(s.pending_amount, 0) = 0
+    Every metric is one grouped query per source, however many rows are asked for.
     """
-    surgeries_created_lifetime = int((frappe.db.sql(surgeries_query, params, as_dict=True) or [{}])[0].get("total") or 0)
+    if isinstance(rows, str):
+        rows = frappe.parse_json(rows)
+    rows = rows or []
+    if len(rows) > MAX_LIFETIME_ROWS:
+        frappe.throw(_("Lifetime details can be fetched for at most {0} rows at a time").format(MAX_LIFETIME_ROWS))
+
+    row_keys: list[tuple[str, str | None]] = []
+    keys_by_source: dict[str, set[str]] = {}
+    for row in rows:
+        source_key = normalize_identifier(row.get("source")).casefold()
+        if source_key == "meta":
+            match_key = get_ad_key(normalize_identifier(row.get("ad_id")))
+        elif source_key == "google adword":
+            match_key = normalize_identifier(row.get("campaign_name")).lower() or None
+        else:
+            frappe.throw(_("Unsupported source for lifetime details"))
+        row_keys.append((source_key, match_key))
+        if match_key:
+            keys_by_source.setdefault(source_key, set()).add(match_key)
+
+    details = {
+        source_key: get_lifetime_metrics(source_key, keys)
+        for source_key, keys in keys_by_source.items()
+    }
+    return [
+        dict(details.get(source_key, {}).get(match_key) or get_empty_lifetime_details())
+        for source_key, match_key in row_keys
+    ]
 
-    lifetime_expense = cast_to_float((frappe.db.sql(expense_query, params, as_dict=True) or [{}])[0].get("total"))
 
-    lifetime_revenue_surgery_query = f"""
-        SELECT
-            COALESCE(SUM(
-                CASE
-                    WHEN p.total_amount_received IS NOT NULL AND p.total_amount_received != ''
-                    THEN CAST(p.total_amount_received AS DECIMAL(18,2))
-                    ELSE 0
-                END
-            ), 0) AS total
-        FROM `tabPayment` p
-        INNER JOIN `tabSurgery` s ON s.name = p.patient
-        INNER JOIN `tabCosting` c ON s.patient = c.name
-        INNER JOIN `tabLead` l ON c.patient = l.name
-        WHERE p.docstatus < 2
-          AND p.type = 'Payment'
-          AND p.payment_type = 'Surgery'
-          AND IFNULL(s.pending_amount, 0) = 0
-          AND IFNULL(l.status, '') != 'Duplicate Lead'
-          AND {where_clause}
-    """
-    surgery_revenue_total = cast_to_float(
-        (frappe.db.sql(lifetime_revenue_surgery_query, params, as_dict=True) or [{}])[0].get("total")
-    )
+def get_empty_lifetime_details() -> dict:
+    return {
+        "leads_created_lifetime": 0,
+        "costings_created_lifetime": 0,
+        "surgeries_created_lifetime": 0,
+        "lifetime_expense": 0.0,
+        "lifetime_revenue": 0.0,
+    }
 
-    distinct_costings_query = f"""
-        SELECT DISTINCT c.name AS costing_name
+
+def get_lifetime_metrics(source_key: str, keys: set[str]) -> dict[str, dict]:
+    """Lifetime leads, costings, surgeries, expense and revenue per match key of one source."""
+    lead_key = LIFETIME_MATCHERS[source_key]["lead_key"]
+    expense_key = LIFETIME_MATCHERS[source_key]["expense_key"]
+    params: dict[str, object] = {"keys": tuple(keys), "expense_source": source_key}
+    eligible_surgery_payments = f"""
         FROM `tabPayment` p
         INNER JOIN `tabSurgery` s ON s.name = p.patient
         INNER JOIN `tabCosting` c ON s.patient = c.name
@@ -169,78 +137,149 @@ def get_row_lifetime_details(source: str | None = None, campaign_name: str | Non
           AND p.payment_type = 'Surgery'
           AND IFNULL(s.pending_amount, 0) = 0
           AND IFNULL(l.status, '') != 'Duplicate Lead'
-          AND {where_clause}
+          AND {lead_key} IN %(keys)s
     """
-    costing_names = [
-        r[0]
-        for r in (frappe.db.sql(distinct_costings_query, params) or [])
-        if r and r[0]
-    ]
-    costing_revenue_total = 0.0
-    if costing_names:
-        costing_params = {"costing_names": tuple(costing_names)}
-        costing_revenue_total = cast_to_float(
-            (frappe.db.sql(
-                f"""
-                SELECT COALESCE(SUM({_sql_line_amount("pc")}), 0) AS total
-                FROM `tabPayment` pc
-                WHERE pc.docstatus < 2
-                  AND pc.type = 'Payment'
-                  AND pc.payment_type = 'Costing'
-                  AND pc.patient IN %(costing_names)s
-                """,
-                costing_params,
-                as_dict=True,
-            )
-            or [{}])[0].get("total")
-        )
+    queries = {
+        "leads_created_lifetime": f"""
+            SELECT {lead_key} AS match_key, COUNT(*) AS total
+            FROM `tabLead` l
+            WHERE {lead_key} IN %(keys)s
+            GROUP BY match_key
+        """,
+        "costings_created_lifetime": f"""
+            SELECT {lead_key} AS match_key, COUNT(DISTINCT c.name) AS total
+            FROM `tabCosting` c
+            INNER JOIN `tabLead` l ON c.patient = l.name
+            WHERE {lead_key} IN %(keys)s
+            GROUP BY match_key
+        """,
+        "surgeries_created_lifetime": f"""
+            SELECT {lead_key} AS match_key, COUNT(DISTINCT s.name) AS total
+            FROM `tabSurgery` s
+            INNER JOIN `tabCosting` c ON s.patient = c.name
+            INNER JOIN `tabLead` l ON c.patient = l.name
+            WHERE {lead_key} IN %(keys)s
+              AND IFNULL(s.pending_amount, 0) = 0
+            GROUP BY match_key
+        """,
+        "lifetime_expense": f"""
+            SELECT {expense_key} AS match_key, COALESCE(SUM(
+                CASE
+                    WHEN ce.total_amount IS NOT NULL AND ce.total_amount != ''
+                    THEN CAST(ce.total_amount AS DECIMAL(18,2))
+                    ELSE 0
+                END
+            ), 0) AS total
+            FROM `tabCampaign Expense` ce
+            WHERE LOWER(TRIM(COALESCE(ce.source, ''))) = %(expense_source)s
+              AND {expense_key} IN %(keys)s
+            GROUP BY match_key
+        """,
+        "surgery_revenue": f"""
+            SELECT
+                {lead_key} AS match_key,
+                COALESCE(SUM(
+                    CASE
+                        WHEN p.total_amount_received IS NOT NULL AND p.total_amount_received != ''
+                        THEN CAST(p.total_amount_received AS DECIMAL(18,2))
+                        ELSE 0
+                    END
+                ), 0) AS total
+            {eligible_surgery_payments}
+            GROUP BY match_key
+        """,
+        # All Costing payments of the distinct costings behind those surgery payments
+        "costing_revenue": f"""
+            SELECT e.match_key, COALESCE(SUM({_sql_line_amount("pc")}), 0) AS total
+            FROM (
+                SELECT DISTINCT {lead_key} AS match_key, c.name AS costing_name
+                {eligible_surgery_payments}
+            ) AS e
+            INNER JOIN `tabPayment` pc ON pc.patient = e.costing_name
+              AND pc.docstatus < 2
+              AND pc.type = 'Payment'
+              AND pc.payment_type = 'Costing'
+            GROUP BY e.match_key
+        """,
+    }
 
-    lifetime_revenue = surgery_revenue_total + costing_revenue_total
+    metrics: dict[str, dict] = {}
+    for metric, query in queries.items():
+        for row in frappe.db.sql(query, params, as_dict=True):
+            match_key = (row.get("match_key") or "").lower()
+            if match_key:
+                metrics.setdefault(match_key, {})[metric] = row.get("total")
+
+    details: dict[str, dict] = {}
+    for match_key, values in metrics.items():
+        details[match_key] = {
+            "leads_created_lifetime": int(values.get("leads_created_lifetime") or 0),
+            "costings_created_lifetime": int(values.get("costings_created_lifetime") or 0),
+            "surgeries_created_lifetime": int(values.get("surgeries_created_lifetime") or 0),
+            "lifetime_expense": cast_to_float(values.get("lifetime_expense")),
+            "lifetime_revenue": cast_to_float(values.get("surgery_revenue")) + cast_to_float(values.get("costing_revenue")),
+        }
+    return details
 
-    return {
-        "leads_created_lifetime": leads_created_lifetime,
-        "costings_created_lifetime": costings_created_lifetime,
-        "surgeries_created_lifetime": surgeries_created_lifetime,
-        "lifetime_expense": lifetime_expense,
-        "lifetime_revenue": lifetime_revenue,
-    }
 
 def get_data(filters: Filters) -> list[dict]:
-    base_rows = get_expense_base_rows(filters)
+    facts = get_attribution_facts(filters)
+
+    base_rows = get_expense_base_rows(facts, filters)
     if not base_rows:
         return []
 
-    meta_ad_ids = {row["ad_id"] for row in base_rows if row["source"] == "Meta" and row["ad_id"]}
-    google_campaigns = {row["campaign_name"] for row in base_rows if row["source"] == "Google Adword" and row["campaign_name"]}
-
-    meta_lead_counts = get_meta_lead_counts(meta_ad_ids, filters)
-    google_lead_counts = get_google_lead_counts(google_campaigns, filters)
-    meta_subsources = get_meta_subsources(meta_ad_ids, filters)
-
-    meta_revenue = _merge_revenue_dicts(
-        get_meta_surgery_revenue(meta_ad_ids, filters),
-        get_meta_surgery_revenue_costing_addon(meta_ad_ids, filters),
-    )
-    google_revenue = _merge_revenue_dicts(
-        get_google_surgery_revenue(google_campaigns, filters),
-        get_google_surgery_revenue_costing_addon(google_campaigns, filters),
-    )
+    centres = get_marketing_head_centres()
+    meta_lead_counts: dict[str, int] = {}
+    google_lead_counts: dict[str, int] = {}
+    meta_subsources: dict[str, set[str]] = {}
+    meta_revenue: dict[str, float] = {}
+    google_revenue: dict[str, float] = {}
+
+    # Keys are casefolded, as the SQL this replaced matched and grouped under a case-insensitive collation
+    for fact in facts:
+        ad_id = normalize_identifier(fact.ad_id).casefold()
+        campaign = normalize_identifier(fact.campaign).casefold()
+        is_google = normalize_identifier(fact.source).casefold() == "google adword"
+        # Lead counts and surgery revenue follow the Marketing Head(new) centres, costing add-on and subsources do not
+        in_scope = centres is None or (fact.center or "").strip().lower() in centres
+
+        if fact.leads and ad_id and fact.subsource:
+            meta_subsources.setdefault(ad_id, set()).add(normalize_identifier(fact.subsource))
+
+        if in_scope and fact.leads:
+            if ad_id:
+                meta_lead_counts[ad_id] = meta_lead_counts.get(ad_id, 0) + int(fact.leads)
+            if is_google and campaign:
+                google_lead_counts[campaign] = google_lead_counts.get(campaign, 0) + int(fact.leads)
+
+        revenue = cast_to_float(fact.costing_revenue)
+        if in_scope:
+            revenue += cast_to_float(fact.surgery_revenue)
+        if revenue:
+            if ad_id:
+                meta_revenue[ad_id] = meta_revenue.get(ad_id, 0.0) + revenue
+            if is_google and campaign:
+                google_revenue[campaign] = google_revenue.get(campaign, 0.0) + revenue
 
     rows: list[dict] = []
     for row in base_rows:
+        ad_key = row["ad_id"].casefold()
+        campaign_key = row["campaign_name"].casefold()
         if row["source"] == "Meta":
-            leads = int(meta_lead_counts.get(row["ad_id"], 0))
-            revenue = float(meta_revenue.get(row["ad_id"], 0.0))
+            leads = int(meta_lead_counts.get(ad_key, 0))
+            revenue = float(meta_revenue.get(ad_key, 0.0))
         else:
-            leads = int(google_lead_counts.get(row["campaign_name"], 0))
-            revenue = float(google_revenue.get(row["campaign_name"], 0.0))
+            leads = int(google_lead_counts.get(campaign_key, 0))
+            revenue = float(google_revenue.get(campaign_key, 0.0))
 
+        subsources = meta_subsources.get(ad_key, set()) if row["source"] == "Meta" else set()
         total_expense = float(row["total_expense"])
         rows.append(
             {
                 "campaign_name": row["campaign_name"],
                 "source": row["source"],
-                "subsource": meta_subsources.get(row["ad_id"], "") if row["source"] == "Meta" else "",
+                "subsource": (next(iter(subsources)) if len(subsources) == 1 else "Mixed") if subsources else "",
                 "ad_id": row["ad_id"] if row["source"] == "Meta" else "",
                 "total_expense": total_expense,
                 "leads_in_period": leads,
@@ -252,316 +291,77 @@ def get_data(filters: Filters) -> list[dict]:
     return sorted(rows, key=lambda d: (d.get("campaign_name") or "", d.get("source") or "", d.get("ad_id") or ""))
 
 
-def get_expense_base_rows(filters: Filters) -> list[dict]:
-    params = {
-        "from_date": filters.get("from_date"),
-        "to_date": filters.get("to_date"),
-    }
-    clauses = [
-        "ce.date BETWEEN %(from_date)s AND %(to_date)s",
-        "ce.source IN ('Meta', 'Google Adword')",
-        "ce.campaign IS NOT NULL",
-        "TRIM(ce.campaign) != ''",
-    ]
-    campaign_filter = normalize_identifier(filters.get("campaign_name"))
-    if campaign_filter:
-        params["campaign_name_filter"] = f"%{campaign_filter}%"
-        clauses.append("TRIM(ce.campaign) LIKE %(campaign_name_filter)s")
-    source_filter = normalize_identifier(filters.get("source"))
-    if source_filter:
-        params["source_filter"] = source_filter
-        clauses.append("ce.source = %(source_filter)s")
-    ad_id_filter = normalize_identifier(filters.get("ad_id"))
-    if ad_id_filter:
-        params["ad_id_filter"] = ad_id_filter
-        clauses.append(
-            "REPLACE(LOWER(TRIM(COALESCE(ce.ad_id, ''))), '.0', '') = "
-            "REPLACE(LOWER(TRIM(%(ad_id_filter)s)), '.0', '')"
-        )
-
-    where_clause = " AND ".join(clauses)
-    rows = frappe.db.sql(
-        f"""
-        SELECT
-            TRIM(ce.campaign) AS campaign_name,
-            TRIM(ce.source) AS source,
-            CASE
-                WHEN TRIM(ce.source) = 'Meta' THEN TRIM(COALESCE(ce.ad_id, ''))
-                ELSE ''
-            END AS ad_id,
-            COALESCE(SUM(
-                CASE
-                    WHEN ce.total_amount IS NOT NULL AND ce.total_amount != ''
-                    THEN CAST(ce.total_amount AS DECIMAL(18,2))
-                    ELSE 0
-                END
-            ), 0) AS total_expense
-        FROM `tabCampaign Expense` ce
-        WHERE {where_clause}
-        GROUP BY campaign_name, source, ad_id
-        ORDER BY campaign_name, source, ad_id
-        """,
-        params,
-        as_dict=True,
-    )
-    return [
-        {
-            "campaign_name": normalize_identifier(r.get("campaign_name")),
-            "source": normalize_identifier(r.get("source")),
-            "ad_id": normalize_identifier(r.get("ad_id")),
-            "total_expense": cast_to_float(r.get("total_expense")),
-        }
-        for r in rows
-    ]
-
-
-def get_meta_lead_counts(meta_ad_ids: set[str], filters: Filters) -> dict[str, int]:
-    ids = make_identifier_tuple(meta_ad_ids)
-    if not ids:
-        return {}
-    params: dict[str, object] = {
-        "from_date": filters.get("from_date"),
-        "to_date": filters.get("to_date"),
-        "ad_ids": ids,
-    }
-    query = """
-        SELECT
-            TRIM(l.meta_ad_id) AS ad_id,
-            COUNT(*) AS lead_count
-        FROM `tabLead` l
-        WHERE TRIM(l.meta_ad_id) IN %(ad_ids)s
-          AND COALESCE(l.created_on, DATE(l.creation)) BETWEEN %(from_date)s AND %(to_date)s
-        GROUP BY ad_id
-    """
-    query, params = apply_marketing_head_center_filter(query, params, center_field="center", table_alias="l")
-    rows = frappe.db.sql(query, params, as_dict=True)
-    return {normalize_identifier(r.get("ad_id")): int(r.get("lead_count") or 0) for r in rows}
-
-
-def get_google_lead_counts(campaigns: set[str], filters: Filters) -> dict[str, int]:
-    names = make_identifier_tuple(campaigns)
-    if not names:
-        return {}
-    params: dict[str, object] = {
-        "from_date": filters.get("from_date"),
-        "to_date": filters.get("to_date"),
-        "campaign_names": names,
-    }
-    query = """
-        SELECT
-            TRIM(l.campaign_name) AS campaign_name,
-            COUNT(*) AS lead_count
-        FROM `tabLead` l
-        WHERE l.source = 'Google Adword'
-          AND TRIM(l.campaign_name) IN %(campaign_names)s
-          AND COALESCE(l.created_on, DATE(l.creation)) BETWEEN %(from_date)s AND %(to_date)s
-        GROUP BY campaign_name
-    """
-    query, params = apply_marketing_head_center_filter(query, params, center_field="center", table_alias="l")
-    rows = frappe.db.sql(query, params, as_dict=True)
-    return {normalize_identifier(r.get("campaign_name")): int(r.get("lead_count") or 0) for r in rows}
-
-
-def get_meta_surgery_revenue(meta_ad_ids: set[str], filters: Filters) -> dict[str, float]:
-    """Surgery-type payments only (original report logic)."""
-    ids = make_identifier_tuple(meta_ad_ids)
-    if not ids:
-        return {}
-    params: dict[str, object] = {
-        "from_date": filters.get("from_date"),
-        "to_date": filters.get("to_date"),
-        "ad_ids": ids,
-    }
-    query = """
-        SELECT
-            TRIM(l.meta_ad_id) AS ad_id,
-            COALESCE(SUM(
-                CASE
-                    WHEN p.total_amount_received IS NOT NULL AND p.total_amount_received != ''
-                    THEN CAST(p.total_amount_received AS DECIMAL(18,2))
-                    ELSE 0
-                END
-            ), 0) AS revenue
-        FROM `tabPayment` p
-        INNER JOIN `tabSurgery` s ON s.name = p.patient
-        INNER JOIN `tabCosting` c ON s.patient = c.name
-        INNER JOIN `tabLead` l ON c.patient = l.name
-        WHERE p.docstatus < 2
-          AND p.type = 'Payment'
-          AND p.payment_type = 'Surgery'
-          AND IFNULL(s.pending_amount, 0) = 0
-          AND IFNULL(l.status, '') != 'Duplicate Lead'
-          AND TRIM(l.meta_ad_id) IN %(ad_ids)s
-          AND p.transaction_date BETWEEN %(from_date)s AND %(to_date)s
-        GROUP BY ad_id
-    """
-    query, params = apply_marketing_head_center_filter(query, params, center_field="center", table_alias="l")
-    rows = frappe.db.sql(query, params, as_dict=True)
-    return {normalize_identifier(r.get("ad_id")): cast_to_float(r.get("revenue")) for r in rows}
-
+def get_attribution_facts(filters: Filters) -> list:
+    """Ad Attribution Daily totals of the period per (source, campaign, ad, center, subsource).
 
-def get_meta_surgery_revenue_costing_addon(meta_ad_ids: set[str], filters: Filters) -> dict[str, float]:
-    """All Costing-type payments for distinct costings linked to eligible surgery payments (same eligibility as main Meta revenue)."""
-    ids = make_identifier_tuple(meta_ad_ids)
-    if not ids:
-        return {}
-    params: dict[str, object] = {
-        "from_date": filters.get("from_date"),
-        "to_date": filters.get("to_date"),
-        "ad_ids": ids,
-    }
-    distinct_inner = """
-        SELECT DISTINCT
-            TRIM(l.meta_ad_id) AS ad_id,
-            c.name AS costing_name
-        FROM `tabPayment` p
-        INNER JOIN `tabSurgery` s ON s.name = p.patient
-        INNER JOIN `tabCosting` c ON s.patient = c.name
-        INNER JOIN `tabLead` l ON c.patient = l.name
-        WHERE p.docstatus < 2
-          AND p.type = 'Payment'
-          AND p.payment_type = 'Surgery'
-          AND IFNULL(s.pending_amount, 0) = 0
-          AND IFNULL(l.status, '') != 'Duplicate Lead'
-          AND TRIM(l.meta_ad_id) IN %(ad_ids)s
-          AND p.transaction_date BETWEEN %(from_date)s AND %(to_date)s
-    """
-    part_b = f"""
-        SELECT e.ad_id, COALESCE(SUM({_sql_line_amount("pc")}), 0) AS revenue
-        FROM ({distinct_inner}) AS e
-        INNER JOIN `tabPayment` pc ON pc.patient = e.costing_name
-          AND pc.docstatus < 2
-          AND pc.type = 'Payment'
-          AND pc.payment_type = 'Costing'
-        GROUP BY e.ad_id
-    """
-    rows = frappe.db.sql(part_b, params, as_dict=True)
-    return {
-        normalize_identifier(r.get("ad_id")): cast_to_float(r.get("revenue"))
-        for r in rows
-        if normalize_identifier(r.get("ad_id"))
-    }
-
-
-def get_meta_subsources(meta_ad_ids: set[str], filters: Filters) -> dict[str, str]:
-    ids = make_identifier_tuple(meta_ad_ids)
-    if not ids:
-        return {}
-    params: dict[str, object] = {
-        "from_date": filters.get("from_date"),
-        "to_date": filters.get("to_date"),
-        "ad_ids": ids,
-    }
-    query = """
-        SELECT
-            TRIM(l.meta_ad_id) AS ad_id,
-            TRIM(COALESCE(l.subsource, '')) AS subsource
-        FROM `tabLead` l
-        WHERE TRIM(l.meta_ad_id) IN %(ad_ids)s
-          AND COALESCE(l.created_on, DATE(l.creation)) BETWEEN %(from_date)s AND %(to_date)s
+    With "Live Data For Today" the part of the period from today on is built live
+    from the source tables instead of read from the nightly / on-write facts.
     """
-    rows = frappe.db.sql(query, params, as_dict=True)
-
-    ad_to_subsources: dict[str, set[str]] = {}
-    for row in rows:
-        ad_id = normalize_identifier(row.get("ad_id"))
-        if not ad_id:
+    from_date = getdate(filters.get("from_date"))
+    to_date = getdate(filters.get("to_date"))
+    live_from = None
+    if cint(filters.get("live_today", 1)) and to_date >= getdate(today()):
+        live_from = max(from_date, getdate(today()))
+
+    facts = []
+    stored_to = add_days(live_from, -1) if live_from else to_date
+    if from_date <= stored_to:
+        facts.extend(
+            frappe.db.sql(
+                """
+                SELECT
+                    source, campaign, ad_id, center, subsource,
+                    SUM(expense_entries) AS expense_entries,
+                    SUM(expense) AS expense,
+                    SUM(leads) AS leads,
+                    SUM(surgery_revenue) AS surgery_revenue,
+                    SUM(costing_revenue) AS costing_revenue
+                FROM `tabAd Attribution Daily`
+                WHERE date BETWEEN %(from_date)s AND %(to_date)s
+                GROUP BY source, campaign, ad_id, center, subsource
+                """,
+                {"from_date": from_date, "to_date": stored_to},
+                as_dict=True,
+            )
+        )
+    if live_from:
+        facts.extend(build_ad_attribution_rows(live_from, to_date))
+    return facts
+
+
+def get_expense_base_rows(facts: list, filters: Filters) -> list[dict]:
+    campaign_filter = normalize_identifier(filters.get("campaign_name")).lower()
+    source_filter = normalize_identifier(filters.get("source")).lower()
+    ad_id_filter = get_ad_key(filters.get("ad_id"))
+
+    # Grouped on casefolded campaign and ad, each row showing the first spelling seen
+    expenses: dict[tuple, dict] = {}
+    for fact in facts:
+        campaign = normalize_identifier(fact.campaign)
+        source = EXPENSE_SOURCES.get(normalize_identifier(fact.source).casefold())
+        ad_id = normalize_identifier(fact.ad_id) if source == "Meta" else ""
+        if not fact.expense_entries or not source or not campaign:
             continue
-        subsource = normalize_identifier(row.get("subsource"))
-        if not subsource:
+        if campaign_filter and campaign_filter not in campaign.lower():
             continue
-        ad_to_subsources.setdefault(ad_id, set()).add(subsource)
+        if source_filter and source_filter != source.lower():
+            continue
+        if ad_id_filter and ad_id_filter != get_ad_key(ad_id):
+            continue
+        row = expenses.setdefault(
+            (campaign.casefold(), source, ad_id.casefold()),
+            {"campaign_name": campaign, "source": source, "ad_id": ad_id, "total_expense": 0.0},
+        )
+        row["total_expense"] += cast_to_float(fact.expense)
 
-    resolved: dict[str, str] = {}
-    for ad_id, subsources in ad_to_subsources.items():
-        if len(subsources) == 1:
-            resolved[ad_id] = next(iter(subsources))
-        else:
-            resolved[ad_id] = "Mixed"
-    return resolved
+    return [row for _key, row in sorted(expenses.items())]
 
 
-def get_google_surgery_revenue(campaigns: set[str], filters: Filters) -> dict[str, float]:
-    """Surgery-type payments only (original report logic)."""
-    names = make_identifier_tuple(campaigns)
-    if not names:
-        return {}
-    params: dict[str, object] = {
-        "from_date": filters.get("from_date"),
-        "to_date": filters.get("to_date"),
-        "campaign_names": names,
-    }
-    query = """
-        SELECT
-            TRIM(l.campaign_name) AS campaign_name,
-            COALESCE(SUM(
-                CASE
-                    WHEN p.total_amount_received IS NOT NULL AND p.total_amount_received != ''
-                    THEN CAST(p.total_amount_received AS DECIMAL(18,2))
-                    ELSE 0
-                END
-            ), 0) AS revenue
-        FROM `tabPayment` p
-        INNER JOIN `tabSurgery` s ON s.name = p.patient
-        INNER JOIN `tabCosting` c ON s.patient = c.name
-        INNER JOIN `tabLead` l ON c.patient = l.name
-        WHERE p.docstatus < 2
-          AND p.type = 'Payment'
-          AND p.payment_type = 'Surgery'
-          AND IFNULL(s.pending_amount, 0) = 0
-          AND l.source = 'Google Adword'
-          AND IFNULL(l.status, '') != 'Duplicate Lead'
-          AND TRIM(l.campaign_name) IN %(campaign_names)s
-          AND p.transaction_date BETWEEN %(from_date)s AND %(to_date)s
-        GROUP BY campaign_name
-    """
-    query, params = apply_marketing_head_center_filter(query, params, center_field="center", table_alias="l")
-    rows = frappe.db.sql(query, params, as_dict=True)
-    return {normalize_identifier(r.get("campaign_name")): cast_to_float(r.get("revenue")) for r in rows}
-
-
-def get_google_surgery_revenue_costing_addon(campaigns: set[str], filters: Filters) -> dict[str, float]:
-    """All Costing-type payments for distinct costings linked to eligible surgery payments (Google)."""
-    names = make_identifier_tuple(campaigns)
-    if not names:
-        return {}
-    params: dict[str, object] = {
-        "from_date": filters.get("from_date"),
-        "to_date": filters.get("to_date"),
-        "campaign_names": names,
-    }
-    distinct_inner = """
-        SELECT DISTINCT
-            TRIM(l.campaign_name) AS campaign_name,
-            c.name AS costing_name
-        FROM `tabPayment` p
-        INNER JOIN `tabSurgery` s ON s.name = p.patient
-        INNER JOIN `tabCosting` c ON s.patient = c.name
-        INNER JOIN `tabLead` l ON c.patient = l.name
-        WHERE p.docstatus < 2
-          AND p.type = 'Payment'
-          AND p.payment_type = 'Surgery'
-          AND IFNULL(s.pending_amount, 0) = 0
-          AND l.source = 'Google Adword'
-          AND IFNULL(l.status, '') != 'Duplicate Lead'
-          AND TRIM(l.campaign_name) IN %(campaign_names)s
-          AND p.transaction_date BETWEEN %(from_date)s AND %(to_date)s
-    """
-    part_b = f"""
-        SELECT e.campaign_name, COALESCE(SUM({_sql_line_amount("pc")}), 0) AS revenue
-        FROM ({distinct_inner}) AS e
-        INNER JOIN `tabPayment` pc ON pc.patient = e.costing_name
-          AND pc.docstatus < 2
-          AND pc.type = 'Payment'
-          AND pc.payment_type = 'Costing'
-        GROUP BY e.campaign_name
-    """
-    rows = frappe.db.sql(part_b, params, as_dict=True)
-    return {
-        normalize_identifier(r.get("campaign_name")): cast_to_float(r.get("revenue"))
-        for r in rows
-        if normalize_identifier(r.get("campaign_name"))
-    }
+def get_marketing_head_centres() -> set[str] | None:
+    """Lower-cased assigned centres of a Marketing Head(new), None when the user is not one."""
+    if "Marketing Head(new)" not in frappe.get_roles():
+        return None
+    return {(centre or "").strip().lower() for centre in get_assigned_centres_for_user(frappe.session.user)}
 
 
 def normalize_identifier(value: str | None) -> str:
@@ -595,13 +395,6 @@ def _sql_line_amount(alias: str) -> str:
             END"""
 
 
-def _merge_revenue_dicts(
-    surgery_map: dict[str, float], costing_map: dict[str, float]
-) -> dict[str, float]:
-    keys = set(surgery_map) | set(costing_map)
-    return {k: surgery_map.get(k, 0.0) + costing_map.get(k, 0.0) for k in keys}
-
-
 def get_revenue_ad_identifiers(filters: Filters) -> tuple[list[str], dict[str, str]]:
     """Get ad identifiers from surgery payments in the date range."""
     params = {
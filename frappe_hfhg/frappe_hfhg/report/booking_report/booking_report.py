@@ -9,6 +9,8 @@ from frappe_hfhg.frappe_hfhg.doctype.centre_assignment.centre_assignment import
 	apply_marketing_head_center_filter,
 	filter_data_by_assigned_centres,
 )
+from frappe_hfhg.payment_breakdown import get_booking_breakdowns
+from frappe_hfhg.user_scope import get_user_scope
 
 Filters = frappe._dict
 
@@ -220,8 +222,8 @@ def get_data(filters) -> list[dict]:
 	query = """
         SELECT
             c.*, l.mode, l.status as lead_status, l.campaign_name, l.full_name, l.active_inactive_status, l.subsource,
-			latest_consultation.date AS consultation_date,
-		    latest_consultation.status AS consultation_status, 
+			l.latest_consultation_date AS consultation_date,
+		    l.latest_consultation_status AS consultation_status, 
 		    latest_surgery.surgery_date,
 		    latest_surgery.surgery_status
 		FROM
@@ -230,12 +232,6 @@ def get_data(filters) -> list[dict]:
 		    `tabLead` l
 		ON
 		    c.patient = l.name
-		LEFT JOIN 
-			(SELECT patient, MAX(date) AS date, status
-				FROM `tabConsultation` 
-				GROUP BY patient) latest_consultation
-		ON 
-			latest_consultation.patient = l.name
 		LEFT JOIN 
 			(SELECT patient, MAX(surgery_date) AS surgery_date, surgery_status
 				FROM `tabSurgery` 
@@ -284,7 +280,7 @@ def get_data(filters) -> list[dict]:
 		params["surgery_status"] = filters["surgery_status"]
 
 	if filters.get("cs_status"):
-		query += " AND latest_consultation.status = %(cs_status)s"
+		query += " AND l.latest_consultation_status = %(cs_status)s"
 		params["cs_status"] = filters["cs_status"]
 
 	# Apply center filter for Marketing Head(new) at SQL level so they see data for their assigned centres
@@ -298,47 +294,36 @@ def get_data(filters) -> list[dict]:
 	# })
 	
 	user = frappe.session.user
-	is_receptionist = frappe.db.exists("Receptionist", {'email': user})
-	is_executive = frappe.db.exists("Executive", {'email': user})
+	scope = get_user_scope(user)
+	is_receptionist = scope.receptionist
+	is_executive = scope.executive
 	roles = frappe.get_roles()
 	is_marketing_head = True if "Marketing Head" in roles else False
 
 	if is_receptionist and not is_marketing_head and "Marketing Head(new)" not in roles:
-		receptionist = frappe.db.get_value('Receptionist', {'email': user}, ['name'], as_dict=1)
-		center = frappe.db.get_value('Center', {'receptionist': receptionist.name}, ['name'], as_dict=1)
+		center = scope.receptionist_desk_center
 		if is_executive:
-			executive = frappe.db.get_value('Executive', {'email': user}, ['name'], as_dict=1)
-			new_center = frappe.db.get_value("Center", {"clinic_manager": user}, "name")
-			bookings = list(filter(lambda x: x.get("executive") == executive.name or x.get("center") == new_center, bookings))
+			executive = scope.executive
+			new_center = scope.clinic_manager_center
+			bookings = list(filter(lambda x: x.get("executive") == executive or x.get("center") == new_center, bookings))
 		else:
-			bookings = list(filter(lambda x: x.get("center") == center.name, bookings))
+			bookings = list(filter(lambda x: x.get("center") == center, bookings))
 
 	elif is_executive and not is_marketing_head and "Marketing Head(new)" not in roles:
-		executive = frappe.db.get_value('Executive', {'email': user}, ['name'], as_dict=1)
-		bookings = list(filter(lambda x: x.get("executive") == executive.name, bookings))
+		executive = scope.executive
+		bookings = list(filter(lambda x: x.get("executive") == executive, bookings))
 	
 	# Apply center filtering for Marketing Head(new) role
 	bookings = filter_data_by_assigned_centres(bookings, center_field="center")
 			
+	booking_breakdowns = get_booking_breakdowns([surgery.get("patient") for surgery in bookings])
+
 	for surgery in bookings:
-		payment_mode = ""
-		payment_in = ""
-		booking_gst_amount = 0
-		transaction_date = None
-		booking_payment = None
-		lead = frappe.get_doc("Lead", surgery.get("patient"), ["campaign_name","status"])
-		booking_payment_exists = frappe.db.exists("Payment", {"payment_type": "Costing", "type": "Payment", "patient": surgery.get("patient")}, ["*"])
-		if booking_payment_exists:
-			booking_payment = frappe.get_doc("Payment", {"payment_type": "Costing", "type": "Payment", "patient": surgery.get("patient")}, ["*"])
-			if booking_payment:
-				transaction_date = booking_payment.transaction_date
-				if booking_payment.get("with_gst_amount") and len(booking_payment.get("gst_payment_entries")) > 0:
-					payment_mode = booking_payment.get("gst_payment_entries")[0].get("method")
-					payment_in = booking_payment.get("gst_payment_entries")[0].get("payment_in")
-					booking_gst_amount = booking_payment.get("gst_payment_entries")[0].get("gst_amount")
-				elif booking_payment.get("without_gst_amount") and len(booking_payment.get("payment_entries")) > 0:
-					payment_mode = booking_payment.get("payment_entries")[0].get("method")
-					payment_in = booking_payment.get("payment_entries")[0].get("payment_in")
+		booking = booking_breakdowns[surgery.get("patient")]
+		payment_mode = booking.payment_mode
+		payment_in = booking.payment_in
+		booking_gst_amount = booking.booking_gst
+		transaction_date = booking.transaction_date
 		
 		row = {
 			"month": surgery.get("booking_date").strftime("%B") if surgery.get("booking_date") else "",
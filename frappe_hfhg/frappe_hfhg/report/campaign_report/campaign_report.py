@@ -2,6 +2,7 @@ import frappe
 from frappe import _
 from urllib.parse import quote
 from frappe_hfhg.frappe_hfhg.doctype.centre_assignment.centre_assignment import apply_marketing_head_center_filter
+from frappe_hfhg.user_scope import get_user_scope
 
 Filters = frappe._dict
 
@@ -130,9 +131,9 @@ def get_data(filters: Filters) -> list[dict]:
             l.created_on, l.executive, l.center, ad.ads_name as ad_name,l.source, l.subsource,
             latest_surgery.surgery_date, 
             latest_costing.booking_date AS costing_date, 
-            latest_consultation.date AS consultation_date,
+            l.latest_consultation_date AS consultation_date,
             latest_surgery.surgery_status,
-            latest_consultation.status as cs_status
+            l.latest_consultation_status as cs_status
         FROM 
             `tabLead` l
         LEFT JOIN 
@@ -149,12 +150,6 @@ def get_data(filters: Filters) -> list[dict]:
              GROUP BY patient) latest_costing
         ON 
             latest_costing.patient = l.name
-        LEFT JOIN 
-            (SELECT patient, MAX(date) AS date, status
-             FROM `tabConsultation` 
-             GROUP BY patient) latest_consultation
-        ON 
-            latest_consultation.patient = l.name
         WHERE 
             l.created_on BETWEEN %(from_date)s AND %(to_date)s
             AND (l.ad_name IS NOT NULL AND l.ad_name != '' 
@@ -195,7 +190,7 @@ def get_data(filters: Filters) -> list[dict]:
         params["surgery_status"] = filters["surgery_status"]
 
     if filters.get("cs_status"):
-        query += " AND latest_consultation.status = %(cs_status)s"
+        query += " AND l.latest_consultation_status = %(cs_status)s"
         params["cs_status"] = filters["cs_status"]
 
     if filters.get("campaign_name"):
@@ -211,18 +206,19 @@ def get_data(filters: Filters) -> list[dict]:
         query += " AND l.campaign_name IS NOT NULL"
 
     user = frappe.session.user
-    is_receptionist = frappe.db.exists("Receptionist", {"email": user})
-    is_executive = frappe.db.exists("Executive", {"email": user})
+    scope = get_user_scope(user)
+    is_receptionist = scope.receptionist
+    is_executive = scope.executive
     roles = frappe.get_roles()
     is_marketing_head = "Marketing Head" in roles
 
     if is_receptionist and not is_marketing_head and "Marketing Head(new)" not in roles:
-        receptionist = frappe.db.get_value("Receptionist", {"email": user}, "name")
+        receptionist = scope.receptionist
         if receptionist:
-            center = frappe.db.get_value("Center", {"receptionist": receptionist}, "name")
+            center = scope.receptionist_desk_center
             if is_executive:
-                executive = frappe.db.get_value("Executive", {"email": user}, "name")
-                new_center = frappe.db.get_value("Center", {"clinic_manager": user}, "name")
+                executive = scope.executive
+                new_center = scope.clinic_manager_center
                 if executive:
                     query += " AND (l.executive = %(executive)s OR l.center = %(center)s)"
                     params["executive"] = executive
@@ -233,7 +229,7 @@ def get_data(filters: Filters) -> list[dict]:
                     params["center"] = center
 
     elif is_executive and not is_marketing_head and "Marketing Head(new)" not in roles:
-        executive = frappe.db.get_value("Executive", {"email": user}, "name")
+        executive = scope.executive
         if executive:
             query += " AND l.executive = %(executive)s"
             params["executive"] = executive
@@ -252,9 +248,9 @@ def get_data(filters: Filters) -> list[dict]:
         query += " AND latest_costing.booking_date IS NULL"
 
     if filters.get("have_consultation") == "Yes":
-        query += " AND latest_consultation.date IS NOT NULL"
+        query += " AND l.latest_consultation_date IS NOT NULL"
     elif filters.get("have_consultation") == "No":
-        query += " AND latest_consultation.date IS NULL"
+        query += " AND l.latest_consultation_date IS NULL"
 
     leads = frappe.db.sql(query, params, as_dict=True)
 
@@ -5,6 +5,7 @@ import frappe
 from frappe import _
 from urllib.parse import quote
 from frappe_hfhg.frappe_hfhg.doctype.centre_assignment.centre_assignment import apply_marketing_head_center_filter
+from frappe_hfhg.user_scope import get_user_scope
 
 Filters = frappe._dict
 
@@ -332,18 +333,19 @@ def get_data(filters: Filters) -> list[dict]:
 		query += " AND latest_costing.booking_date IS NULL"
 
 	user = frappe.session.user
-	is_receptionist = frappe.db.exists("Receptionist", {"email": user})
-	is_executive = frappe.db.exists("Executive", {"email": user})
+	scope = get_user_scope(user)
+	is_receptionist = scope.receptionist
+	is_executive = scope.executive
 	roles = frappe.get_roles()
 	is_marketing_head = "Marketing Head" in roles
 
 	if is_receptionist and not is_marketing_head and "Marketing Head(new)" not in roles:
-		receptionist = frappe.db.get_value("Receptionist", {"email": user}, "name")
+		receptionist = scope.receptionist
 		if receptionist:
-			center = frappe.db.get_value("Center", {"receptionist": receptionist}, "name")
+			center = scope.receptionist_desk_center
 			if is_executive:
-				executive = frappe.db.get_value("Executive", {"email": user}, "name")
-				new_center = frappe.db.get_value("Center", {"clinic_manager": user}, "name")
+				executive = scope.executive
+				new_center = scope.clinic_manager_center
 				if executive:
 					query += " AND (c.executive = %(executive)s OR c.center = %(center)s)"
 					params["executive"] = executive
@@ -353,7 +355,7 @@ def get_data(filters: Filters) -> list[dict]:
 					query += " AND c.center = %(center)s"
 					params["center"] = center
 	elif is_executive and not is_marketing_head and "Marketing Head(new)" not in roles:
-		executive = frappe.db.get_value("Executive", {"email": user}, "name")
+		executive = scope.executive
 		if executive:
 			query += " AND c.executive = %(executive)s"
 			params["executive"] = executive
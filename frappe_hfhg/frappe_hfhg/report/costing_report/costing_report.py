@@ -6,6 +6,8 @@ import frappe
 from frappe import _
 from urllib.parse import quote
 from frappe_hfhg.frappe_hfhg.doctype.centre_assignment.centre_assignment import apply_marketing_head_center_filter
+from frappe_hfhg.payment_breakdown import get_booking_breakdowns
+from frappe_hfhg.user_scope import get_user_scope
 
 Filters = frappe._dict
 
@@ -221,8 +223,8 @@ def get_data(filters) -> list[dict]:
 			l.status as lead_status, 
 			l.full_name,
 			l.active_inactive_status,
-			latest_consultation.date AS consultation_date, 
-			latest_consultation.status as consultation_status,
+			l.latest_consultation_date AS consultation_date, 
+			l.latest_consultation_status as consultation_status,
 			latest_surgery.surgery_date,
 			latest_surgery.surgery_status
 		FROM 
@@ -231,12 +233,6 @@ def get_data(filters) -> list[dict]:
 			`tabLead` l
 		ON 
 			c.patient = l.name
-		LEFT JOIN 
-			(SELECT patient, MAX(date) AS date, status
-				FROM `tabConsultation` 
-				GROUP BY patient) latest_consultation
-		ON 
-			latest_consultation.patient = l.name
 		LEFT JOIN 
 			(SELECT patient, MAX(surgery_date) AS surgery_date, surgery_status
 				FROM `tabSurgery` 
@@ -285,7 +281,7 @@ def get_data(filters) -> list[dict]:
 		params["surgery_status"] = filters["surgery_status"]
 
 	if filters.get("cs_status"):
-		query += " AND latest_consultation.status = %(cs_status)s"
+		query += " AND l.latest_consultation_status = %(cs_status)s"
 		params["cs_status"] = filters["cs_status"]
 
 	if filters.get("have_surgery") == "Yes":
@@ -294,18 +290,19 @@ def get_data(filters) -> list[dict]:
 		query += " AND latest_surgery.surgery_date IS NULL"
 
 	user = frappe.session.user
-	is_receptionist = frappe.db.exists("Receptionist", {"email": user})
-	is_executive = frappe.db.exists("Executive", {"email": user})
+	scope = get_user_scope(user)
+	is_receptionist = scope.receptionist
+	is_executive = scope.executive
 	roles = frappe.get_roles()
 	is_marketing_head = "Marketing Head" in roles
 
 	if is_receptionist and not is_marketing_head and "Marketing Head(new)" not in roles:
-		receptionist = frappe.db.get_value("Receptionist", {"email": user}, "name")
+		receptionist = scope.receptionist
 		if receptionist:
-			center = frappe.db.get_value("Center", {"receptionist": receptionist}, "name")
+			center = scope.receptionist_desk_center
 			if is_executive:
-				executive = frappe.db.get_value("Executive", {"email": user}, "name")
-				new_center = frappe.db.get_value("Center", {"clinic_manager": user}, "name")
+				executive = scope.executive
+				new_center = scope.clinic_manager_center
 				if executive:
 					query += " AND (c.executive = %(executive)s OR c.center = %(center)s)"
 					params["executive"] = executive
@@ -316,7 +313,7 @@ def get_data(filters) -> list[dict]:
 					params["center"] = center
 
 	elif is_executive and not is_marketing_head and "Marketing Head(new)" not in roles:
-		executive = frappe.db.get_value("Executive", {"email": user}, "name")
+		executive = scope.executive
 		if executive:
 			query += " AND c.executive = %(executive)s"
 			params["executive"] = executive
@@ -325,21 +322,13 @@ def get_data(filters) -> list[dict]:
 	query, params = apply_marketing_head_center_filter(query, params, center_field="center", table_alias="c")
 
 	costings = frappe.db.sql(query, params, as_dict=True)
-	for costing in costings:
-		payment_mode = ""
-		payment_in = ""
-		booking_payment = None
+	booking_breakdowns = get_booking_breakdowns([costing.get("patient") for costing in costings])
 
-		booking_payment_exists = frappe.db.exists("Payment", {"payment_type": "Costing", "type": "Payment", "patient": costing.get("patient")}, ["*"])
-		if booking_payment_exists:
-			booking_payment = frappe.get_doc("Payment", {"payment_type": "Costing", "type": "Payment", "patient": costing.get("patient")}, ["*"])
-			if booking_payment:
-				if booking_payment.get("with_gst_amount") and len(booking_payment.get("gst_payment_entries")) > 0:
-					payment_mode = booking_payment.get("gst_payment_entries")[0].get("method")
-					payment_in = booking_payment.get("gst_payment_entries")[0].get("payment_in")
-				elif booking_payment.get("without_gst_amount") and len(booking_payment.get("payment_entries")) > 0:
-					payment_mode = booking_payment.get("payment_entries")[0].get("method")
-					payment_in = booking_payment.get("payment_entries")[0].get("payment_in")
+	for costing in costings:
+		booking = booking_breakdowns[costing.get("patient")]
+		booking_payment = booking.payment
+		payment_mode = booking.payment_mode
+		payment_in = booking.payment_in
 			
 		row = {
 			"month": costing.get("booking_date").strftime("%B") if costing.get("booking_date") else "",
@@ -1,7 +1,6 @@
 import frappe
 from frappe import _
 from urllib.parse import quote
-import json
 from frappe_hfhg.frappe_hfhg.doctype.centre_assignment.centre_assignment import apply_marketing_head_center_filter
 
 Filters = frappe._dict
@@ -177,17 +176,8 @@ def get_data(filters: Filters) -> list[dict]:
 	rows = []
 	leads = []        
 
+	# Original lead of each contact number comes from the Original Lead mapping
 	query = """
-        WITH original_leads AS (
-            SELECT
-                ol.*,
-                ROW_NUMBER() OVER (PARTITION BY ol.contact_number ORDER BY ol.created_on ASC) AS rn
-            FROM `tabLead` ol
-            WHERE ol.status != 'Duplicate Lead'
-            ),
-            filtered_original_leads AS (
-                SELECT * FROM original_leads WHERE rn = 1
-            )
         SELECT
             dl.name AS dl_name,
 			dl.full_name AS dl_first_name,
@@ -215,9 +205,10 @@ def get_data(filters: Filters) -> list[dict]:
             ol.ad_name AS ol_ad_name,
             ol.executive AS ol_executive,
             ol.center AS ol_center,
-            logs.object AS log_object
+            logs.original_lead_status AS log_status
         FROM `tabLead` dl
-        JOIN filtered_original_leads ol ON dl.contact_number = ol.contact_number
+        JOIN `tabOriginal Lead` olm ON olm.name = dl.contact_number
+        JOIN `tabLead` ol ON ol.name = olm.lead
         LEFT JOIN `tabDuplicate Leads Logs` logs ON logs.lead = dl.name
         WHERE dl.status = 'Duplicate Lead'
         AND dl.created_on BETWEEN %(from_date)s AND %(to_date)s
@@ -238,47 +229,17 @@ def get_data(filters: Filters) -> list[dict]:
 
 	leads = frappe.db.sql(query, params, as_dict=True)
 
+	previous_statuses = get_previous_statuses([lead.get("ol_name") for lead in leads])
+
 	for lead in leads:
-		# Get current status from the query
 		current_status = lead.get("current_ol_status", "")
-		original_lead_name = lead.get("ol_name", "")
-		
-		# Get previous status from Lead Status Track (most recent status change)
-		previous_status = current_status  # Default to current status
-		
-		if original_lead_name:
-			# Query the most recent status change for the original lead
-			status_track = frappe.db.sql("""
-				SELECT old_status
-				FROM `tabLead Status Track`
-				WHERE lead = %(lead_name)s
-				ORDER BY date DESC, modified DESC
-				LIMIT 1
-			""", {"lead_name": original_lead_name}, as_dict=True)
-			
-			if status_track and status_track[0].get("old_status"):
-				# Use the old_status from the most recent change
-				previous_status = status_track[0].get("old_status")
-			else:
-				# Fallback: Try to extract from log object if no status track exists
-				log_object = lead.get("log_object")
-				if log_object:
-					try:
-						# The log_object contains TWO concatenated JSON objects
-						decoder = json.JSONDecoder()
-						first_json, idx = decoder.raw_decode(log_object)
-						
-						if idx < len(log_object):
-							second_json, _ = decoder.raw_decode(log_object, idx)
-							if isinstance(second_json, dict):
-								previous_status = second_json.get("status", current_status)
-						else:
-							if isinstance(first_json, dict):
-								previous_status = first_json.get("status", current_status)
-					except (json.JSONDecodeError, TypeError, AttributeError, ValueError):
-						# If parsing fails, use current status as previous
-						previous_status = current_status
-		
+		# Most recent status change of the original lead, else its status when the duplicate was logged
+		previous_status = (
+			previous_statuses.get(lead.get("ol_name"))
+			or lead.get("log_status")
+			or current_status
+		)
+
 		row = {
 			"dl_name": f'<strong><a href="/app/lead/{quote(lead.get("dl_name"), safe="")}" style="color: inherit;">{lead.get("dl_first_name")}</a></strong>',
 			"dl_created_on": lead.get("dl_created_on"),
@@ -308,4 +269,25 @@ def get_data(filters: Filters) -> list[dict]:
 		}
 		rows.append(row)
     
-	return rows
\ No newline at end of file
+	return rows
+
+
+def get_previous_statuses(lead_names) -> dict:
+	"""`old_status` of the latest Lead Status Track row per lead, in one query."""
+	lead_names = list({name for name in lead_names if name})
+	if not lead_names:
+		return {}
+
+	rows = frappe.db.sql("""
+		SELECT lead, old_status
+		FROM (
+			SELECT
+				lead,
+				old_status,
+				ROW_NUMBER() OVER (PARTITION BY lead ORDER BY date DESC, modified DESC) AS rn
+			FROM `tabLead Status Track`
+			WHERE lead IN %(lead_names)s
+		) latest
+		WHERE rn = 1
+	""", {"lead_names": lead_names}, as_dict=True)
+	return {row.lead: row.old_status for row in rows}
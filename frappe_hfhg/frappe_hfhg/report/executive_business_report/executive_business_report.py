@@ -3,9 +3,11 @@
 
 import frappe
 from frappe import _
+from frappe.utils import cint, flt
 from frappe.utils.data import today
 from datetime import datetime, date
 from frappe_hfhg.frappe_hfhg.doctype.centre_assignment.centre_assignment import get_assigned_centres_for_user
+from frappe_hfhg.user_scope import get_user_scope
 
 Filters = frappe._dict
 
@@ -98,17 +100,16 @@ def get_columns() -> list[dict]:
 	]
 
 def get_data(filters: Filters) -> list[dict]:
-	rows = []
 	executives = frappe.get_all("Executive", fields=["*"])
 	user = frappe.session.user
-	is_receptionist = frappe.db.exists("Receptionist", {'email': user})
-	is_executive = frappe.db.exists("Executive", {'email': user})
+	scope = get_user_scope(user)
+	is_receptionist = scope.receptionist
+	is_executive = scope.executive
 	roles = frappe.get_roles()
 	is_marketing_head = "Marketing Head" in roles
 
 	if is_receptionist and not is_marketing_head:
-		receptionist = frappe.db.get_value('Receptionist', {'email': user}, ['name','email'], as_dict=1)
-		center = frappe.db.get_value('Center', {'clinic_manager': receptionist.email}, ['name'], as_dict=1)
+		center = scope.clinic_manager_center
 		executives = frappe.get_all("Executive", fields=["*"], filters={"email": user})
 
 	elif is_executive and not is_marketing_head:
@@ -128,107 +129,114 @@ def get_data(filters: Filters) -> list[dict]:
 			return []
 		executives = frappe.get_all("Executive", fields=["*"], filters={"name": ["in", executive_names]})
 
+	return get_executive_rows(executives, filters)
+
+
+def get_executive_rows(executives, filters: Filters) -> list[dict]:
+	"""One row per executive, built from one grouped query per source doctype
+	so the query count does not grow with the number of executives."""
+	names = [executive.get("name") for executive in executives]
+	if not names:
+		return []
+
+	params = {
+		"executives": names,
+		"from_date": filters.from_date,
+		"to_date": filters.to_date,
+		"today": datetime.now().date(),
+	}
+
+	# Through get_all so the `creation` between filter keeps frappe's datetime bounds
+	leads = {}
+	for row in frappe.get_all(
+		"Lead",
+		filters={
+			"executive": ["in", names],
+			"creation": ["between", (filters.from_date, filters.to_date)]
+		},
+		fields=["executive", "assign_by", "count(name) as count"],
+		group_by="executive, assign_by",
+	):
+		leads.setdefault(row.executive, []).append(row)
+
+	reminders = get_grouped(
+		"""
+		SELECT executive,
+			COUNT(*) AS total_reminder,
+			SUM(status = 'Close') AS total_reminder_attended,
+			SUM(IFNULL(status, '') != 'Close' AND date < %(today)s) AS total_missed_reminder
+		FROM `tabReminders`
+		WHERE executive IN %(executives)s AND date BETWEEN %(from_date)s AND %(to_date)s
+		GROUP BY executive
+		""",
+		params,
+	)
+	consultations = get_grouped(
+		"""
+		SELECT executive,
+			COUNT(*) AS total_consultation,
+			SUM(status IN ('Booked', 'Spot Booking', 'Non Booked', 'Medi-PRP')) AS total_consultation_done,
+			SUM(IFNULL(status, '') NOT IN ('Medi-PRP', 'Not Visited')) AS total_consultation_pending
+		FROM `tabConsultation`
+		WHERE executive IN %(executives)s AND date BETWEEN %(from_date)s AND %(to_date)s
+		GROUP BY executive
+		""",
+		params,
+	)
+	costings = get_grouped(
+		"""
+		SELECT executive, COUNT(*) AS no_of_costing, SUM(amount_paid) AS booking_amount
+		FROM `tabCosting`
+		WHERE executive IN %(executives)s AND booking_date BETWEEN %(from_date)s AND %(to_date)s
+		GROUP BY executive
+		""",
+		params,
+	)
+	surgeries = get_grouped(
+		"""
+		SELECT executive, SUM(CASE WHEN surgery_status = 'Completed' THEN total_amount END) AS income_generated
+		FROM `tabSurgery`
+		WHERE executive IN %(executives)s AND surgery_date BETWEEN %(from_date)s AND %(to_date)s
+		GROUP BY executive
+		""",
+		params,
+	)
+
+	rows = []
 	for executive in executives:
-		leads = frappe.get_all(
-			"Lead",
-			filters={
-				"executive": executive.get("name"),
-				"creation": ["between", (filters.from_date, filters.to_date)]
-			},
-			fields=["name", "assign_by", "executive"],
-		)
+		name = executive.get("name")
 		self_leads = 0
 		system_leads = 0
-
-		for lead in leads:
+		for lead in leads.get(name, []):
 			if lead.get("assign_by") == executive.get("email"):
-				self_leads+=1
+				self_leads += lead.count
 			else:
-				system_leads+=1		
-
-		reminders = frappe.get_all(
-					"Reminders",
-					filters={
-						"executive": executive.get("name"),
-						"date": ["between", (filters.from_date, filters.to_date)]
-					},
-					fields=["date", "executive", "description", "status", "parent"],
-				)
-		total_reminders = len(reminders)
-		total_missed_reminder = 0
-		total_reminder_attended = 0
-
-		for rem in reminders:
-			status = rem.get("status")
-			if status == "Close":
-				total_reminder_attended+=1
-			else:
-				if rem["date"] < datetime.now().date():
-					total_missed_reminder+=1
-
-		consultations = frappe.db.count(
-					"Consultation",
-					filters={
-						"executive": executive.get("name"),
-						"date": ["between", (filters.from_date, filters.to_date)]
-					},
-				)
-		consultations_done = frappe.db.count(
-					"Consultation",
-					filters={
-						"executive": executive.get("name"),
-						"date": ["between", (filters.from_date, filters.to_date)],
-						"status": ["in", ["Booked","Spot Booking","Non Booked","Medi-PRP"]]
-					},
-				)
-		consultation_pending = frappe.db.count(
-					"Consultation",
-					filters={
-						"executive": executive.get("name"),
-						"date": ["between", (filters.from_date, filters.to_date)],
-						"status": ["not in", ["Medi-PRP", "Not Visited"]]
-					},
-				)
-		bookings = frappe.get_all(
-					"Costing",
-					filters={
-						"executive": executive.get("name"),
-						"booking_date": ["between", (filters.from_date, filters.to_date)]
-					},
-					fields=["name", "amount_paid"],
-				)
-		
-		booking_amount = 0
-		for booking in bookings:
-			booking_amount += booking.get("amount_paid")
-
-		surgeries = frappe.get_all(
-					"Surgery",
-					filters={
-						"executive": executive.get("name"),
-						"surgery_date": ["between", (filters.from_date, filters.to_date)]
-					},
-					fields=["surgery_status", "total_amount"],
-				)
-		
-		income_generated = 0
-		for surgery in surgeries:
-			if surgery.get("surgery_status") == "Completed":
-				income_generated += surgery.get("total_amount")
+				system_leads += lead.count
+
+		reminder = reminders.get(name, {})
+		consultation = consultations.get(name, {})
+		costing = costings.get(name, {})
+		income_generated = surgeries.get(name, {}).get("income_generated")
+
 		row = {
-			"executive": executive.get("name"),
+			"executive": name,
 			"self_leads": self_leads,
 			"system_leads": system_leads,
-			"total_reminder": total_reminders,
-			"total_missed_reminder": total_missed_reminder,
-			"total_reminder_attended": total_reminder_attended,
-			"total_consultation": consultations,
-			"total_consultation_done": consultations_done,
-			"total_consultation_pending": consultation_pending,
-			"no_of_costing": len(bookings),
-			"booking_amount": booking_amount,
-			"income_generated": income_generated
+			"total_reminder": cint(reminder.get("total_reminder")),
+			"total_missed_reminder": cint(reminder.get("total_missed_reminder")),
+			"total_reminder_attended": cint(reminder.get("total_reminder_attended")),
+			"total_consultation": cint(consultation.get("total_consultation")),
+			"total_consultation_done": cint(consultation.get("total_consultation_done")),
+			"total_consultation_pending": cint(consultation.get("total_consultation_pending")),
+			"no_of_costing": cint(costing.get("no_of_costing")),
+			"booking_amount": flt(costing.get("booking_amount")),
+			"income_generated": flt(income_generated) if income_generated is not None else 0
 		}
 		rows.append(row)
 
 	return rows
+
+
+def get_grouped(query, params) -> dict:
+	"""Run a `GROUP BY executive` query and key its rows by executive."""
+	return {row.executive: row for row in frappe.db.sql(query, params, as_dict=True)}
@@ -9,6 +9,8 @@ from frappe_hfhg.frappe_hfhg.doctype.centre_assignment.centre_assignment import
 	apply_marketing_head_center_filter,
 	filter_data_by_assigned_centres,
 )
+from frappe_hfhg.payment_breakdown import get_booking_breakdowns
+from frappe_hfhg.user_scope import get_user_scope
 
 Filters = frappe._dict
 
@@ -204,8 +206,8 @@ def get_data(filters) -> list[dict]:
 	query = """
         SELECT
 		   c.*, l.mode, l.status as lead_status, l.campaign_name, l.full_name, l.active_inactive_status, l.subsource,
-		   latest_consultation.date AS consultation_date,
-		   latest_consultation.status AS consultation_status, 
+		   l.latest_consultation_date AS consultation_date,
+		   l.latest_consultation_status AS consultation_status, 
 		   latest_surgery.surgery_date,
 		   latest_surgery.surgery_status
 		FROM 
@@ -214,12 +216,6 @@ def get_data(filters) -> list[dict]:
 			`tabLead` l
 		ON 
 			c.patient = l.name
-		LEFT JOIN 
-			(SELECT patient, MAX(date) AS date, status
-				FROM `tabConsultation` 
-				GROUP BY patient) latest_consultation
-		ON 
-			latest_consultation.patient = l.name
 		LEFT JOIN 
 			(SELECT patient, MAX(surgery_date) AS surgery_date, surgery_status
 				FROM `tabSurgery` 
@@ -267,7 +263,7 @@ def get_data(filters) -> list[dict]:
 		params["surgery_status"] = filters["surgery_status"]
 
 	if filters.get("cs_status"):
-		query += " AND latest_consultation.status = %(cs_status)s"
+		query += " AND l.latest_consultation_status = %(cs_status)s"
 		params["cs_status"] = filters["cs_status"]
 
 	# Apply center filter for Marketing Head(new) - only affects that role
@@ -279,40 +275,35 @@ def get_data(filters) -> list[dict]:
 	# 	"status": "prospect"
 	# })
 	user = frappe.session.user
-	is_receptionist = frappe.db.exists("Receptionist", {'email': user})
-	is_executive = frappe.db.exists("Executive", {'email': user})
+	scope = get_user_scope(user)
+	is_receptionist = scope.receptionist
+	is_executive = scope.executive
 	roles = frappe.get_roles()
 	is_marketing_head = True if "Marketing Head" in roles else False
 
 	if is_receptionist and not is_marketing_head and "Marketing Head(new)" not in roles:
-		receptionist = frappe.db.get_value('Receptionist', {'email': user}, ['name', 'email'], as_dict=1)
-		center = frappe.db.get_value('Center', {'clinic_manager': receptionist.email}, ['name'], as_dict=1)
+		center = scope.clinic_manager_center
 		if is_executive:
-			executive = frappe.db.get_value('Executive', {'email': user}, ['name'], as_dict=1)
-			bookings = list(filter(lambda x: x.get("executive") == executive.name or x.get("center") == center.name, bookings))
+			executive = scope.executive
+			bookings = list(filter(lambda x: x.get("executive") == executive or x.get("center") == center, bookings))
 		else:
-			bookings = list(filter(lambda x: x.get("center") == center.name, bookings))
+			bookings = list(filter(lambda x: x.get("center") == center, bookings))
 
 	elif is_executive and not is_marketing_head and "Marketing Head(new)" not in roles:
-		executive = frappe.db.get_value('Executive', {'email': user}, ['name'], as_dict=1)
-		bookings = list(filter(lambda x: x.get("executive") == executive.name, bookings))
+		executive = scope.executive
+		bookings = list(filter(lambda x: x.get("executive") == executive, bookings))
 	
 	# Apply center filtering for Marketing Head(new) role
 	bookings = filter_data_by_assigned_centres(bookings, center_field="center")
 
 	
 			
+	booking_breakdowns = get_booking_breakdowns([surgery.get("patient") for surgery in bookings])
+
 	for surgery in bookings:
-		payment_mode = ""
-		booking_payment = None
-		booking_payment_exists = frappe.db.exists("Payment", {"payment_type": "Costing", "type": "Payment", "patient": surgery.get("patient")}, ["*"])
-		if booking_payment_exists:
-			booking_payment = frappe.get_doc("Payment", {"payment_type": "Costing", "type": "Payment", "patient": surgery.get("patient")}, ["*"])
-			if booking_payment:
-				if booking_payment.get("with_gst_amount") and len(booking_payment.get("gst_payment_entries")) > 0:
-					payment_mode = booking_payment.get("gst_payment_entries")[0].get("method")
-				elif booking_payment.get("without_gst_amount") and len(booking_payment.get("payment_entries")) > 0:
-					payment_mode = booking_payment.get("payment_entries")[0].get("method")
+		booking = booking_breakdowns[surgery.get("patient")]
+		booking_payment = booking.payment
+		payment_mode = booking.payment_mode
 			
 		row = {
 			"month": surgery.get("booking_date").strftime("%B") if surgery.get("booking_date") else "",
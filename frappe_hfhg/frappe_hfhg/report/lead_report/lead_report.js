@@ -4,12 +4,16 @@
 frappe.query_reports["Lead Report"] = {
   onload: async function (report) {
     updateLeadCount(report);
+    addPagingButtons(report, "frappe_hfhg.frappe_hfhg.report.lead_report.lead_report", "after_created_on");
     report.filters.forEach(function (filter) {
       let original_on_change = filter.df.onchange;
       filter.df.onchange = function () {
         if (original_on_change) {
           original_on_change.apply(this, arguments);
         }
+        if (!PAGING_FILTERS.includes(filter.df.fieldname)) {
+          resetPage(report, "after_created_on");
+        }
         updateLeadCount(report);
       };
     });
@@ -229,6 +233,22 @@ frappe.query_reports["Lead Report"] = {
       fieldtype: "Data",
       
     },
+    {
+      fieldname: "page_length",
+      label: __("Rows per Page"),
+      fieldtype: "Int",
+      default: 500,
+    },
+    {
+      fieldname: "after_created_on",
+      fieldtype: "Data",
+      hidden: 1,
+    },
+    {
+      fieldname: "after_name",
+      fieldtype: "Data",
+      hidden: 1,
+    },
   ],
 };
 
@@ -241,6 +261,7 @@ const updateLeadCount = function (report) {
     callback: function (r) {
       if (r.message) {
         let lead_count = r.message[2].lead_count;
+        report.next_cursor = r.message[2].next_cursor;
 
         report.page.wrapper.find(".total-amount-header").remove();
 
@@ -271,3 +292,37 @@ const updateLeadCount = function (report) {
   });
   report.refresh();
 };
+
+const PAGING_FILTERS = ["page_length", "after_created_on", "after_name"];
+
+const addPagingButtons = function (report, method, cursor_field) {
+  report.page.add_inner_button(__("Next Page"), function () {
+    if (!report.next_cursor) {
+      frappe.show_alert({ message: __("This is the last page"), indicator: "orange" });
+      return;
+    }
+    report.set_filter_value(report.next_cursor);
+  });
+  report.page.add_inner_button(__("First Page"), function () {
+    resetPage(report, cursor_field);
+  });
+
+  ["CSV", "Excel"].forEach(function (file_format) {
+    report.page.add_inner_button(
+      __(file_format),
+      function () {
+        let filters = report.get_values();
+        PAGING_FILTERS.forEach((fieldname) => delete filters[fieldname]);
+        let args = new URLSearchParams({ filters: JSON.stringify(filters), file_format: file_format });
+        window.open(`/api/method/${method}.export_report?${args}`);
+      },
+      __("Export")
+    );
+  });
+};
+
+const resetPage = function (report, cursor_field) {
+  if (report.get_filter_value("after_name")) {
+    report.set_filter_value({ [cursor_field]: "", after_name: "" });
+  }
+};
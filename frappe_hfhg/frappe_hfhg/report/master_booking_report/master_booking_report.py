@@ -5,6 +5,8 @@ import datetime
 import frappe
 from frappe import _
 from urllib.parse import quote
+from frappe_hfhg.payment_breakdown import get_booking_breakdowns
+from frappe_hfhg.user_scope import get_user_scope
 
 Filters = frappe._dict
 
@@ -234,8 +236,8 @@ def get_data(filters) -> list[dict]:
 	query = """
         SELECT
 		    c.*, l.mode, l.status as lead_status, l.campaign_name, l.ad_name, l.imported_source, l.full_name, l.active_inactive_status, l.subsource,
-			latest_consultation.date AS consultation_date,
-		    latest_consultation.status AS consultation_status, 
+			l.latest_consultation_date AS consultation_date,
+		    l.latest_consultation_status AS consultation_status, 
 		    latest_surgery.surgery_date,
 		    latest_surgery.surgery_status
 		FROM
@@ -244,12 +246,6 @@ def get_data(filters) -> list[dict]:
 		    `tabLead` l
 		ON
 		    c.patient = l.name
-		LEFT JOIN 
-			(SELECT patient, MAX(date) AS date, status
-				FROM `tabConsultation` 
-				GROUP BY patient) latest_consultation
-		ON 
-			latest_consultation.patient = l.name
 		LEFT JOIN 
 			(SELECT patient, MAX(surgery_date) AS surgery_date, surgery_status
 				FROM `tabSurgery` 
@@ -298,7 +294,7 @@ def get_data(filters) -> list[dict]:
 		params["surgery_status"] = filters["surgery_status"]
 
 	if filters.get("cs_status"):
-		query += " AND latest_consultation.status = %(cs_status)s"
+		query += " AND l.latest_consultation_status = %(cs_status)s"
 		params["cs_status"] = filters["cs_status"]
 
 	bookings = frappe.db.sql(query,params, as_dict=True)
@@ -309,52 +305,35 @@ def get_data(filters) -> list[dict]:
 	# })
 	
 	user = frappe.session.user
-	is_receptionist = frappe.db.exists("Receptionist", {'email': user})
-	is_executive = frappe.db.exists("Executive", {'email': user})
+	scope = get_user_scope(user)
+	is_receptionist = scope.receptionist
+	is_executive = scope.executive
 	roles = frappe.get_roles()
 	is_marketing_head = True if "Marketing Head" in roles else False
 
 	if is_receptionist and not is_marketing_head:
-		receptionist = frappe.db.get_value('Receptionist', {'email': user}, ['name'], as_dict=1)
-		center = frappe.db.get_value('Center', {'receptionist': receptionist.name}, ['name'], as_dict=1)
+		center = scope.receptionist_desk_center
 		if is_executive:
-			executive = frappe.db.get_value('Executive', {'email': user}, ['name'], as_dict=1)
-			new_center = frappe.db.get_value("Center", {"clinic_manager": user}, "name")
-			bookings = list(filter(lambda x: x.get("executive") == executive.name or x.get("center") == new_center, bookings))
+			executive = scope.executive
+			new_center = scope.clinic_manager_center
+			bookings = list(filter(lambda x: x.get("executive") == executive or x.get("center") == new_center, bookings))
 		else:
-			bookings = list(filter(lambda x: x.get("center") == center.name, bookings))
+			bookings = list(filter(lambda x: x.get("center") == center, bookings))
 
 	elif is_executive and not is_marketing_head:
-		executive = frappe.db.get_value('Executive', {'email': user}, ['name'], as_dict=1)
-		bookings = list(filter(lambda x: x.get("executive") == executive.name, bookings))
+		executive = scope.executive
+		bookings = list(filter(lambda x: x.get("executive") == executive, bookings))
 			
+	booking_breakdowns = get_booking_breakdowns([surgery.get("patient") for surgery in bookings])
+
 	for surgery in bookings:
-		payment_mode = ""
-		payment_in = ""
-		booking_gst_amount = 0
-		booking_amount = 0
-		transaction_date = None
-		booking_payment = None
-		lead = frappe.get_doc("Lead", surgery.get("patient"), ["campaign_name","status"])
-		booking_payment_exists = frappe.db.exists("Payment", {"payment_type": "Costing", "type": "Payment", "patient": surgery.get("patient")}, ["*"])
-		if booking_payment_exists:
-			booking_payment = frappe.get_doc("Payment", {"payment_type": "Costing", "type": "Payment", "patient": surgery.get("patient")}, ["*"])
-			if booking_payment:
-				for_gst_booking = 0
-				for_non_gst_booking = 0
-				transaction_date = booking_payment.transaction_date
-				if booking_payment.get("with_gst_amount") and len(booking_payment.get("gst_payment_entries")) > 0:
-					payment_mode = booking_payment.get("gst_payment_entries")[0].get("method")
-					payment_in = booking_payment.get("gst_payment_entries")[0].get("payment_in")
-					for_gst_booking = booking_payment.get("gst_payment_entries")[0].get("amount")
-					booking_gst_amount = booking_payment.get("gst_payment_entries")[0].get("gst_amount")
-				elif booking_payment.get("without_gst_amount") and len(booking_payment.get("payment_entries")) > 0:
-					payment_mode = booking_payment.get("payment_entries")[0].get("method")
-					payment_in = booking_payment.get("payment_entries")[0].get("payment_in")
-					for_non_gst_booking = booking_payment.get("payment_entries")[0].get("amount")
-		booking_amount = int(for_gst_booking) + int(for_non_gst_booking)
+		booking = booking_breakdowns[surgery.get("patient")]
+		payment_mode = booking.payment_mode
+		payment_in = booking.payment_in
+		booking_gst_amount = booking.booking_gst
+		booking_amount = booking.booking_amount
+		transaction_date = booking.transaction_date
 
-		
 		row = {
 			"month": surgery.get("booking_date").strftime("%B") if surgery.get("booking_date") else "",
 			"year": surgery.get("booking_date").strftime("%Y") if surgery.get("booking_date") else "",
@@ -1,21 +1,29 @@
 import frappe
 from frappe import _
+from frappe.utils import cint
 from urllib.parse import quote
+from frappe_hfhg.report_paging import check_export_permission, count_query, export_query, get_next_cursor, paginate_query
+from frappe_hfhg.user_scope import get_user_scope
 
 Filters = frappe._dict
 
+# Pie chart counts, computed in SQL over the whole result rather than the page on screen
+PIE_CHART_AGGREGATES = {
+    "have_costing": "SUM(costing_date IS NOT NULL)",
+    "have_surgery": "SUM(surgery_date IS NOT NULL)",
+    "have_consultation": "SUM(consultation_date IS NOT NULL)",
+    "remaining_leads": "SUM(costing_date IS NULL AND surgery_date IS NULL AND consultation_date IS NULL)",
+}
+
 @frappe.whitelist()
 def execute(filters= None) -> tuple:
-    if isinstance(filters, str):
-        filters = frappe.parse_json(filters)
-    if not filters.to_date or not filters.from_date:
-        frappe.throw(_('"From Date" and "To Date" are mandatory'))	
-    if filters.to_date < filters.from_date:
-        frappe.throw(_('"From Date" cannot be greater than or equal to "To Date"'))
+    filters = validate_filters(filters)
 
     columns = get_columns()
-    data = get_data(filters)
-    pie_chart_data = get_pie_chart_data(data)
+    data, next_cursor = get_data(filters)
+    query, params = get_query(filters)
+    summary = count_query(query, params, PIE_CHART_AGGREGATES)
+    pie_chart_data = get_pie_chart_data(summary)
     chart_data = {
         "data": {
             "labels": list(pie_chart_data.keys()),
@@ -36,8 +44,28 @@ def execute(filters= None) -> tuple:
             }
         }
     }
-    lead_count = len(data)
-    return columns, data, {"lead_count": lead_count}, chart_data
+    lead_count = summary.row_count
+    return columns, data, {"lead_count": lead_count, "next_cursor": next_cursor}, chart_data
+
+@frappe.whitelist()
+def export_report(filters=None, file_format="CSV"):
+    """Download every row matching `filters` as CSV / Excel, streamed from the database in chunks."""
+    check_export_permission("Master Lead Report")
+    filters = validate_filters(filters)
+    query, params = get_query(filters)
+    query += " ORDER BY l.created_on, l.name"
+    return export_query(
+        query, params, get_columns(), lambda lead: build_row(lead, link=False), "Master Lead Report", file_format
+    )
+
+def validate_filters(filters) -> Filters:
+    if isinstance(filters, str):
+        filters = frappe.parse_json(filters)
+    if not filters.to_date or not filters.from_date:
+        frappe.throw(_('"From Date" and "To Date" are mandatory'))	
+    if filters.to_date < filters.from_date:
+        frappe.throw(_('"From Date" cannot be greater than or equal to "To Date"'))
+    return filters
 
 def get_columns() -> list[dict]:
     return [
@@ -199,16 +227,18 @@ def get_columns() -> list[dict]:
         },
     ]
 
-def get_data(filters: Filters) -> list[dict]:
-    if isinstance(filters, str):
-        filters = frappe.parse_json(filters)
-    
-    if filters.to_date < filters.from_date:
-        frappe.throw(_('"From Date" cannot be greater than or equal to "To Date"'))
-    
-    rows = []
-    leads = []
+def get_data(filters: Filters) -> tuple[list[dict], dict | None]:
+    """One page of rows, ordered by (created_on, name), and the cursor of the next page.
 
+    Without `filters.page_length` every matching lead is returned on one page.
+    """
+    query, params = get_query(filters)
+    query, params = paginate_query(query, params, filters, "l.created_on", "l.name", "after_created_on")
+    leads = frappe.db.sql(query, params, as_dict=True)
+    next_cursor = get_next_cursor(leads, filters, "created_on", "name", "after_created_on")
+    return [build_row(lead) for lead in leads], next_cursor
+
+def get_query(filters: Filters) -> tuple[str, dict]:
     query = """
         SELECT 
             l.name, l.source, l.subsource, l.campaign_name, l.contact_number, l.city, l.center, l.imported_source,
@@ -217,9 +247,9 @@ def get_data(filters: Filters) -> list[dict]:
             latest_surgery.surgery_date, 
             latest_costing.booking_date AS costing_date,
             latest_costing.book_date,
-            latest_consultation.date AS consultation_date,
+            l.latest_consultation_date AS consultation_date,
             latest_surgery.surgery_status,
-            latest_consultation.status as cs_status
+            l.latest_consultation_status as cs_status
         FROM 
             `tabLead` l
         LEFT JOIN 
@@ -234,12 +264,6 @@ def get_data(filters: Filters) -> list[dict]:
              GROUP BY patient) latest_costing
         ON 
             latest_costing.patient = l.name
-        LEFT JOIN 
-            (SELECT patient, MAX(date) AS date, status
-             FROM `tabConsultation` 
-             GROUP BY patient) latest_consultation
-        ON 
-            latest_consultation.patient = l.name
         LEFT JOIN
             `tabMeta Ads` ad ON ad.name = l.ad_name
         WHERE 
@@ -288,7 +312,7 @@ def get_data(filters: Filters) -> list[dict]:
         params["surgery_status"] = filters["surgery_status"]
 
     if filters.get("cs_status"):
-        query += " AND latest_consultation.status = %(cs_status)s"
+        query += " AND l.latest_consultation_status = %(cs_status)s"
         params["cs_status"] = filters["cs_status"]
 
     if filters.get("source_reference"):
@@ -300,18 +324,19 @@ def get_data(filters: Filters) -> list[dict]:
         params["ad_name"] = f"%{filters['ad_name']}%"
 
     user = frappe.session.user
-    is_receptionist = frappe.db.exists("Receptionist", {"email": user})
-    is_executive = frappe.db.exists("Executive", {"email": user})
+    scope = get_user_scope(user)
+    is_receptionist = scope.receptionist
+    is_executive = scope.executive
     roles = frappe.get_roles()
     is_marketing_head = "Marketing Head" in roles
 
     if is_receptionist and not is_marketing_head:
-        receptionist = frappe.db.get_value("Receptionist", {"email": user}, "name")
+        receptionist = scope.receptionist
         if receptionist:
-            center = frappe.db.get_value("Center", {"receptionist": receptionist}, "name")
+            center = scope.receptionist_desk_center
             if is_executive:
-                executive = frappe.db.get_value("Executive", {"email": user}, "name")
-                new_center = frappe.db.get_value("Center", {"clinic_manager": user}, "name")
+                executive = scope.executive
+                new_center = scope.clinic_manager_center
                 if executive:
                     query += " AND (l.executive = %(executive)s OR l.center = %(center)s)"
                     params["executive"] = executive
@@ -322,7 +347,7 @@ def get_data(filters: Filters) -> list[dict]:
                     params["center"] = center
 
     elif is_executive and not is_marketing_head:
-        executive = frappe.db.get_value("Executive", {"email": user}, "name")
+        executive = scope.executive
         if executive:
             query += " AND l.executive = %(executive)s"
             params["executive"] = executive
@@ -338,69 +363,49 @@ def get_data(filters: Filters) -> list[dict]:
         query += " AND latest_costing.booking_date IS NULL"
 
     if filters.get("have_consultation") == "Yes":
-        query += " AND latest_consultation.date IS NOT NULL"
+        query += " AND l.latest_consultation_date IS NOT NULL"
     elif filters.get("have_consultation") == "No":
-        query += " AND latest_consultation.date IS NULL"
-
-    leads = frappe.db.sql(query, params, as_dict=True)
-
-    for lead in leads:
-        row = {
-            "month": lead.get("created_on").strftime("%B"),
-            "year": lead.get("created_on").strftime("%Y"),
-            "created_on": lead.get("created_on"),
-            "source": lead.get("source"),
-            "subsource": lead.get("subsource") if lead.get("source") == "Meta" else "",
-            "imported_source": lead.get("imported_source"),
-            "campaign_name": lead.get("campaign_name"),
-            "name": f'<strong><a href="/app/lead/{quote(lead.get("name"), safe="")}" style="color: inherit;">{lead.get("full_name")}</a></strong>',
-            "phone_no": lead.get("contact_number"),
-            "city": lead.get("city"),
-            "center": lead.get("center"),
-            "distance": lead.get("distance"),
-            "executive": lead.get("executive"),
-            "assign_by": lead.get("assign_by"),
-            "mode": lead.get("mode"),
-            "service": lead.get("service"),
-            "status": lead.get("status"),
-            "active_inactive_status": lead.get("active_inactive_status"),
-            "costing_date": lead.get("costing_date"),
-            "book_date": lead.get("book_date"),
-            "surgery_date": lead.get("surgery_date"),
-            "consultation_date": lead.get("consultation_date"),
-            "source_reference": lead.get("source_reference"),
-            "surgery_status": lead.get("surgery_status"),
-            "cs_status": lead.get("cs_status"),
-            "ad_name": lead.get("ad_name")
-        }
-        rows.append(row)
-    rows = sorted(rows, key=lambda x: x.get("created_on") or "")
-
-    return rows
-
-def get_pie_chart_data(data):
-    counts = {
-        "Have Costing": 0,
-        "Have Surgery": 0,
-        "Have Consultation": 0,
-        "Remaining Leads": 0,  # New category for leads without any conversion
+        query += " AND l.latest_consultation_date IS NULL"
+
+    return query, params
+
+def build_row(lead, link=True) -> dict:
+    return {
+        "month": lead.get("created_on").strftime("%B"),
+        "year": lead.get("created_on").strftime("%Y"),
+        "created_on": lead.get("created_on"),
+        "source": lead.get("source"),
+        "subsource": lead.get("subsource") if lead.get("source") == "Meta" else "",
+        "imported_source": lead.get("imported_source"),
+        "campaign_name": lead.get("campaign_name"),
+        "name": get_lead_link(lead) if link else lead.get("full_name"),
+        "phone_no": lead.get("contact_number"),
+        "city": lead.get("city"),
+        "center": lead.get("center"),
+        "distance": lead.get("distance"),
+        "executive": lead.get("executive"),
+        "assign_by": lead.get("assign_by"),
+        "mode": lead.get("mode"),
+        "service": lead.get("service"),
+        "status": lead.get("status"),
+        "active_inactive_status": lead.get("active_inactive_status"),
+        "costing_date": lead.get("costing_date"),
+        "book_date": lead.get("book_date"),
+        "surgery_date": lead.get("surgery_date"),
+        "consultation_date": lead.get("consultation_date"),
+        "source_reference": lead.get("source_reference"),
+        "surgery_status": lead.get("surgery_status"),
+        "cs_status": lead.get("cs_status"),
+        "ad_name": lead.get("ad_name")
     }
 
-    for lead in data:
-        has_costing = bool(lead.get("costing_date"))
-        has_surgery = bool(lead.get("surgery_date"))
-        has_consultation = bool(lead.get("consultation_date"))
-
-        if has_costing:
-            counts["Have Costing"] += 1
-        if has_surgery:
-            counts["Have Surgery"] += 1
-        if has_consultation:
-            counts["Have Consultation"] += 1
-        
-        # If the lead has none of the three, classify it as "Not Converted"
-        if not (has_costing or has_surgery or has_consultation):
-            counts["Remaining Leads"] += 1
-
-    return counts
+def get_lead_link(lead) -> str:
+    return f'<strong><a href="/app/lead/{quote(lead.get("name"), safe="")}" style="color: inherit;">{lead.get("full_name")}</a></strong>'
 
+def get_pie_chart_data(summary):
+    return {
+        "Have Costing": cint(summary.get("have_costing")),
+        "Have Surgery": cint(summary.get("have_surgery")),
+        "Have Consultation": cint(summary.get("have_consultation")),
+        "Remaining Leads": cint(summary.get("remaining_leads")),  # Leads without any conversion
+    }
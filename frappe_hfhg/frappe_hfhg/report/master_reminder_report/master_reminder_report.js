@@ -28,12 +28,16 @@ frappe.query_reports["Master Reminder Report"] = {
       }
     }
     updateReminderCount(report);
+    addPagingButtons(report, "frappe_hfhg.frappe_hfhg.report.master_reminder_report.master_reminder_report", "after_date");
     report.filters.forEach(function (filter) {
       let original_on_change = filter.df.onchange;
       filter.df.onchange = function () {
         if (original_on_change) {
           original_on_change.apply(this, arguments);
         }
+        if (!PAGING_FILTERS.includes(filter.df.fieldname)) {
+          resetPage(report, "after_date");
+        }
         updateReminderCount(report);
       };
     });
@@ -137,6 +141,22 @@ frappe.query_reports["Master Reminder Report"] = {
       label: __("Surgery Date"),
       fieldtype: "Date",
     },
+    {
+      fieldname: "page_length",
+      label: __("Rows per Page"),
+      fieldtype: "Int",
+      default: 500,
+    },
+    {
+      fieldname: "after_date",
+      fieldtype: "Data",
+      hidden: 1,
+    },
+    {
+      fieldname: "after_name",
+      fieldtype: "Data",
+      hidden: 1,
+    },
   ],
 };
 
@@ -150,6 +170,7 @@ const updateReminderCount = function (report) {
     callback: function (r) {
       if (r.message) {
         let reminder_count = r.message[2].reminder_count;
+        report.next_cursor = r.message[2].next_cursor;
 
         report.page.wrapper.find(".total-amount-header").remove();
 
@@ -180,3 +201,37 @@ const updateReminderCount = function (report) {
   });
   report.refresh();
 };
+
+const PAGING_FILTERS = ["page_length", "after_date", "after_name"];
+
+const addPagingButtons = function (report, method, cursor_field) {
+  report.page.add_inner_button(__("Next Page"), function () {
+    if (!report.next_cursor) {
+      frappe.show_alert({ message: __("This is the last page"), indicator: "orange" });
+      return;
+    }
+    report.set_filter_value(report.next_cursor);
+  });
+  report.page.add_inner_button(__("First Page"), function () {
+    resetPage(report, cursor_field);
+  });
+
+  ["CSV", "Excel"].forEach(function (file_format) {
+    report.page.add_inner_button(
+      __(file_format),
+      function () {
+        let filters = report.get_values();
+        PAGING_FILTERS.forEach((fieldname) => delete filters[fieldname]);
+        let args = new URLSearchParams({ filters: JSON.stringify(filters), file_format: file_format });
+        window.open(`/api/method/${method}.export_report?${args}`);
+      },
+      __("Export")
+    );
+  });
+};
+
+const resetPage = function (report, cursor_field) {
+  if (report.get_filter_value("after_name")) {
+    report.set_filter_value({ [cursor_field]: "", after_name: "" });
+  }
+};
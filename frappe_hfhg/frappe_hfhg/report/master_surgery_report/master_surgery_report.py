@@ -5,6 +5,8 @@ import frappe
 from frappe import _
 from urllib.parse import quote
 from pypika.functions import Max
+from frappe_hfhg.payment_breakdown import get_booking_breakdowns, get_surgery_breakdowns
+from frappe_hfhg.user_scope import get_user_scope
 
 Filters = frappe._dict
 
@@ -315,11 +317,11 @@ def get_data(filters) -> list[dict]:
 		    l.full_name,l.campaign_name,ad.ads_name as ad_name,
 		    l.name as lead_name,l.source_reference,
 			l.mode, l.imported_source, l.active_inactive_status, l.subsource,
-		    latest_consultation.date AS consultation_date,latest_consultation.status as cs_status,
+		    l.latest_consultation_date AS consultation_date,l.latest_consultation_status as cs_status,
 			c.booking_date as prospect_date,
 			c.booking_transaction_date,
 			c.total_amount as package,
-			p.payment_confirmation
+			s.latest_payment_confirmation as payment_confirmation
 		FROM
 		    `tabSurgery` s
 		LEFT JOIN
@@ -334,31 +336,6 @@ def get_data(filters) -> list[dict]:
 		    `tabCosting` c
 		ON
 		    c.name = s.name
-		LEFT JOIN
-		    (SELECT patient, MAX(date) AS date, status
-            FROM `tabConsultation` 
-            GROUP BY patient) latest_consultation
-		ON
-		    latest_consultation.patient = s.patient
-		LEFT JOIN (
-            SELECT 
-                patient, 
-                payment_confirmation
-            FROM 
-                `tabPayment`
-            WHERE 
-                payment_type = 'Surgery'
-                AND type = 'Payment'
-                AND creation = (
-                    SELECT MAX(creation)
-                    FROM `tabPayment` AS p2
-                    WHERE 
-                        p2.patient = `tabPayment`.patient
-                        AND p2.payment_type = 'Surgery'
-                        AND p2.type = 'Payment'
-                )
-            ) p ON p.patient = s.patient
-
 		WHERE
 		    s.surgery_date BETWEEN %(from_date)s AND %(to_date)s		
     """
@@ -400,7 +377,7 @@ def get_data(filters) -> list[dict]:
 		params["mode"] = f"%{filters['mode']}%"
 
 	if filters.get("cs_status"):
-		query += " AND latest_consultation.status = %(cs_status)s"
+		query += " AND l.latest_consultation_status = %(cs_status)s"
 		params["cs_status"] = filters["cs_status"]
 
 	if filters.get("technique"):
@@ -408,23 +385,24 @@ def get_data(filters) -> list[dict]:
 		params["technique"] = filters["technique"]
 
 	if filters.get("payment_confirmation"):
-		query += " AND p.payment_confirmation = %(payment_confirmation)s"
+		query += " AND s.latest_payment_confirmation = %(payment_confirmation)s"
 		params["payment_confirmation"] = filters["payment_confirmation"]
 		
 	
 	user = frappe.session.user
-	is_receptionist = frappe.db.exists("Receptionist", {'email': user})
-	is_executive = frappe.db.exists("Executive", {'email': user})
+	scope = get_user_scope(user)
+	is_receptionist = scope.receptionist
+	is_executive = scope.executive
 	roles = frappe.get_roles()
 	is_marketing_head = True if "Marketing Head" in roles else False
 
 	if is_receptionist and not is_marketing_head:
-		receptionist = frappe.db.get_value("Receptionist", {"email": user}, "name")
+		receptionist = scope.receptionist
 		if receptionist:
-			center = frappe.db.get_value("Center", {"receptionist": receptionist}, "name")
+			center = scope.receptionist_desk_center
 			if is_executive:
-				executive = frappe.db.get_value("Executive", {"email": user}, ["name"], as_dict=1)
-				new_center = frappe.db.get_value("Center", {"clinic_manager": user}, "name")
+				executive = scope.executive
+				new_center = scope.clinic_manager_center
 				if executive:
 					query += " AND (s.executive = %(executive)s OR s.center = %(center)s)"
 					params["executive"] = executive
@@ -434,7 +412,7 @@ def get_data(filters) -> list[dict]:
 					query += " AND s.center = %(center)s"
 					params["center"] = center
 	elif is_executive and not is_marketing_head:
-		executive = frappe.db.get_value("Executive", {"email": user}, "name")
+		executive = scope.executive
 		if executive:
 			query += " AND s.executive = %(executive)s"
 			params["executive"] = executive
@@ -462,93 +440,23 @@ def get_data(filters) -> list[dict]:
 	# if filters.source:
 	# 	surgeries = list(filter(lambda x: filters.source in x.get("source", ""), surgeries))
 			
+	# Booking / surgery payments with their entries and refunds for all rows at once
+	surgery_names = [surgery.get("name") for surgery in surgeries]
+	booking_breakdowns = get_booking_breakdowns(surgery_names)
+	surgery_breakdowns = get_surgery_breakdowns(surgery_names)
+
 	for surgery in surgeries:
-		payment_mode = ""
-		payment_in = ""
-		booking_payment = None
-		booking_gst_amount = 0
-		booking_amount = 0
-		cash, gst, card, online_llp, refund_amount = 0, 0, 0, 0, 0
-
-		booking_payment_exists = frappe.db.exists("Payment", {"payment_type": "Costing", "type": "Payment", "patient": surgery.get("name")})
-
-		if booking_payment_exists:
-			booking_payment = frappe.get_doc("Payment", {"payment_type": "Costing", "type": "Payment", "patient": surgery.get("name")}, ["*"])
-			if booking_payment:
-				for_gst_booking = 0
-				for_non_gst_booking = 0
-				gst_entries = booking_payment.get("gst_payment_entries", [])
-				non_gst_entries = booking_payment.get("payment_entries", [])
-
-				if booking_payment.get("with_gst_amount") and gst_entries:
-					payment_mode = gst_entries[0].get("method")
-					payment_in = gst_entries[0].get("payment_in")
-					for_gst_booking = gst_entries[0].get("amount")
-					booking_gst_amount = gst_entries[0].get("gst_amount")
-				elif booking_payment.get("without_gst_amount") and non_gst_entries:
-					payment_mode = non_gst_entries[0].get("method")
-					payment_in = non_gst_entries[0].get("payment_in")
-					for_non_gst_booking = non_gst_entries[0].get("amount")
-				
-				booking_amount = int(for_gst_booking) + int(for_non_gst_booking)
-		
-		payments = frappe.get_all("Payment", fields=["*"], filters={
-			"payment_type": "Surgery",
-			"type": "Payment",
-			"patient": surgery.get("name")
-		})
-		surgery_payment_mode_list = []
-		surgery_payment_in_list = []
-        
-
-		for payment in payments:
-			payment_doc = frappe.get_doc("Payment", payment.get("name"))
-			gst_entries = payment_doc.get("gst_payment_entries", [])
-			non_gst_entries = payment_doc.get("payment_entries", [])
-
-			# GST Payment Entries
-			for entry in gst_entries:
-					gst += entry.get("gst_amount", 0)
-					if entry.get("method") == "Cash":
-							cash += entry.get("amount", 0)
-					elif entry.get("method") == "Card":
-							card += entry.get("amount", 0)
-					else:
-							online_llp += entry.get("amount", 0)
-					method = entry.get("method")
-					if method:
-						surgery_payment_mode_list.append(method)
-					surgery_payment_in = entry.get("payment_in")
-					if surgery_payment_in:
-						surgery_payment_in_list.append(surgery_payment_in)
-                  
-
-			# Non-GST Payment Entries
-			for entry in non_gst_entries:
-					if entry.get("method") == "Cash":
-							cash += entry.get("amount", 0)
-					elif entry.get("method") == "Card":
-							card += entry.get("amount", 0)
-					else:
-							online_llp += entry.get("amount", 0)
-					method = entry.get("method")
-					if method:
-						surgery_payment_mode_list.append(method)
-					surgery_payment_in = entry.get("payment_in")
-					if surgery_payment_in:
-						surgery_payment_in_list.append(surgery_payment_in)
-	
-		refunds = []
-		payment_names = [payment["name"] for payment in payments]
-		if payment_names:
-			refunds = frappe.get_all(
-					"Payment",
-					fields=["with_gst_amount", "without_gst_amount"],
-					filters={"refund_payment_id": ["in", payment_names]},
-			)
-			refund_amount = sum(
-					refund.get("with_gst_amount", 0) + refund.get("without_gst_amount", 0) for refund in refunds
-			)
+		booking = booking_breakdowns[surgery.get("name")]
+		booking_payment = booking.payment
+		payment_mode = booking.payment_mode
+		payment_in = booking.payment_in
+		booking_amount = booking.booking_amount
+		booking_gst_amount = booking.booking_gst
+
+		summary = surgery_breakdowns[surgery.get("name")]
+		cash, gst, card, online_llp, refund_amount = summary.cash, summary.gst, summary.card, summary.online_llp, summary.refund
+		surgery_payment_mode_list = summary.payment_modes
+		surgery_payment_in_list = summary.payment_ins
 
 		# for payment in payments:
 		# 	ruffs = frappe.get_all("Payment", fields=["with_gst_amount", "without_gst_amount"], filters={
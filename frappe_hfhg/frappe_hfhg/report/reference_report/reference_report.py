@@ -5,6 +5,7 @@ import frappe
 from frappe import _
 from urllib.parse import quote
 from frappe_hfhg.frappe_hfhg.doctype.centre_assignment.centre_assignment import get_assigned_centres_for_user
+from frappe_hfhg.user_scope import get_user_scope
 
 Filters = frappe._dict
 
@@ -152,20 +153,20 @@ def get_data(filters: Filters) -> list[dict]:
 		lead_filters["name"] = ["like", f"%{filters.patient}%"]
 		
 	user = frappe.session.user
-	is_receptionist = frappe.db.exists("Receptionist", {'email': user})
-	is_executive = frappe.db.exists("Executive", {'email': user})
+	scope = get_user_scope(user)
+	is_receptionist = scope.receptionist
+	is_executive = scope.executive
 	roles = frappe.get_roles()
 	is_marketing_head = True if "Marketing Head" in roles else False
 
 	if is_receptionist and not is_marketing_head and "Marketing Head(new)" not in roles:
-		receptionist = frappe.db.get_value('Receptionist', {'email': user}, ['name'], as_dict=1)
-		center = frappe.db.get_value('Center', {'receptionist': receptionist.name}, ['name'], as_dict=1)
-		lead_filters["center"] = center.name
+		center = scope.receptionist_desk_center
+		lead_filters["center"] = center
 		leads = frappe.get_all("Lead", fields=["*"], filters=lead_filters)
 
 	elif is_executive and not is_marketing_head and "Marketing Head(new)" not in roles:
-		executive = frappe.db.get_value('Executive', {'email': user}, ['name'], as_dict=1)
-		lead_filters["executive"] = executive.name
+		executive = scope.executive
+		lead_filters["executive"] = executive
 		leads = frappe.get_all("Lead", fields=["*"], filters=lead_filters)
 
 	elif "Marketing Head(new)" in roles:
@@ -7,28 +7,44 @@ from frappe.email.receive import add_days
 from frappe.utils import getdate
 from frappe.utils.data import today
 from frappe_hfhg.frappe_hfhg.doctype.centre_assignment.centre_assignment import apply_marketing_head_center_filter
+from frappe_hfhg.report_paging import check_export_permission, count_query, export_query, get_next_cursor, paginate_query
+from frappe_hfhg.user_scope import get_user_scope
 
 Filters = frappe._dict
 
 @frappe.whitelist()
 def execute(filters= None) -> tuple:
+	filters = validate_filters(filters)
+
+	columns = get_columns()
+	data, next_cursor = get_data(filters)
+
+	if next_cursor or filters.get("after_name"):
+		query, params = get_query(filters)
+		reminder_count = count_query(query, params).row_count
+	else:
+		reminder_count = len(data)
+	return columns, data, {"reminder_count": reminder_count, "next_cursor": next_cursor}
+
+@frappe.whitelist()
+def export_report(filters=None, file_format="CSV"):
+	"""Download every reminder matching `filters` as CSV / Excel, streamed from the database in chunks."""
+	check_export_permission("Reminder Report")
+	filters = validate_filters(filters)
+	query, params = get_query(filters)
+	query += " ORDER BY rm.date, rm.name"
+	return export_query(query, params, get_columns(), build_row, "Reminder Report", file_format)
+
+def validate_filters(filters) -> Filters:
 	if isinstance(filters, str):
 		filters = frappe.parse_json(filters)
 	if not filters.to_date or not filters.from_date:
 		frappe.throw(_('"From Date" and "To Date" are mandatory'))
 	if filters.to_date < filters.from_date:
 		frappe.throw(_('"From Date" can not be greater than or equal to "To Date"'))
-	if "from_date" in filters and "to_date" in filters:
-		from_date = getdate(filters["from_date"])
-		to_date = getdate(filters["to_date"])
-		if (to_date - from_date).days > 3:
-			frappe.throw("Date range cannot be more than 3 days.")
-
-	columns = get_columns()
-	data = get_data(filters)
-
-	reminder_count = len(data)
-	return columns, data, {"reminder_count": reminder_count}
+	if (getdate(filters.to_date) - getdate(filters.from_date)).days > 3:
+		frappe.throw("Date range cannot be more than 3 days.")
+	return filters
 
 @frappe.whitelist()
 def get_reminder_count(filters=None):
@@ -230,12 +246,13 @@ def get_query_filters(filters):
 		reminder_filters["surgery.surgery_status"] = filters.surgery_status
 
 	user = frappe.session.user
-	is_executive = frappe.db.exists("Executive", {'email': user})
+	scope = get_user_scope(user)
+	is_executive = scope.executive
 	roles = frappe.get_roles()
 	is_marketing_head = "Marketing Head" in roles
 	
 	if is_executive and not is_marketing_head:
-			executive = frappe.db.get_value('Executive', {'email': user}, ['name', 'fullname'], as_dict=1)
+			executive = frappe._dict(name=scope.executive, fullname=scope.executive_fullname)
 			if executive:
 					reminder_filters["executive"] = ["in", [executive.name, executive.fullname]]
 	
@@ -243,6 +260,17 @@ def get_query_filters(filters):
 
 
 def get_data(filters):
+    """One page of reminders, ordered by (date, name), and the cursor of the next page.
+
+    Without `filters.page_length` every matching reminder is returned on one page.
+    """
+    query, params = get_query(filters)
+    query, params = paginate_query(query, params, filters, "rm.date", "rm.name", "after_date")
+    rows = frappe.db.sql(query, params, as_dict=True)
+    next_cursor = get_next_cursor(rows, filters, "date", "reminder_id", "after_date")
+    return [build_row(row) for row in rows], next_cursor
+
+def get_query(filters):
     if filters.to_date < filters.from_date:
         frappe.throw(_('"From Date" cannot be greater than or equal to "To Date"'))
 
@@ -360,12 +388,13 @@ def get_data(filters):
         params["executive_like"] = f"%{executive}%"
 
     user = frappe.session.user
-    is_executive = frappe.db.exists("Executive", {'email': user})
+    scope = get_user_scope(user)
+    is_executive = scope.executive
     roles = frappe.get_roles()
     is_marketing_head = "Marketing Head" in roles
     
     if is_executive and not is_marketing_head and "Marketing Head(new)" not in roles:
-        executive = frappe.db.get_value('Executive', {'email': user}, ['name', 'fullname'], as_dict=1)
+        executive = frappe._dict(name=scope.executive, fullname=scope.executive_fullname)
         if executive and executive.get("name") and executive.get("fullname"):
             query += " AND rm.executive IN (%(executive_name)s, %(executive_fullname)s)"
             params["executive_name"] = executive["name"]
@@ -374,33 +403,29 @@ def get_data(filters):
     # Apply center filtering for Marketing Head(new) role
     query, params = apply_marketing_head_center_filter(query, params, center_field="center", table_alias="rm")
 
-    rows = frappe.db.sql(query, params, as_dict=True)
-
-    final_rows = []
-    for row in rows:
-        new_row = {
-            "date": row.date,
-            "patient_name": row.full_name,
-            "executive": row.executive,
-            "description": row.description,
-            "status": row.status,
-            "lead": row.lead,
-            "contact_number": row.contact_number,
-            "alternative_number": row.alternative_number,
-            "service": row.service,
-            "city": row.city,
-            "center": row.center,
-            "distance": row.distance,
-            "lead_status": row.lead_status,
-            "active_inactive_status": row.active_inactive_status,
-            "mode": row.mode,
-            "source": row.source,
-            "subsource": row.subsource if row.source == "Meta" else "",
-            "cs_date": row.cs_date,
-            "cs_status": row.cs_status,
-            "surgery_date": row.surgery_date,
-            "surgery_status": row.surgery_status
-        }
-        final_rows.append(new_row)
+    return query, params
 
-    return final_rows
+def build_row(row):
+    return {
+        "date": row.date,
+        "patient_name": row.full_name,
+        "executive": row.executive,
+        "description": row.description,
+        "status": row.status,
+        "lead": row.lead,
+        "contact_number": row.contact_number,
+        "alternative_number": row.alternative_number,
+        "service": row.service,
+        "city": row.city,
+        "center": row.center,
+        "distance": row.distance,
+        "lead_status": row.lead_status,
+        "active_inactive_status": row.active_inactive_status,
+        "mode": row.mode,
+        "source": row.source,
+        "subsource": row.subsource if row.source == "Meta" else "",
+        "cs_date": row.cs_date,
+        "cs_status": row.cs_status,
+        "surgery_date": row.surgery_date,
+        "surgery_status": row.surgery_status
+    }
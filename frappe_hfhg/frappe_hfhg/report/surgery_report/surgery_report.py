@@ -6,6 +6,8 @@ from frappe import _
 from urllib.parse import quote
 from pypika.functions import Max
 from frappe_hfhg.frappe_hfhg.doctype.centre_assignment.centre_assignment import apply_marketing_head_center_filter
+from frappe_hfhg.payment_breakdown import get_booking_breakdowns, get_surgery_breakdowns
+from frappe_hfhg.user_scope import get_user_scope
 
 Filters = frappe._dict
 
@@ -235,7 +237,7 @@ def get_data(filters) -> list[dict]:
 			l.status as lead_status,
 		    l.full_name,l.campaign_name,
 		    l.name as lead_name,l.source_reference,l.mode, l.active_inactive_status, 
-		    latest_consultation.date AS consultation_date,latest_consultation.status as cs_status,
+		    l.latest_consultation_date AS consultation_date,l.latest_consultation_status as cs_status,
 			c.booking_date as prospect_date,
 			c.booking_transaction_date,
 			c.total_amount as package
@@ -249,12 +251,6 @@ def get_data(filters) -> list[dict]:
 		    `tabCosting` c
 		ON
 		    c.name = s.name
-		LEFT JOIN
-		    (SELECT patient, MAX(date) AS date, status
-            FROM `tabConsultation` 
-            GROUP BY patient) latest_consultation
-		ON
-		    latest_consultation.patient = s.patient
 		WHERE
 		    s.surgery_date BETWEEN %(from_date)s AND %(to_date)s		
     """
@@ -292,7 +288,7 @@ def get_data(filters) -> list[dict]:
 		params["mode"] = f"%{filters['mode']}%"
 
 	if filters.get("cs_status"):
-		query += " AND latest_consultation.status = %(cs_status)s"
+		query += " AND l.latest_consultation_status = %(cs_status)s"
 		params["cs_status"] = filters["cs_status"]
 
 	if filters.get("technique"):
@@ -301,18 +297,19 @@ def get_data(filters) -> list[dict]:
 		
 	
 	user = frappe.session.user
-	is_receptionist = frappe.db.exists("Receptionist", {'email': user})
-	is_executive = frappe.db.exists("Executive", {'email': user})
+	scope = get_user_scope(user)
+	is_receptionist = scope.receptionist
+	is_executive = scope.executive
 	roles = frappe.get_roles()
 	is_marketing_head = True if "Marketing Head" in roles else False
 
 	if is_receptionist and not is_marketing_head and "Marketing Head(new)" not in roles:
-		receptionist = frappe.db.get_value("Receptionist", {"email": user}, "name")
+		receptionist = scope.receptionist
 		if receptionist:
-			center = frappe.db.get_value("Center", {"receptionist": receptionist}, "name")
+			center = scope.receptionist_desk_center
 			if is_executive:
-				executive = frappe.db.get_value("Executive", {"email": user}, ["name"], as_dict=1)
-				new_center = frappe.db.get_value("Center", {"clinic_manager": user}, "name")
+				executive = scope.executive
+				new_center = scope.clinic_manager_center
 				if executive:
 					query += " AND s.center = %(center)s"
 					params["center"] = new_center
@@ -321,7 +318,7 @@ def get_data(filters) -> list[dict]:
 					query += " AND s.center = %(center)s"
 					params["center"] = center
 	elif is_executive and not is_marketing_head and "Marketing Head(new)" not in roles:
-		executive = frappe.db.get_value("Executive", {"email": user}, "name")
+		executive = scope.executive
 		if executive:
 			query += " AND s.executive = %(executive)s"
 			params["executive"] = executive
@@ -352,70 +349,18 @@ def get_data(filters) -> list[dict]:
 	# if filters.source:
 	# 	surgeries = list(filter(lambda x: filters.source in x.get("source", ""), surgeries))
 			
+	# Booking / surgery payments with their entries and refunds for all rows at once
+	booking_breakdowns = get_booking_breakdowns([surgery.get("patient") for surgery in surgeries])
+	surgery_breakdowns = get_surgery_breakdowns([surgery.get("name") for surgery in surgeries])
+
 	for surgery in surgeries:
-		payment_mode = ""
-		payment_in = ""
-		booking_payment = None
-		booking_gst_amount = 0
-		cash, gst, card, online_llp, refund_amount = 0, 0, 0, 0, 0
-
-		booking_payment_exists = frappe.db.exists("Payment", {"payment_type": "Costing", "type": "Payment", "patient": surgery.get("patient")})
-
-		if booking_payment_exists:
-			booking_payment = frappe.get_doc("Payment", {"payment_type": "Costing", "type": "Payment", "patient": surgery.get("patient")}, ["*"])
-			if booking_payment:
-				gst_entries = booking_payment.get("gst_payment_entries", [])
-				non_gst_entries = booking_payment.get("payment_entries", [])
-
-				if booking_payment.get("with_gst_amount") and gst_entries:
-					payment_mode = gst_entries[0].get("method")
-					payment_in = gst_entries[0].get("payment_in")
-					booking_gst_amount = gst_entries[0].get("gst_amount")
-				elif booking_payment.get("without_gst_amount") and non_gst_entries:
-					payment_mode = non_gst_entries[0].get("method")
-					payment_in = non_gst_entries[0].get("payment_in")
-		
-		payments = frappe.get_all("Payment", fields=["*"], filters={
-			"payment_type": "Surgery",
-			"type": "Payment",
-			"patient": surgery.get("name")
-		})
-
-		for payment in payments:
-			payment_doc = frappe.get_doc("Payment", payment.get("name"))
-			gst_entries = payment_doc.get("gst_payment_entries", [])
-			non_gst_entries = payment_doc.get("payment_entries", [])
-
-			# GST Payment Entries
-			for entry in gst_entries:
-					gst += entry.get("gst_amount", 0)
-					if entry.get("method") == "Cash":
-							cash += entry.get("amount", 0)
-					elif entry.get("method") == "Card":
-							card += entry.get("amount", 0)
-					else:
-							online_llp += entry.get("amount", 0)
-
-			# Non-GST Payment Entries
-			for entry in non_gst_entries:
-					if entry.get("method") == "Cash":
-							cash += entry.get("amount", 0)
-					elif entry.get("method") == "Card":
-							card += entry.get("amount", 0)
-					else:
-							online_llp += entry.get("amount", 0)
-	
-		refunds = []
-		payment_names = [payment["name"] for payment in payments]
-		if payment_names:
-			refunds = frappe.get_all(
-					"Payment",
-					fields=["with_gst_amount", "without_gst_amount"],
-					filters={"refund_payment_id": ["in", payment_names]},
-			)
-			refund_amount = sum(
-					refund.get("with_gst_amount", 0) + refund.get("without_gst_amount", 0) for refund in refunds
-			)
+		booking = booking_breakdowns[surgery.get("patient")]
+		payment_mode = booking.payment_mode
+		payment_in = booking.payment_in
+		booking_gst_amount = booking.booking_gst
+
+		summary = surgery_breakdowns[surgery.get("name")]
+		cash, gst, card, online_llp, refund_amount = summary.cash, summary.gst, summary.card, summary.online_llp, summary.refund
 
 		# for payment in payments:
 		# 	ruffs = frappe.get_all("Payment", fields=["with_gst_amount", "without_gst_amount"], filters={
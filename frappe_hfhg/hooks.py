@@ -132,10 +132,68 @@ doc_events = {
         # "after_insert": "frappe_hfhg.tasks.whatsapp_message_notification"
     },
     "Meta Ads": {
-        "validate": ["frappe_hfhg.api.meta_ads.clean_meta_ads_name"],
+        "validate": [
+            "frappe_hfhg.api.meta_ads.clean_meta_ads_name",
+            "frappe_hfhg.api.meta_ads.set_meta_ads_keys",
+        ],
     },
     "Lead": {
         "after_insert": ["frappe_hfhg.api.after_insert_lead_logs"],
+        "on_update": [
+            "frappe_hfhg.api.whatsapp.clear_lead_number_cache",
+            "frappe_hfhg.frappe_hfhg.doctype.ad_attribution_daily.ad_attribution_daily.queue_ad_attribution_refresh",
+            "frappe_hfhg.api.calendar.invalidate_lead_calendar_months",
+        ],
+        "after_rename": ["frappe_hfhg.api.calendar.invalidate_lead_calendar_months"],
+        "on_trash": [
+            "frappe_hfhg.api.whatsapp.clear_lead_number_cache",
+            "frappe_hfhg.frappe_hfhg.doctype.ad_attribution_daily.ad_attribution_daily.queue_ad_attribution_refresh",
+            "frappe_hfhg.api.calendar.invalidate_lead_calendar_months",
+        ],
+    },
+    "Surgery": {
+        "on_update": [
+            "frappe_hfhg.api.calendar.update_income_till_date",
+            "frappe_hfhg.api.calendar.invalidate_calendar_months",
+            "frappe_hfhg.frappe_hfhg.doctype.ad_attribution_daily.ad_attribution_daily.queue_ad_attribution_refresh",
+        ],
+        "on_trash": [
+            "frappe_hfhg.api.calendar.update_income_till_date",
+            "frappe_hfhg.api.calendar.invalidate_calendar_months",
+            "frappe_hfhg.frappe_hfhg.doctype.ad_attribution_daily.ad_attribution_daily.queue_ad_attribution_refresh",
+        ],
+    },
+    "Costing": {
+        "on_update": ["frappe_hfhg.frappe_hfhg.doctype.ad_attribution_daily.ad_attribution_daily.queue_ad_attribution_refresh"],
+        "on_trash": ["frappe_hfhg.frappe_hfhg.doctype.ad_attribution_daily.ad_attribution_daily.queue_ad_attribution_refresh"],
+    },
+    "Payment": {
+        "on_update": ["frappe_hfhg.frappe_hfhg.doctype.ad_attribution_daily.ad_attribution_daily.queue_ad_attribution_refresh"],
+        "on_trash": ["frappe_hfhg.frappe_hfhg.doctype.ad_attribution_daily.ad_attribution_daily.queue_ad_attribution_refresh"],
+    },
+    "Campaign Expense": {
+        "on_update": ["frappe_hfhg.frappe_hfhg.doctype.ad_attribution_daily.ad_attribution_daily.queue_ad_attribution_refresh"],
+        "on_trash": ["frappe_hfhg.frappe_hfhg.doctype.ad_attribution_daily.ad_attribution_daily.queue_ad_attribution_refresh"],
+    },
+    "Consultation": {
+        "on_update": [
+            "frappe_hfhg.api.calendar.update_income_till_date",
+            "frappe_hfhg.api.calendar.invalidate_calendar_months",
+        ],
+        "on_trash": [
+            "frappe_hfhg.api.calendar.update_income_till_date",
+            "frappe_hfhg.api.calendar.invalidate_calendar_months",
+        ],
+    },
+    "Treatment": {
+        "on_update": [
+            "frappe_hfhg.api.calendar.update_income_till_date",
+            "frappe_hfhg.api.calendar.invalidate_calendar_months",
+        ],
+        "on_trash": [
+            "frappe_hfhg.api.calendar.update_income_till_date",
+            "frappe_hfhg.api.calendar.invalidate_calendar_months",
+        ],
     },
     "Report": {
         "on_update": ["frappe_hfhg.frappe_hfhg.doctype.centre_assignment.centre_assignment.sync_single_report_permissions"],
@@ -265,5 +323,12 @@ scheduler_events = {
         "0 0 1 * *": [
             "frappe_hfhg.doctor_scheduler.add_schedule_entry_scheduler"
         ]
-    }
+    },
+    "hourly": [
+        "frappe_hfhg.frappe_hfhg.doctype.bulk_assignment_job.bulk_assignment_job.resume_stalled_bulk_assignments",
+        "frappe_hfhg.lead_load.reconcile_lead_load"
+    ],
+    "daily_long": [
+        "frappe_hfhg.frappe_hfhg.doctype.ad_attribution_daily.ad_attribution_daily.rebuild_ad_attribution"
+    ],
 }
@@ -1,9 +1,12 @@
 import frappe
+from frappe_hfhg.ad_key import make_meta_ads_key_fields
 
 def after_install():
     if not frappe.db.exists('Workspace', 'HFHG'):
         create_custom_workspace()
 
+    make_meta_ads_key_fields()
+
     frappe.db.commit()
 
 def create_custom_workspace():
@@ -0,0 +1,304 @@
+import random
+import time
+from collections import defaultdict
+from functools import partial
+
+import frappe
+from frappe.utils import getdate, today
+
+LEAD_LOAD_KEY = "hfhg_lead_load"
+# A day's counters are only read on that day
+LEAD_LOAD_TTL = 2 * 24 * 60 * 60
+# Set when a day's counters were built from the table; without it they are built before use
+BUILT_FIELD = "__built__"
+ANY = "*"
+SEPARATOR = "\x1f"
+# Seconds a counter must go untouched before the reconcile overwrites it, longer
+# than any transaction whose pick is counted but not committed yet
+LEAD_LOAD_SETTLE = 10 * 60
+
+# Picks an executive and counts the lead for them in one atomic step, so
+# concurrent inserts see each other's picks. Returns nil when the day's
+# counters have not been built yet.
+PICK_EXECUTIVE_SCRIPT = """
+local key, mode, ad_name, campaign_name = KEYS[1], ARGV[1], ARGV[2], ARGV[3]
+if redis.call("HEXISTS", key, ARGV[4]) == 0 then
+	return nil
+end
+
+local function field(executive, ad_part, campaign_part)
+	return executive .. ARGV[5] .. ad_part .. ARGV[5] .. campaign_part
+end
+local function count(name)
+	return tonumber(redis.call("HGET", key, name) or "0")
+end
+local ad_scope = ad_name ~= "" and ad_name or ARGV[6]
+local campaign_scope = campaign_name ~= "" and campaign_name or ARGV[6]
+
+local chosen
+if mode == "round_robin" then
+	chosen = ARGV[9 + count(field(ARGV[6], ARGV[6], campaign_scope)) % (#ARGV - 8)]
+else
+	local lowest
+	for i = 9, #ARGV do
+		local load
+		if mode == "least_loaded_scoped" then
+			load = count(field(ARGV[i], ad_scope, campaign_scope))
+		else
+			load = count(field(ARGV[i], ARGV[6], ARGV[6]))
+		end
+		if lowest == nil or load < lowest then
+			lowest, chosen = load, ARGV[i]
+		end
+	end
+end
+
+local ad_parts = ad_name ~= "" and {ad_name, ARGV[6]} or {ARGV[6]}
+local campaign_parts = campaign_name ~= "" and {campaign_name, ARGV[6]} or {ARGV[6]}
+for _, executive in ipairs({chosen, ARGV[6]}) do
+	for _, ad_part in ipairs(ad_parts) do
+		for _, campaign_part in ipairs(campaign_parts) do
+			redis.call("HINCRBY", key, field(executive, ad_part, campaign_part), 1)
+			redis.call("HSET", KEYS[2], field(executive, ad_part, campaign_part), ARGV[8])
+		end
+	end
+end
+redis.call("EXPIRE", key, ARGV[7])
+redis.call("EXPIRE", KEYS[2], ARGV[7])
+return chosen
+"""
+
+# Moves the counters of a built day, recording when each was touched. A day
+# that is not built is left alone, its build counts the lead from the table.
+ADJUST_SCRIPT = """
+if redis.call("HEXISTS", KEYS[1], ARGV[1]) == 0 then
+	return
+end
+for i = 5, #ARGV do
+	redis.call("HINCRBY", KEYS[1], ARGV[i], ARGV[2])
+	redis.call("HSET", KEYS[2], ARGV[i], ARGV[4])
+end
+redis.call("EXPIRE", KEYS[1], ARGV[3])
+redis.call("EXPIRE", KEYS[2], ARGV[3])
+"""
+
+# Stores the counts read from the table (field, count pairs from ARGV[3])
+# unless another request built the day meanwhile.
+BUILD_SCRIPT = """
+if redis.call("HEXISTS", KEYS[1], ARGV[1]) == 1 then
+	return
+end
+for i = 3, #ARGV, 2 do
+	redis.call("HSET", KEYS[1], ARGV[i], ARGV[i + 1])
+end
+redis.call("HSET", KEYS[1], ARGV[1], 1)
+redis.call("EXPIRE", KEYS[1], ARGV[2])
+"""
+
+# Overwrites each counter with its count from the table (field, count pairs
+# from ARGV[3]) and drops the counters the table no longer has, but only
+# those not touched since ARGV[2]: a recent pick may not be committed yet or
+# may be missing from the table snapshot, and replacing its counter would
+# lose it.
+RECONCILE_SCRIPT = """
+if redis.call("HEXISTS", KEYS[1], ARGV[1]) == 0 then
+	return
+end
+local function settled(name)
+	local touched = redis.call("HGET", KEYS[2], name)
+	return not touched or tonumber(touched) < tonumber(ARGV[2])
+end
+local counts = {}
+for i = 3, #ARGV, 2 do
+	counts[ARGV[i]] = ARGV[i + 1]
+end
+for _, name in ipairs(redis.call("HKEYS", KEYS[1])) do
+	if name ~= ARGV[1] and counts[name] == nil and settled(name) then
+		redis.call("HDEL", KEYS[1], name)
+	end
+end
+for name, count in pairs(counts) do
+	if settled(name) then
+		redis.call("HSET", KEYS[1], name, count)
+	end
+end
+"""
+
+
+def pick_executive(lead_doc, executives, mode="least_loaded"):
+	"""Pick the executive of `lead_doc` among `executives` and count the lead for them.
+
+	- `least_loaded`: fewest non-duplicate leads created today, ties broken at random
+	- `least_loaded_scoped`: the same, counting only leads with the lead's ad_name and campaign_name (when set)
+	- `round_robin`: the executive at index (leads of the lead's campaign today % team size)
+
+	The loads come from per-day redis counters (see `get_lead_load_entry`), the
+	choice costs one redis call whatever the team size. The lead is counted
+	right away and uncounted if the transaction rolls back; `sync_lead_load`
+	corrects the count once the lead is inserted (say, as a Duplicate Lead).
+	"""
+	executives = [executive for executive in dict.fromkeys(executives) if executive]
+	if not executives:
+		return None
+	if mode != "round_robin":
+		random.shuffle(executives)
+
+	day = today()
+	ad_name, campaign_name = lead_doc.get("ad_name") or "", lead_doc.get("campaign_name") or ""
+	script = frappe.cache().register_script(PICK_EXECUTIVE_SCRIPT)
+	keys = get_lead_load_keys(day)
+	args = [mode, ad_name, campaign_name, BUILT_FIELD, SEPARATOR, ANY, LEAD_LOAD_TTL, time.time(), *executives]
+	chosen = script(keys=keys, args=args)
+	if chosen is None:
+		build_lead_load(day)
+		chosen = script(keys=keys, args=args)
+	chosen = frappe.safe_decode(chosen)
+
+	set_counted_entry(lead_doc, (day, chosen, ad_name, campaign_name))
+	return chosen
+
+
+def get_lead_load_entry(lead_doc):
+	"""(day, executive, ad_name, campaign_name) the lead is counted under, None for leads that are not counted."""
+	if lead_doc.get("status") == "Duplicate Lead" or not lead_doc.get("created_on"):
+		return None
+	return (
+		str(getdate(lead_doc.created_on)),
+		lead_doc.get("executive") or "",
+		lead_doc.get("ad_name") or "",
+		lead_doc.get("campaign_name") or "",
+	)
+
+
+def sync_lead_load(lead_doc, old_doc=None):
+	"""Move the lead's count to its current entry.
+
+	From what this request last counted the lead under (`pick_executive` or an
+	earlier sync, e.g. the save nested in after_insert), otherwise from what
+	`old_doc` (the lead before an update) was counted under.
+	"""
+	new_entry = get_lead_load_entry(lead_doc)
+	if lead_doc.flags.lead_load_counted:
+		old_entry = lead_doc.flags.lead_load_entry
+	else:
+		old_entry = get_lead_load_entry(old_doc) if old_doc else None
+	if old_entry == new_entry:
+		lead_doc.flags.lead_load_counted = True
+		lead_doc.flags.lead_load_entry = new_entry
+		return
+	adjust_lead_load(old_entry, -1)
+	adjust_lead_load(new_entry, 1)
+	set_counted_entry(lead_doc, new_entry, old_entry)
+
+
+def uncount_lead(lead_doc):
+	"""Drop a deleted lead from the counters."""
+	entry = lead_doc.flags.lead_load_entry if lead_doc.flags.lead_load_counted else get_lead_load_entry(lead_doc)
+	if entry:
+		adjust_lead_load(entry, -1)
+		set_counted_entry(lead_doc, None, entry)
+
+
+def set_counted_entry(lead_doc, entry, previous=None):
+	"""Remember what `lead_doc` is counted under, `previous` being what it was counted under before.
+
+	On rollback the count goes back to what it was at the start of the transaction.
+	"""
+	if not lead_doc.flags.lead_load_undo_registered:
+		lead_doc.flags.lead_load_undo_registered = True
+		lead_doc.flags.lead_load_committed_entry = previous
+		frappe.db.after_rollback.add(partial(undo_lead_load, lead_doc))
+		frappe.db.after_commit.add(partial(forget_undo, lead_doc))
+	lead_doc.flags.lead_load_counted = True
+	lead_doc.flags.lead_load_entry = entry
+
+
+def undo_lead_load(lead_doc):
+	committed = lead_doc.flags.lead_load_committed_entry
+	if lead_doc.flags.lead_load_entry != committed:
+		adjust_lead_load(lead_doc.flags.lead_load_entry, -1)
+		adjust_lead_load(committed, 1)
+	lead_doc.flags.lead_load_entry = committed
+	lead_doc.flags.lead_load_counted = committed is not None
+	lead_doc.flags.lead_load_undo_registered = False
+
+
+def forget_undo(lead_doc):
+	lead_doc.flags.lead_load_undo_registered = False
+
+
+def get_lead_load(executive=None, ad_name=None, campaign_name=None, day=None):
+	"""Leads counted for `day` (default today), any value standing for every unset argument."""
+	key = get_lead_load_keys(str(getdate(day or today())))[0]
+	field = SEPARATOR.join((executive or ANY, ad_name or ANY, campaign_name or ANY))
+	return int(frappe.safe_decode(frappe.cache().pipeline().hget(key, field).execute()[0] or 0))
+
+
+def adjust_lead_load(entry, delta):
+	if not entry:
+		return
+	day, executive, ad_name, campaign_name = entry
+	frappe.cache().register_script(ADJUST_SCRIPT)(
+		keys=get_lead_load_keys(day),
+		args=[BUILT_FIELD, delta, LEAD_LOAD_TTL, time.time(), *get_fields(executive, ad_name, campaign_name)],
+	)
+
+
+def get_table_counts(day):
+	"""Counter values of `day` from one grouped query on the Lead table."""
+	counts = defaultdict(int)
+	for executive, ad_name, campaign_name, leads in frappe.db.sql(
+		"""
+		SELECT executive, ad_name, campaign_name, COUNT(*)
+		FROM `tabLead`
+		WHERE created_on = %s AND IFNULL(status, '') != 'Duplicate Lead'
+		GROUP BY executive, ad_name, campaign_name
+		""",
+		day,
+	):
+		for field in get_fields(executive, ad_name, campaign_name):
+			counts[field] += leads
+	return counts
+
+
+def build_lead_load(day=None):
+	"""Build the counters of `day` (default today) from the table, unless they are built already."""
+	day = str(getdate(day or today()))
+	counts = get_table_counts(day)
+	frappe.cache().register_script(BUILD_SCRIPT)(
+		keys=get_lead_load_keys(day)[:1],
+		args=[BUILT_FIELD, LEAD_LOAD_TTL, *(value for item in counts.items() for value in item)],
+	)
+
+
+def reconcile_lead_load(day=None, settle=LEAD_LOAD_SETTLE):
+	"""Hourly: correct today's counters from the table, dropping drift from deleted, renamed or bulk edited leads.
+
+	Counters touched in the last `settle` seconds are left as they are, see `RECONCILE_SCRIPT`.
+	"""
+	day = str(getdate(day or today()))
+	cutoff = time.time() - settle
+	counts = get_table_counts(day)
+	frappe.cache().register_script(RECONCILE_SCRIPT)(
+		keys=get_lead_load_keys(day),
+		args=[BUILT_FIELD, cutoff, *(value for item in counts.items() for value in item)],
+	)
+
+
+def get_fields(executive, ad_name, campaign_name):
+	"""Counter fields a lead is counted in: its executive / ad_name / campaign_name, each also as any."""
+	return [
+		SEPARATOR.join(parts)
+		for parts in (
+			(e, a, c)
+			for e in {executive or ANY, ANY}
+			for a in {ad_name or ANY, ANY}
+			for c in {campaign_name or ANY, ANY}
+		)
+	]
+
+
+def get_lead_load_keys(day):
+	"""Keys of the counters of `day` and of the time each counter was last touched."""
+	key = frappe.cache().make_key(f"{LEAD_LOAD_KEY}:{day}")
+	return [key, f"{key}:touched"]
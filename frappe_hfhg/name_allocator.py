@@ -0,0 +1,66 @@
+import frappe
+
+NAME_COUNTER_KEY = "hfhg_name_counter"
+# Counters are re-seeded from the table after this long, so deleted or renamed documents can not skew them for good
+NAME_COUNTER_TTL = 24 * 60 * 60
+
+
+def allocate_name(doctype, base, separator, closing=""):
+	"""Number of the next document named after `base` in `doctype`.
+
+	1 means `base` itself is free, N > 1 means `{base}{separator}{N}{closing}`
+	(see `format_name`). Numbers come from a redis counter per base name,
+	shared by its spellings that differ only in case as the table's name
+	column compares them equal, so concurrent inserts of the same name never
+	get the same number. Only a
+	missing counter is seeded, from the highest existing suffix with one
+	indexed query; with the counter in place an allocation costs one exists
+	check on the table.
+	"""
+	key = get_name_counter_key(doctype, base)
+	for _attempt in range(3):
+		# Raw get: RedisWrapper.exists would prefix the already made key again
+		if frappe.cache().get(key) is None:
+			frappe.cache().set(key, get_highest_suffix(doctype, base, separator, closing), ex=NAME_COUNTER_TTL, nx=True)
+		number = int(frappe.cache().incr(key))
+		# Names made outside the allocator (renames, imports) can be ahead of the counter
+		if not frappe.db.exists(doctype, format_name(base, number, separator, closing)):
+			return number
+		frappe.cache().delete(key)
+
+	frappe.throw(frappe._("Could not find a free name for {0} {1}").format(doctype, base))
+
+
+def get_name_counter_key(doctype, base):
+	return frappe.cache().make_key(f"{NAME_COUNTER_KEY}:{doctype}:{base.casefold()}")
+
+
+def format_name(base, number, separator, closing=""):
+	return base if number == 1 else f"{base}{separator}{number}{closing}"
+
+
+def get_highest_suffix(doctype, base, separator, closing=""):
+	"""Highest N among `base` (counted as 1) and `{base}{separator}{N}{closing}` in `doctype`, 0 when there is none."""
+	prefix = f"{base}{separator}"
+	result = frappe.db.sql(
+		f"""
+		SELECT MAX(IF(name = %(base)s, 1, CAST(suffix AS UNSIGNED)))
+		FROM (
+			SELECT name, SUBSTRING(name, %(start)s, CHAR_LENGTH(name) - %(trim)s) AS suffix
+			FROM `tab{doctype}`
+			WHERE name = %(base)s OR name LIKE %(pattern)s
+		) named
+		WHERE name = %(base)s OR suffix REGEXP '^[0-9]+$'
+		""",
+		{
+			"base": base,
+			"pattern": f"{escape_like(prefix)}%{escape_like(closing)}",
+			"start": len(prefix) + 1,
+			"trim": len(prefix) + len(closing),
+		},
+	)
+	return int(result[0][0] or 0) if result else 0
+
+
+def escape_like(value):
+	return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
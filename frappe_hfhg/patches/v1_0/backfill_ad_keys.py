@@ -0,0 +1,25 @@
+import frappe
+
+from frappe_hfhg.ad_key import make_meta_ads_key_fields
+
+
+def execute():
+	"""Fill the canonical `ad_key` of Lead, Campaign Expense and Meta Ads (see ad_key.get_ad_key)."""
+	for doctype, source_field in (("Lead", "meta_ad_id"), ("Campaign Expense", "ad_id")):
+		frappe.db.sql(
+			f"""
+			UPDATE `tab{doctype}`
+			SET ad_key = NULLIF(REPLACE(LOWER(TRIM(IFNULL(`{source_field}`, ''))), '.0', ''), '')
+			"""
+		)
+
+	make_meta_ads_key_fields()
+	if frappe.db.exists("DocType", "Meta Ads"):
+		frappe.db.sql(
+			"""
+			UPDATE `tabMeta Ads`
+			SET ad_key = NULLIF(REPLACE(LOWER(TRIM(name)), '.0', ''), ''),
+				ads_name_key = NULLIF(LOWER(TRIM(IFNULL(ads_name, ''))), '')
+			"""
+		)
+	frappe.db.commit()
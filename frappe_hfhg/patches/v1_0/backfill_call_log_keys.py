@@ -0,0 +1,33 @@
+import frappe
+
+
+def execute():
+	"""Fill Call Logs.call_key for stored calls so resyncs of old records are skipped (see api.get_call_log_key).
+
+	call_key is unique: a row whose key an earlier row already holds is a
+	duplicate record and is deleted.
+	"""
+	frappe.db.sql(
+		f"""
+		UPDATE IGNORE `tabCall Logs`
+		SET call_key = {get_call_key_sql("`tabCall Logs`")}
+		WHERE call_key IS NULL
+		ORDER BY creation, name
+		"""
+	)
+	frappe.db.sql(
+		f"""
+		DELETE duplicate FROM `tabCall Logs` duplicate
+		INNER JOIN `tabCall Logs` kept ON kept.call_key = {get_call_key_sql("duplicate")}
+		WHERE duplicate.call_key IS NULL
+		"""
+	)
+	frappe.db.commit()
+
+
+def get_call_key_sql(alias):
+	return f"""CONCAT_WS('|',
+		COALESCE(NULLIF({alias}.agent_id, ''), NULLIF({alias}.device_id, ''), ''),
+		IFNULL(DATE_FORMAT({alias}.`datetime`, '%Y-%m-%d %H:%i:%s'), ''),
+		IFNULL({alias}.phone_number, '')
+	)"""
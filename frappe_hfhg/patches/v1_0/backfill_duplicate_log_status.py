@@ -0,0 +1,17 @@
+import frappe
+
+from frappe_hfhg.frappe_hfhg.doctype.duplicate_leads_logs.duplicate_leads_logs import get_status_from_log_object
+
+
+def execute():
+	"""Parse the original lead status out of stored Duplicate Leads Logs objects once,
+	so the duplicate lead report reads `original_lead_status` instead."""
+	for log in frappe.get_all(
+		"Duplicate Leads Logs",
+		filters={"original_lead_status": ["is", "not set"]},
+		pluck="name",
+	):
+		status = get_status_from_log_object(frappe.db.get_value("Duplicate Leads Logs", log, "object"))
+		if status:
+			frappe.db.set_value("Duplicate Leads Logs", log, "original_lead_status", status, update_modified=False)
+	frappe.db.commit()
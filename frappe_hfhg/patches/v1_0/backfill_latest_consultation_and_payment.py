@@ -0,0 +1,7 @@
+from frappe_hfhg.frappe_hfhg.doctype.consultation.consultation import rebuild_latest_consultations
+from frappe_hfhg.frappe_hfhg.doctype.payment.payment import rebuild_latest_payment_confirmations
+
+
+def execute():
+	rebuild_latest_consultations()
+	rebuild_latest_payment_confirmations()
@@ -0,0 +1,13 @@
+import frappe
+
+
+def execute():
+	"""Fill Lead.contact_number_key / alternative_number_key (digits-only, last 10) for existing leads."""
+	for fieldname in ("contact_number", "alternative_number"):
+		frappe.db.sql(
+			f"""
+			UPDATE `tabLead`
+			SET `{fieldname}_key` = NULLIF(RIGHT(REGEXP_REPLACE(IFNULL(`{fieldname}`, ''), '[^0-9]', ''), 10), '')
+			"""
+		)
+	frappe.db.commit()
@@ -0,0 +1,5 @@
+from frappe_hfhg.frappe_hfhg.doctype.ad_attribution_daily.ad_attribution_daily import rebuild_ad_attribution
+
+
+def execute():
+	rebuild_ad_attribution()
@@ -0,0 +1,5 @@
+from frappe_hfhg.frappe_hfhg.doctype.original_lead.original_lead import rebuild_original_leads
+
+
+def execute():
+	rebuild_original_leads()
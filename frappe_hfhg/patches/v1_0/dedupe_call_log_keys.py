@@ -0,0 +1,16 @@
+import frappe
+
+
+def execute():
+	"""Delete repeated Call Logs (same call_key, the earliest row is kept) before call_key becomes unique."""
+	if not frappe.db.has_column("Call Logs", "call_key"):
+		return
+
+	frappe.db.sql(
+		"""
+		DELETE duplicate FROM `tabCall Logs` duplicate
+		INNER JOIN `tabCall Logs` kept ON kept.call_key = duplicate.call_key
+			AND (kept.creation, kept.name) < (duplicate.creation, duplicate.name)
+		"""
+	)
+	frappe.db.commit()
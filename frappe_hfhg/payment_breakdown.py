@@ -0,0 +1,139 @@
+import frappe
+
+
+def get_payments(patients, payment_type, payment_type_filter="Payment"):
+	"""Payments of `payment_type` ("Costing" / "Surgery") for `patients`, grouped by patient.
+
+	Each payment carries its `payment_entries` and `gst_payment_entries` rows,
+	newest payment first, so a whole report is loaded in three queries
+	instead of a `frappe.get_doc` per row.
+	"""
+	patients = list({patient for patient in patients if patient})
+	if not patients:
+		return {}
+
+	payments = frappe.get_all(
+		"Payment",
+		filters={"payment_type": payment_type, "type": payment_type_filter, "patient": ["in", patients]},
+		fields=["*"],
+		order_by="modified desc",
+	)
+	attach_payment_entries(payments)
+
+	payments_by_patient = {}
+	for payment in payments:
+		payments_by_patient.setdefault(payment.patient, []).append(payment)
+	return payments_by_patient
+
+
+def attach_payment_entries(payments):
+	"""Set `payment_entries` / `gst_payment_entries` on each payment dict, in row order."""
+	by_name = {}
+	for payment in payments:
+		payment.payment_entries = []
+		payment.gst_payment_entries = []
+		by_name[payment.name] = payment
+	if not by_name:
+		return payments
+
+	names = list(by_name)
+	for doctype, parentfield in (("Payment Entry", "payment_entries"), ("GST Payment Entry", "gst_payment_entries")):
+		for entry in frappe.get_all(
+			doctype,
+			filters={"parenttype": "Payment", "parentfield": parentfield, "parent": ["in", names]},
+			fields=["*"],
+			order_by="idx asc",
+		):
+			by_name[entry.parent][parentfield].append(entry)
+	return payments
+
+
+def get_refund_totals(payment_names):
+	"""Refunded amount (with + without GST) per refunded payment name."""
+	payment_names = [name for name in payment_names if name]
+	if not payment_names:
+		return {}
+
+	rows = frappe.db.sql(
+		"""
+		SELECT refund_payment_id, SUM(IFNULL(with_gst_amount, 0) + IFNULL(without_gst_amount, 0)) AS amount
+		FROM `tabPayment`
+		WHERE refund_payment_id IN %(payment_names)s
+		GROUP BY refund_payment_id
+		""",
+		{"payment_names": tuple(payment_names)},
+		as_dict=True,
+	)
+	return {row.refund_payment_id: row.amount or 0 for row in rows}
+
+
+def summarize_payments(payments, refund_totals=None):
+	"""Cash / card / online / GST / refund totals and the methods and accounts used, in one pass."""
+	summary = frappe._dict(
+		cash=0, card=0, online_llp=0, gst=0, refund=0, payment_modes=[], payment_ins=[]
+	)
+	refund_totals = refund_totals or {}
+
+	for payment in payments:
+		for entry in payment.get("gst_payment_entries") or []:
+			summary.gst += entry.get("gst_amount") or 0
+			add_entry(summary, entry)
+		for entry in payment.get("payment_entries") or []:
+			add_entry(summary, entry)
+		summary.refund += refund_totals.get(payment.name, 0)
+
+	return summary
+
+
+def add_entry(summary, entry):
+	amount = entry.get("amount") or 0
+	method = entry.get("method")
+	if method == "Cash":
+		summary.cash += amount
+	elif method == "Card":
+		summary.card += amount
+	else:
+		summary.online_llp += amount
+	if method:
+		summary.payment_modes.append(method)
+	if entry.get("payment_in"):
+		summary.payment_ins.append(entry.get("payment_in"))
+
+
+def get_booking_breakdowns(patients):
+	"""Booking (Costing) payment breakdown per patient: the payment, its mode, account,
+	booking amount and booking GST, read from the first GST / non-GST entry.
+
+	Every patient gets an entry; patients without a booking payment get empty values.
+	"""
+	payments = get_payments(patients, "Costing")
+	breakdowns = {}
+	for patient in patients:
+		breakdown = frappe._dict(
+			payment=None, payment_mode="", payment_in="", booking_amount=0, booking_gst=0, transaction_date=None
+		)
+		# The latest booking payment wins, as `frappe.get_doc("Payment", filters)` did
+		payment = (payments.get(patient) or [None])[0]
+		if payment:
+			breakdown.payment = payment
+			breakdown.transaction_date = payment.transaction_date
+			gst_entries = payment.gst_payment_entries
+			non_gst_entries = payment.payment_entries
+			if payment.get("with_gst_amount") and gst_entries:
+				breakdown.payment_mode = gst_entries[0].get("method")
+				breakdown.payment_in = gst_entries[0].get("payment_in")
+				breakdown.booking_amount = int(gst_entries[0].get("amount") or 0)
+				breakdown.booking_gst = gst_entries[0].get("gst_amount")
+			elif payment.get("without_gst_amount") and non_gst_entries:
+				breakdown.payment_mode = non_gst_entries[0].get("method")
+				breakdown.payment_in = non_gst_entries[0].get("payment_in")
+				breakdown.booking_amount = int(non_gst_entries[0].get("amount") or 0)
+		breakdowns[patient] = breakdown
+	return breakdowns
+
+
+def get_surgery_breakdowns(patients):
+	"""Surgery payment totals per patient (see `summarize_payments`), refunds included."""
+	payments = get_payments(patients, "Surgery")
+	refund_totals = get_refund_totals([payment.name for rows in payments.values() for payment in rows])
+	return {patient: summarize_payments(payments.get(patient, []), refund_totals) for patient in patients}
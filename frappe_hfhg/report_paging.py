@@ -0,0 +1,144 @@
+import csv
+import io
+import tempfile
+
+import frappe
+from frappe import _
+from frappe.utils import cint
+from werkzeug.wrappers import Response
+from werkzeug.wsgi import wrap_file
+
+# Upper bound of one UI page, the reports stay usable on any date range
+MAX_PAGE_LENGTH = 5000
+# Rows read from the unbuffered cursor between two writes of the export file
+EXPORT_CHUNK_SIZE = 2000
+EXPORT_FORMATS = {
+	"CSV": ("csv", "text/csv; charset=utf-8"),
+	"Excel": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+def get_page_length(filters):
+	"""Rows per page asked for by `filters.page_length`, 0 when the report is not paginated."""
+	page_length = cint(filters.get("page_length"))
+	if page_length <= 0:
+		return 0
+	return min(page_length, MAX_PAGE_LENGTH)
+
+
+def paginate_query(query, params, filters, sort_field, name_field, cursor_field):
+	"""Order `query` by (`sort_field`, `name_field`) and, when paginated, keep only the page after the cursor.
+
+	The cursor is the (`cursor_field`, `after_name`) pair of the last row of the
+	previous page, passed back in `filters`. One row more than the page is
+	fetched so `get_next_cursor` knows whether another page follows.
+	"""
+	page_length = get_page_length(filters)
+	if page_length and filters.get("after_name") and filters.get(cursor_field):
+		query += f"""
+			AND ({sort_field} > %(after_sort)s
+				OR ({sort_field} = %(after_sort)s AND {name_field} > %(after_name)s))
+		"""
+		params["after_sort"] = filters.get(cursor_field)
+		params["after_name"] = filters.get("after_name")
+
+	query += f" ORDER BY {sort_field}, {name_field}"
+	if page_length:
+		query += " LIMIT %(page_length)s"
+		params["page_length"] = page_length + 1
+	return query, params
+
+
+def get_next_cursor(rows, filters, sort_key, name_key, cursor_field):
+	"""Trim the look-ahead row off `rows` and return the cursor of the next page (None on the last page)."""
+	page_length = get_page_length(filters)
+	if not page_length or len(rows) <= page_length:
+		return None
+
+	del rows[page_length:]
+	last = rows[-1]
+	return {cursor_field: str(last.get(sort_key)), "after_name": last.get(name_key)}
+
+
+def count_query(query, params, aggregates=None):
+	"""COUNT(*) over the rows of `query`, plus any `aggregates` ({alias: SQL expression over its columns})."""
+	columns = ["COUNT(*) AS row_count"]
+	columns += [f"{expression} AS {alias}" for alias, expression in (aggregates or {}).items()]
+	result = frappe.db.sql(
+		f"SELECT {', '.join(columns)} FROM ({query}) paged_rows",
+		params,
+		as_dict=True,
+	)
+	return result[0] if result else frappe._dict(row_count=0)
+
+
+def iter_query(query, params):
+	"""Yield the rows of `query` from an unbuffered (server side) cursor.
+
+	Nothing else may run on the connection until the generator is exhausted.
+	"""
+	with frappe.db.unbuffered_cursor():
+		yield from frappe.db.sql(query, params, as_dict=True, as_iterator=True)
+
+
+def check_export_permission(report_name):
+	"""Raise unless the user may run `report_name` and export its reference doctype, as the desk report export does."""
+	report = frappe.get_doc("Report", report_name)
+	if not report.is_permitted():
+		frappe.throw(_("You don't have access to Report: {0}").format(report_name), frappe.PermissionError)
+	if not frappe.has_permission(report.ref_doctype, "export"):
+		frappe.throw(_("You are not allowed to export {0}").format(_(report.ref_doctype)), frappe.PermissionError)
+
+
+def export_query(query, params, columns, build_row, filename, file_format="CSV"):
+	"""Stream the rows of `query` into a CSV / Excel file and send it as a download.
+
+	Rows go through `build_row` one at a time and are written in chunks to a
+	temporary file, so memory stays bounded however many rows there are.
+	"""
+	if file_format not in EXPORT_FORMATS:
+		frappe.throw(_("Export format must be one of {0}").format(", ".join(EXPORT_FORMATS)))
+
+	extension, content_type = EXPORT_FORMATS[file_format]
+	fieldnames = [column["fieldname"] for column in columns]
+	labels = [column["label"] for column in columns]
+
+	output = tempfile.TemporaryFile()
+	if file_format == "CSV":
+		text = io.TextIOWrapper(output, encoding="utf-8-sig", newline="")
+		writer = csv.writer(text)
+		write_rows = writer.writerows
+		writer.writerow(labels)
+	else:
+		from openpyxl import Workbook
+
+		workbook = Workbook(write_only=True)
+		sheet = workbook.create_sheet(filename[:31])
+		sheet.append(labels)
+
+		def write_rows(chunk):
+			for values in chunk:
+				sheet.append(values)
+
+	chunk = []
+	for record in iter_query(query, params):
+		row = build_row(record)
+		chunk.append([row.get(fieldname) for fieldname in fieldnames])
+		if len(chunk) >= EXPORT_CHUNK_SIZE:
+			write_rows(chunk)
+			chunk = []
+	write_rows(chunk)
+
+	if file_format == "CSV":
+		text.flush()
+		text.detach()
+	else:
+		workbook.save(output)
+	output.seek(0)
+
+	return Response(
+		wrap_file(frappe.request.environ, output),
+		content_type=content_type,
+		headers={"Content-Disposition": f'attachment; filename="{filename}.{extension}"'},
+		direct_passthrough=True,
+	)
@@ -1,8 +1,8 @@
 import frappe
 import calendar
 from datetime import datetime, timedelta
-from frappe.query_builder import DocType
 from frappe.utils import getdate, add_days, now, cint
+from frappe_hfhg.api.whatsapp import get_lead_from_number
 
 SLOTS = [
     "10:30 AM", "11:00 AM", "11:30 AM", "12:00 PM", "12:30 PM", 
@@ -54,32 +54,15 @@ def whatsapp_message_notification(doc, method):
         # Normalize phone number by removing non-digit characters
         message_from = ''.join(filter(str.isdigit, getattr(doc, 'from', '') or ''))
 
-        # Define Lead Doctype for Query Builder
-        Lead = DocType('Lead')
-
-        # Query to find matching leads (excluding Duplicate Lead)
-        query = (
-            frappe.qb.from_(Lead)
-            .select(
-                Lead.name,
-                Lead.first_name,
-                Lead.contact_number,
-                Lead.executive
+        # Resolve the sender through the indexed (and cached) number lookup
+        lead_name, _doctype = get_lead_from_number(message_from)
+        lead = None
+        if lead_name:
+            lead = frappe.db.get_value(
+                "Lead", lead_name, ["name", "first_name", "contact_number", "executive"], as_dict=True
             )
-            .where(
-                (Lead.status != 'Duplicate Lead')
-                & (Lead.contact_number.like(f"%{message_from}%"))
-            )
-            .groupby(Lead.executive)
-            .orderby(Lead.creation, order=frappe.qb.terms.Order.desc)
-            .limit(1)
-        )
-
-        # Execute the query
-        lead = query.run(as_dict=True)
 
         if lead:
-            lead = lead[0]  # Get the first matching lead
             executive = lead.get('executive')
             lead_name = lead.get('first_name') or lead.get('name')
             lead_name = frappe.bold(lead_name)  # Highlight the lead's name
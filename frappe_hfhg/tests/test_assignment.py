@@ -0,0 +1,135 @@
+import json
+
+import frappe
+from frappe.tests.utils import FrappeTestCase
+
+from frappe_hfhg.assignment import READ_ACCESS, apply_assignment_changes, reconcile_assignments
+from frappe_hfhg.tests.utils import count_queries, insert_rows
+
+CENTER = "_Test Assignment Center"
+CLINIC_MANAGER = "_test_assignment_manager@example.com"
+OUTSIDER = "_test_assignment_outsider@example.com"
+
+
+class TestAssignment(FrappeTestCase):
+	def setUp(self):
+		insert_rows("Center", [{"name": CENTER, "clinic_manager": CLINIC_MANAGER}])
+		self.first, self.second = insert_executives(2)
+
+	def test_reconcile_query_count_is_constant(self):
+		"""Reconciling a batch of leads must not run a set of queries per lead."""
+		few = insert_leads(2)
+		many = insert_leads(30)
+
+		small = count_queries(lambda: reconcile_assignments("Lead", few, notify=False))
+		large = count_queries(lambda: reconcile_assignments("Lead", many, notify=False))
+		self.assertEqual(small, large)
+
+		# A second pass finds nothing to change
+		reconcile_assignments("Lead", many, notify=False)
+		self.assertEqual(
+			frappe.db.count("ToDo", {"reference_type": "Lead", "reference_name": ["in", many], "status": "Open"}),
+			len(many),
+		)
+		self.assertEqual(
+			frappe.db.count("DocShare", {"share_doctype": "Lead", "share_name": ["in", many], "write": 1}),
+			len(many),
+		)
+
+	def test_new_executive_replaces_the_old_one(self):
+		lead = insert_leads(1, executive=self.first.name)[0]
+		reconcile_assignments("Lead", [lead], notify=False)
+		self.assertEqual(get_open_assignees(lead), {self.first.email, CLINIC_MANAGER})
+		self.assertEqual(get_assign_field(lead), {self.first.email, CLINIC_MANAGER})
+
+		frappe.db.set_value("Lead", lead, "executive", self.second.name)
+		reconcile_assignments("Lead", [lead], notify=False)
+		# Without reset_on_new_executive the old executive keeps the lead
+		self.assertEqual(get_open_assignees(lead), {self.first.email, self.second.email, CLINIC_MANAGER})
+
+		lead = insert_leads(1, executive=self.first.name)[0]
+		reconcile_assignments("Lead", [lead], notify=False)
+		frappe.db.set_value("Lead", lead, "executive", self.second.name)
+		reconcile_assignments("Lead", [lead], reset_on_new_executive=True, notify=False)
+		self.assertEqual(get_open_assignees(lead), {self.second.email, CLINIC_MANAGER})
+		self.assertEqual(set(get_shares(lead)), {self.second.email, CLINIC_MANAGER})
+		self.assertEqual(get_assign_field(lead), {self.second.email, CLINIC_MANAGER})
+		self.assertEqual(
+			frappe.db.count(
+				"ToDo", {"reference_type": "Lead", "reference_name": lead, "allocated_to": self.first.email, "status": "Cancelled"}
+			),
+			1,
+		)
+
+	def test_release_and_reset_drop_only_undesired_users(self):
+		lead = insert_leads(1, executive=self.first.name)[0]
+		reconcile_assignments("Lead", [lead], notify=False)
+		give_outsider(lead)
+
+		# Users outside the desired set stay unless asked for
+		reconcile_assignments("Lead", [lead], notify=False)
+		self.assertIn(OUTSIDER, get_open_assignees(lead))
+
+		# release drops the listed users, except those still desired
+		reconcile_assignments("Lead", [lead], release={lead: [OUTSIDER, CLINIC_MANAGER]}, notify=False)
+		self.assertEqual(get_open_assignees(lead), {self.first.email, CLINIC_MANAGER})
+		self.assertEqual(set(get_shares(lead)), {self.first.email, CLINIC_MANAGER})
+		self.assertEqual(get_assign_field(lead), {self.first.email, CLINIC_MANAGER})
+
+		give_outsider(lead)
+		self.assertIn(OUTSIDER, get_open_assignees(lead))
+		reconcile_assignments("Lead", [lead], reset=[lead], notify=False)
+		self.assertEqual(get_open_assignees(lead), {self.first.email, CLINIC_MANAGER})
+		self.assertEqual(set(get_shares(lead)), {self.first.email, CLINIC_MANAGER})
+		self.assertEqual(get_assign_field(lead), {self.first.email, CLINIC_MANAGER})
+
+	def test_read_only_share_is_upgraded_in_place(self):
+		lead = insert_leads(1, executive=self.first.name)[0]
+		apply_assignment_changes("Lead", share={(lead, self.first.email): READ_ACCESS})
+		self.assertEqual(get_shares(lead), {self.first.email: (1, 0, 0)})
+
+		reconcile_assignments("Lead", [lead], notify=False)
+		self.assertEqual(get_shares(lead), {self.first.email: (1, 1, 1), CLINIC_MANAGER: (1, 1, 1)})
+
+
+def insert_executives(count):
+	executives = [
+		frappe._dict(name=f"_Test Assignment Executive {i}", email=f"_test_assignment_executive_{i}@example.com")
+		for i in range(count)
+	]
+	insert_rows(
+		"Executive",
+		[{"name": executive.name, "fullname": executive.name, "email": executive.email} for executive in executives],
+	)
+	return executives
+
+
+def insert_leads(count, **fields):
+	return insert_rows("Lead", [{"center": CENTER, **fields} for _i in range(count)])
+
+
+def give_outsider(lead):
+	apply_assignment_changes("Lead", assign={(lead, OUTSIDER)}, share={(lead, OUTSIDER): READ_ACCESS})
+
+
+def get_open_assignees(lead):
+	return set(
+		frappe.get_all(
+			"ToDo",
+			filters={"reference_type": "Lead", "reference_name": lead, "status": "Open"},
+			pluck="allocated_to",
+		)
+	)
+
+
+def get_shares(lead):
+	return {
+		row.user: (row.read, row.write, row.share)
+		for row in frappe.get_all(
+			"DocShare", filters={"share_doctype": "Lead", "share_name": lead}, fields=["user", "read", "write", "share"]
+		)
+	}
+
+
+def get_assign_field(lead):
+	return set(json.loads(frappe.db.get_value("Lead", lead, "_assign") or "[]"))
@@ -0,0 +1,30 @@
+from unittest.mock import patch
+
+import frappe
+
+
+def count_queries(fn):
+	"""Number of `frappe.db.sql` calls `fn()` makes."""
+	with patch.object(frappe.db, "sql", wraps=frappe.db.sql) as sql:
+		fn()
+	return sql.call_count
+
+
+def insert_rows(doctype, rows):
+	"""Insert bare `doctype` rows, skipping controller validation, and return their names.
+
+	Rows without a name get a random one; creation and modified default to now.
+	"""
+	names = []
+	now = frappe.utils.now()
+	for row in rows:
+		row = {"name": frappe.generate_hash(length=10), "creation": now, "modified": now, **row}
+		frappe.db.sql(
+			f"""
+			INSERT INTO `tab{doctype}` ({", ".join(f"`{field}`" for field in row)})
+			VALUES ({", ".join(["%s"] * len(row))})
+			""",
+			tuple(row.values()),
+		)
+		names.append(row["name"])
+	return names
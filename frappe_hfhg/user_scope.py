@@ -0,0 +1,117 @@
+import frappe
+
+USER_SCOPE_CACHE_KEY = "hfhg_user_scope"
+PERMISSION_QUERY_CACHE_KEY = "hfhg_permission_query_condition"
+
+
+def get_user_scope(user=None):
+	"""Return the resolved Executive / Receptionist / Center / Centre Assignment
+	links of a user, cached in redis per user.
+
+	The cache is dropped from the on_update / on_trash of Executive,
+	Receptionist, Center and Centre Assignment (see `clear_user_scope`).
+	Roles are deliberately not part of the scope, `frappe.get_roles` has its
+	own cache which frappe invalidates when a user's roles change.
+	"""
+	user = user or frappe.session.user
+	scope = frappe.cache().hget(USER_SCOPE_CACHE_KEY, user)
+	if scope is None:
+		scope = build_user_scope(user)
+		frappe.cache().hset(USER_SCOPE_CACHE_KEY, user, scope)
+	return frappe._dict(scope)
+
+
+def build_user_scope(user):
+	scope = {
+		"user": user,
+		"executive": None,
+		"executive_fullname": None,
+		"receptionist": None,
+		"receptionist_center": None,
+		"receptionist_desk_center": None,
+		"clinic_manager_center": None,
+		"assigned_centres": [],
+	}
+
+	executive = frappe.db.get_value("Executive", {"email": user}, ["name", "fullname"], as_dict=1)
+	if executive:
+		scope["executive"] = executive.name
+		scope["executive_fullname"] = executive.fullname
+
+	receptionist_fields = ["name"]
+	if frappe.get_meta("Receptionist").has_field("center"):
+		receptionist_fields.append("center")
+	receptionist = frappe.db.get_value("Receptionist", {"email": user}, receptionist_fields, as_dict=1)
+	if receptionist:
+		scope["receptionist"] = receptionist.name
+		scope["receptionist_center"] = receptionist.get("center")
+		scope["receptionist_desk_center"] = frappe.db.get_value("Center", {"receptionist": receptionist.name}, "name")
+
+	scope["clinic_manager_center"] = frappe.db.get_value("Center", {"clinic_manager": user}, "name")
+
+	scope["assigned_centres"] = [
+		row.center
+		for row in frappe.db.sql(
+			"""
+			SELECT cs.center
+			FROM `tabCentre Assignment` ca
+			INNER JOIN `tabCenter Selection` cs
+				ON cs.parent = ca.name AND cs.parenttype = 'Centre Assignment'
+			WHERE ca.user = %(user)s
+			ORDER BY cs.idx
+			""",
+			{"user": user},
+			as_dict=True,
+		)
+	]
+
+	return scope
+
+
+def clear_user_scope(users=None):
+	"""Drop cached scopes for `users` (a user id or list of ids), or for everyone when empty.
+
+	The drop is repeated after commit so a concurrent request can not re-cache
+	the pre-commit rows.
+	"""
+	if isinstance(users, str):
+		users = [users]
+	users = [user for user in set(users or []) if user]
+
+	_clear_user_scope(users)
+	frappe.db.after_commit.add(lambda: _clear_user_scope(users))
+
+
+def _clear_user_scope(users):
+	if not users:
+		frappe.cache().delete_key(USER_SCOPE_CACHE_KEY)
+		frappe.cache().delete_keys(f"{PERMISSION_QUERY_CACHE_KEY}:")
+		return
+	for user in users:
+		frappe.cache().hdel(USER_SCOPE_CACHE_KEY, user)
+		frappe.cache().delete_value(f"{PERMISSION_QUERY_CACHE_KEY}:{user}")
+
+
+def get_cached_permission_query_condition(user, doctype, build):
+	"""Memoise the SQL condition returned by `build(user, doctype)` per (user, doctype).
+
+	Used by the `permission_query_conditions` hooks, which run on every list
+	view and link search. Cleared together with the user scope.
+	"""
+	key = f"{PERMISSION_QUERY_CACHE_KEY}:{user}"
+	condition = frappe.cache().hget(key, doctype)
+	if condition is None:
+		condition = build(user, doctype)
+		frappe.cache().hset(key, doctype, condition)
+	return condition
+
+
+def clear_user_scope_for_doc(doc, fieldname):
+	"""Clear the scope of the user stored in `fieldname`, before and after the change."""
+	users = [doc.get(fieldname)]
+	old_doc = doc.get_doc_before_save() if hasattr(doc, "get_doc_before_save") else None
+	if old_doc:
+		users.append(old_doc.get(fieldname))
+	users = [user for user in users if user]
+	if users:
+		clear_user_scope(users)